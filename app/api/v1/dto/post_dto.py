@@ -8,3 +8,7 @@ class CreatePostIn(BaseModel):
     photo_url: Optional[str] = None
     visibility: Literal["public", "private"] = "public"
 
+
+class CreateCommentIn(BaseModel):
+    content: str = Field(min_length=1, max_length=2000)
+    parent_comment_id: int | None = None
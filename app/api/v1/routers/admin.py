@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import UTC, date, datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
 
 from app.api.v1.deps.auth import get_current_user
+from app.core.jobs import jobs
+from app.core.pagination import set_next_cursor
 from app.services.admin import admin_service
+from app.services.winter_arc import leaderboard_service
 
 router = APIRouter()
 
+MAX_TIMESERIES_DAYS = 366
+
 
 def require_admin(user):
     if "admin" not in user.get("roles", []):
@@ -24,6 +32,28 @@ async def analytics_programs(user=Depends(get_current_user)):
     return await admin_service.analytics_programs()
 
 
+@router.get("/analytics/timeseries")
+async def analytics_timeseries(
+    metric: Literal["revenue", "enrollment"] = "revenue",
+    start_date: date | None = None,
+    end_date: date | None = None,
+    user=Depends(get_current_user),
+):
+    """
+    Daily revenue or enrollments by product type and tier.
+
+    Query params:
+    - metric: revenue (paid purchases) or enrollment (memberships)
+    - start_date, end_date: inclusive UTC days; defaults to the last 30 days, at most 366 days
+    """
+    require_admin(user)
+    end_date = end_date or datetime.now(UTC).date()
+    start_date = start_date or end_date - timedelta(days=29)
+    if start_date > end_date or (end_date - start_date).days >= MAX_TIMESERIES_DAYS:
+        raise HTTPException(status_code=400, detail="invalid_date_range")
+    return await admin_service.analytics_timeseries(metric, start_date, end_date)
+
+
 @router.delete("/posts/{post_id}")
 async def delete_post(post_id: int, user=Depends(get_current_user)):
     require_admin(user)
@@ -40,7 +70,13 @@ class MarkRespondedRequest(BaseModel):
 
 
 @router.get("/winter-arc/premium-posts")
-async def get_premium_posts_queue(program_id: int = 1, user=Depends(get_current_user)):
+async def get_premium_posts_queue(
+    response: Response,
+    program_id: int = 1,
+    limit: int | None = None,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
     """
     Get premium posts queue for Wagner admin view.
 
@@ -52,9 +88,12 @@ async def get_premium_posts_queue(program_id: int = 1, user=Depends(get_current_
 
     Query params:
     - program_id: Program ID (default 1 for Winter Arc)
+    - limit, cursor: page size (max 100) and the `X-Next-Cursor` value of the previous page
     """
     require_admin(user)
-    return await admin_service.get_premium_posts_queue(program_id)
+    posts, next_cursor = await admin_service.get_premium_posts_queue(program_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return posts
 
 
 @router.post("/winter-arc/posts/{post_id}/mark-responded")
@@ -91,3 +130,29 @@ async def get_premium_stats(program_id: int = 1, user=Depends(get_current_user))
     """
     require_admin(user)
     return await admin_service.get_premium_stats(program_id)
+
+
+@router.post("/winter-arc/leaderboard/recompute", status_code=202)
+async def recompute_leaderboard(program_id: int = 1, user=Depends(get_current_user)):
+    """
+    Start a bulk leaderboard score recompute for a program.
+
+    Returns the job record; poll `GET /admin/jobs/{job_id}` for progress.
+    A recompute already running for the program is returned instead of starting another.
+    """
+    require_admin(user)
+    job = jobs.start(
+        f"leaderboard_recompute:{program_id}",
+        lambda report: leaderboard_service.update_all_leaderboard_scores(program_id, report),
+    )
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user=Depends(get_current_user)):
+    """Get the status, progress and result of a background job."""
+    require_admin(user)
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 
 from app.api.v1.deps.auth import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from app.services.metrics import metrics_service
 from app.api.v1.dto.metric_dto import MetricCreateIn
 
@@ -8,8 +9,15 @@ router = APIRouter()
 
 
 @router.get("/metrics")
-async def list_metrics(user=Depends(get_current_user)):
-    return await metrics_service.list_metrics(user)
+async def list_metrics(
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    metrics, next_cursor = await metrics_service.list_metrics(user, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return metrics
 
 
 @router.post("/metrics")
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from app.api.v1.deps.auth import get_current_user
+from app.core.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from app.services.programs import program_service
-from app.api.v1.dto.post_dto import CreatePostIn
+from app.api.v1.dto.post_dto import CreateCommentIn, CreatePostIn
 
 router = APIRouter()
 
@@ -18,10 +19,18 @@ async def get_program(program_id: int, user=Depends(get_current_user)):
 
 
 @router.get("/{program_id}/posts")
-async def list_posts(program_id: int, user=Depends(get_current_user)):
+async def list_posts(
+    program_id: int,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
     from app.services.posts import posts_service
 
-    return await posts_service.list_posts(program_id, user)
+    posts, next_cursor = await posts_service.list_posts(program_id, user, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return posts
 
 
 @router.post("/{program_id}/posts")
@@ -31,6 +40,94 @@ async def create_post(program_id: int, payload: CreatePostIn, user=Depends(get_c
     return await posts_service.create_post(program_id, payload.model_dump(), user)
 
 
+@router.get("/{program_id}/posts/search")
+async def search_posts(
+    program_id: int,
+    response: Response,
+    q: str = "",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Search posts by title and message, best match first. The next page's cursor is in `X-Next-Cursor`."""
+    from app.services.posts import posts_service
+
+    posts, next_cursor = await posts_service.search_posts(program_id, user, q, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return posts
+
+
+async def _visible_post(program_id: int, post_id: int, user: dict) -> dict:
+    from app.services.posts import posts_service
+
+    post = await posts_service.get_visible_post(program_id, post_id, user)
+    if post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
+
+@router.post("/{program_id}/posts/{post_id}/like")
+async def like_post(program_id: int, post_id: int, user=Depends(get_current_user)):
+    from app.services.posts import likes_service
+
+    await _visible_post(program_id, post_id, user)
+    return await likes_service.like_post(program_id, post_id, user["sub"])
+
+
+@router.delete("/{program_id}/posts/{post_id}/like")
+async def unlike_post(program_id: int, post_id: int, user=Depends(get_current_user)):
+    from app.services.posts import likes_service
+
+    await _visible_post(program_id, post_id, user)
+    return await likes_service.unlike_post(program_id, post_id, user["sub"])
+
+
+@router.get("/{program_id}/posts/{post_id}/comments")
+async def list_comments(
+    program_id: int,
+    post_id: int,
+    response: Response,
+    limit: int | None = None,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Comment threads, oldest first, with replies nested. The next page's cursor is in `X-Next-Cursor`."""
+    from app.services.posts import comments_service
+
+    await _visible_post(program_id, post_id, user)
+    threads, next_cursor = await comments_service.list_comment_threads(post_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    return threads
+
+
+@router.post("/{program_id}/posts/{post_id}/comments")
+async def create_comment(
+    program_id: int, post_id: int, payload: CreateCommentIn, user=Depends(get_current_user)
+):
+    from app.services.posts import comments_service
+
+    await _visible_post(program_id, post_id, user)
+    comment = await comments_service.create_comment(
+        program_id, post_id, user["sub"], payload.content, payload.parent_comment_id
+    )
+    if comment is None:
+        raise HTTPException(status_code=400, detail="invalid_parent_comment")
+    return comment
+
+
+@router.delete("/{program_id}/posts/{post_id}/comments/{comment_id}")
+async def delete_comment(
+    program_id: int, post_id: int, comment_id: int, user=Depends(get_current_user)
+):
+    from app.services.posts import comments_service
+
+    await _visible_post(program_id, post_id, user)
+    removed = await comments_service.delete_comment(program_id, post_id, comment_id, user)
+    if removed is None:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return {"id": comment_id, "deleted": True, "removed": removed}
+
+
 @router.post("/{program_id}/checkout")
 async def checkout_program(program_id: int, tier: str = "standard", user=Depends(get_current_user)):
     if tier not in ("standard", "premium"):
@@ -1,16 +1,25 @@
 """Winter Arc API Router - Endpoints for progress tracking, checklists, achievements, and leaderboard."""
 from datetime import date
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from app.api.v1.deps.auth import get_current_user, has_ebook_access, has_community_access, is_premium_tier
+from app.core.config import settings
+from app.core.http_cache import etag_for, is_not_modified
+from app.core.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 from app.services.winter_arc import (
     achievements_service,
     checklist_service,
+    export_service,
     leaderboard_service,
+    live_service,
     progress_service,
+    side_effects,
     suggestions_service,
+    trends_service,
 )
 
 router = APIRouter()
@@ -102,6 +111,20 @@ class UpdateWeeklyChecklistIn(BaseModel):
     planning_next_week: bool | None = None
 
 
+class DailyChecklistDeltaIn(UpdateDailyChecklistIn):
+    checklist_date: date
+
+
+class WeeklyChecklistDeltaIn(UpdateWeeklyChecklistIn):
+    year: int = Field(ge=2000, le=2100)
+    week_number: int = Field(ge=1, le=53)
+
+
+class SyncChecklistsIn(BaseModel):
+    daily: list[DailyChecklistDeltaIn] = Field(default_factory=list, max_length=120)
+    weekly: list[WeeklyChecklistDeltaIn] = Field(default_factory=list, max_length=20)
+
+
 # ===== PROGRESS ENDPOINTS =====
 
 
@@ -127,10 +150,15 @@ async def update_progress(
     program_id: int, payload: UpdateProgressIn, user=Depends(get_current_user)
 ):
     """Update user's Winter Arc progress."""
-    return await progress_service.create_or_update_progress(
+    progress = await progress_service.create_or_update_progress(
         user["sub"], program_id, **payload.model_dump(exclude_unset=True)
     )
 
+    # A new current weight can reach the weight-progress milestone
+    if payload.current_weight_kg is not None:
+        await side_effects.schedule_side_effects(user["sub"], program_id, "progress")
+    return progress
+
 
 @router.post("/programs/{program_id}/progress/timer")
 async def increment_timer(
@@ -147,20 +175,95 @@ async def create_snapshot(
     program_id: int, payload: CreateSnapshotIn, user=Depends(get_current_user)
 ):
     """Create a progress snapshot."""
-    return await progress_service.create_progress_snapshot(
+    snapshot = await progress_service.create_progress_snapshot(
         user["sub"], program_id, payload.weight_kg, payload.notes
     )
 
+    # Weight-progress suggestions are evaluated in the background
+    await side_effects.schedule_side_effects(user["sub"], program_id, "snapshot")
+    return snapshot
+
 
 @router.get("/programs/{program_id}/progress/snapshots")
-async def get_snapshots(program_id: int, limit: int = 50, user=Depends(get_current_user)):
-    """Get progress snapshots."""
-    return await progress_service.get_progress_snapshots(user["sub"], program_id, limit)
+async def get_snapshots(
+    program_id: int,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Get progress snapshots, newest first. The next page's cursor is in `X-Next-Cursor`."""
+    snapshots, next_cursor = await progress_service.get_progress_snapshots(
+        user["sub"], program_id, limit, cursor
+    )
+    set_next_cursor(response, next_cursor)
+    return snapshots
+
+
+@router.get("/programs/{program_id}/progress/trends")
+async def get_trends(program_id: int, user=Depends(get_current_user)):
+    """
+    Weight and body-fat trends computed server-side.
+
+    Per series: first/latest/min/max, 7- and 28-day averages, slope per week, projected
+    value at the program end date, and daily (last 28) and weekly (last 26) points.
+    """
+    return await trends_service.get_trends(user["sub"], program_id)
 
 
 # ===== CHECKLIST ENDPOINTS =====
 
 
+@router.post("/programs/{program_id}/checklists/sync")
+async def sync_checklists(
+    program_id: int, payload: SyncChecklistsIn, user=Depends(get_current_user)
+):
+    """
+    Apply many daily and weekly checklist deltas in one request (offline clients).
+
+    Checklists are written with one bulk upsert per table; streaks are recomputed once and
+    suggestions, achievements and score are evaluated once afterwards.
+    """
+    result = await checklist_service.sync_checklists(
+        user["sub"],
+        program_id,
+        [d.model_dump(exclude_unset=True) for d in payload.daily],
+        [w.model_dump(exclude_unset=True) for w in payload.weekly],
+    )
+
+    if payload.daily or payload.weekly:
+        await side_effects.schedule_side_effects(user["sub"], program_id, "checklist_sync")
+
+    return result
+
+
+@router.get("/programs/{program_id}/checklists/calendar")
+async def get_checklist_calendar(
+    program_id: int,
+    start_date: date,
+    end_date: date,
+    request: Request,
+    user=Depends(get_current_user),
+):
+    """
+    Compact checklist history for the calendar/heatmap.
+
+    Returns one 10-bit mask per day and one 8-bit mask per ISO week, base64-packed,
+    with an ETag so unchanged calendars come back as 304.
+    """
+    if end_date < start_date or (end_date - start_date).days > 370:
+        raise HTTPException(status_code=400, detail="invalid_date_range")
+
+    calendar = await checklist_service.get_checklist_calendar(
+        user["sub"], program_id, start_date, end_date
+    )
+    body = orjson.dumps(calendar)
+    headers = {"ETag": etag_for(body), "Cache-Control": "private, no-cache"}
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/programs/{program_id}/checklists/daily/today")
 async def get_today_checklist(program_id: int, user=Depends(get_current_user)):
     """Get or create today's daily checklist."""
@@ -169,6 +272,25 @@ async def get_today_checklist(program_id: int, user=Depends(get_current_user)):
     )
 
 
+# Registered before daily/{checklist_date} so "range" is not parsed as a date
+@router.get("/programs/{program_id}/checklists/daily/range")
+async def get_daily_checklists_range(
+    program_id: int,
+    start_date: date,
+    end_date: date,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Get daily checklists for a date range, oldest first. The next page's cursor is in `X-Next-Cursor`."""
+    checklists, next_cursor = await checklist_service.get_daily_checklists_range(
+        user["sub"], program_id, start_date, end_date, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
+    return checklists
+
+
 @router.get("/programs/{program_id}/checklists/daily/{checklist_date}")
 async def get_daily_checklist(
     program_id: int, checklist_date: date, user=Depends(get_current_user)
@@ -192,27 +314,12 @@ async def update_daily_checklist(
         user["sub"], program_id, checklist_date, updates
     )
 
-    # Trigger post suggestions and achievement checks
-    await suggestions_service.check_and_trigger_suggestions(user["sub"], program_id)
-    await achievements_service.check_and_unlock_achievements(user["sub"], program_id)
-    await leaderboard_service.update_user_leaderboard_score(user["sub"], program_id)
+    # Suggestions, achievements and leaderboard score are evaluated in the background
+    await side_effects.schedule_side_effects(user["sub"], program_id, "daily_checklist")
 
     return result
 
 
-@router.get("/programs/{program_id}/checklists/daily/range")
-async def get_daily_checklists_range(
-    program_id: int,
-    start_date: date,
-    end_date: date,
-    user=Depends(get_current_user),
-):
-    """Get daily checklists for a date range."""
-    return await checklist_service.get_daily_checklists_range(
-        user["sub"], program_id, start_date, end_date
-    )
-
-
 @router.get("/programs/{program_id}/checklists/weekly/current")
 async def get_current_week_checklist(program_id: int, user=Depends(get_current_user)):
     """Get or create current week's checklist."""
@@ -245,10 +352,8 @@ async def update_weekly_checklist(
         user["sub"], program_id, year, week, updates
     )
 
-    # Trigger post suggestions and achievement checks
-    await suggestions_service.check_and_trigger_suggestions(user["sub"], program_id)
-    await achievements_service.check_and_unlock_achievements(user["sub"], program_id)
-    await leaderboard_service.update_user_leaderboard_score(user["sub"], program_id)
+    # Suggestions, achievements and leaderboard score are evaluated in the background
+    await side_effects.schedule_side_effects(user["sub"], program_id, "weekly_checklist")
 
     return result
 
@@ -258,12 +363,17 @@ async def get_weekly_checklists_range(
     program_id: int,
     start_date: date,
     end_date: date,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
     user=Depends(get_current_user),
 ):
-    """Get weekly checklists for a date range."""
-    return await checklist_service.get_weekly_checklists_range(
-        user["sub"], program_id, start_date, end_date
+    """Get weekly checklists for a date range, oldest first. The next page's cursor is in `X-Next-Cursor`."""
+    checklists, next_cursor = await checklist_service.get_weekly_checklists_range(
+        user["sub"], program_id, start_date, end_date, cursor, limit
     )
+    set_next_cursor(response, next_cursor)
+    return checklists
 
 
 # ===== ACHIEVEMENTS ENDPOINTS =====
@@ -301,9 +411,55 @@ async def check_achievements(program_id: int, user=Depends(get_current_user)):
 
 
 @router.get("/programs/{program_id}/leaderboard")
-async def get_leaderboard(program_id: int, limit: int = 100, offset: int = 0):
-    """Get the leaderboard for a program."""
-    return await leaderboard_service.get_leaderboard(program_id, limit, offset)
+async def get_leaderboard(
+    program_id: int, request: Request, limit: int = 100, offset: int = 0
+):
+    """
+    Get the leaderboard for a program.
+
+    Public and cacheable: responses carry an ETag (repeat polls get 304) and a short
+    public max-age for CDNs. `X-Leaderboard-Refreshed-At` reports when the ranking
+    was last refreshed.
+    """
+    page = await leaderboard_service.get_cached_leaderboard_page(program_id, limit, offset)
+    headers = {
+        "ETag": page["etag"],
+        "Cache-Control": f"public, max-age={settings.leaderboard_cache_seconds}",
+    }
+    if page["refreshed_at"]:
+        headers["X-Leaderboard-Refreshed-At"] = str(page["refreshed_at"])
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page["body"], media_type="application/json", headers=headers)
+
+
+@router.get("/programs/{program_id}/leaderboard/stream")
+async def stream_leaderboard(
+    program_id: int,
+    request: Request,
+    top: int = 10,
+    user=Depends(get_current_user),
+):
+    """
+    Live leaderboard over Server-Sent Events.
+
+    Events:
+    - `leaderboard`: top-N entries, sent when the top-N changes
+    - `me`: current user's rank, score and streaks with `deltas` since the previous `me`
+    - `progress`: current user's progress row after their checklist side effects run
+
+    Replaces polling `/leaderboard`, `/leaderboard/me` and `/progress` for open screens.
+    """
+    return StreamingResponse(
+        live_service.leaderboard_stream(
+            user["sub"],
+            program_id,
+            min(max(top, 1), 100),
+            is_disconnected=request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/programs/{program_id}/leaderboard/me")
@@ -328,9 +484,19 @@ async def get_leaderboard_context(
 
 
 @router.get("/programs/{program_id}/suggestions")
-async def get_suggestions(program_id: int, user=Depends(get_current_user)):
-    """Get active post suggestions for user."""
-    return await suggestions_service.get_active_suggestions(user["sub"], program_id)
+async def get_suggestions(
+    program_id: int,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    user=Depends(get_current_user),
+):
+    """Get active post suggestions for user. The next page's cursor is in `X-Next-Cursor`."""
+    suggestions, next_cursor = await suggestions_service.get_active_suggestions(
+        user["sub"], program_id, cursor, limit
+    )
+    set_next_cursor(response, next_cursor)
+    return suggestions
 
 
 @router.post("/programs/{program_id}/suggestions/{suggestion_id}/dismiss")
@@ -355,3 +521,29 @@ async def check_suggestions(program_id: int, user=Depends(get_current_user)):
     return await suggestions_service.check_and_trigger_suggestions(
         user["sub"], program_id
     )
+
+
+# ===== EXPORT ENDPOINTS =====
+
+
+@router.get("/programs/{program_id}/export")
+async def export_history(program_id: int, gzip: bool = False, user=Depends(get_current_user)):
+    """
+    Stream the user's full Winter Arc history as NDJSON (data portability).
+
+    Each table is paged with a keyset cursor and written incrementally, so memory stays
+    constant regardless of history size. `gzip=true` returns a `.ndjson.gz` download.
+    """
+    stream = export_service.export_ndjson(user["sub"], program_id)
+    filename = f"winter-arc-{program_id}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            export_service.gzip_stream(stream),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'},
+        )
+    return StreamingResponse(
+        stream,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,49 @@
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """Small in-process cache with per-entry expiry and a bounded number of entries."""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 1024) -> None:
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            # evict the oldest insertion
+            self._entries.pop(next(iter(self._entries)))
+        ttl = self.ttl if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+    def values_where(self, predicate: Callable[[Hashable], bool]) -> list[Any]:
+        """Unexpired values whose key matches `predicate`."""
+        now = time.monotonic()
+        return [
+            value
+            for key, (expires_at, value) in self._entries.items()
+            if now < expires_at and predicate(key)
+        ]
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [k for k in self._entries if predicate(k)]:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
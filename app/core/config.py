@@ -21,6 +21,47 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     rate_limit_per_minute: int = 120
 
+    # Winter Arc background side effects (suggestions, achievements, leaderboard)
+    side_effects_workers: int = 2
+    side_effects_debounce_seconds: float = 1.0
+    side_effects_max_retries: int = 3
+
+    # Winter Arc checklist storage: "columns" (one boolean per item) or "bitmask" (items_mask)
+    checklist_storage_mode: str = "columns"
+
+    # Serve Winter Arc leaderboard reads from the in-process ranked index
+    leaderboard_index_enabled: bool = True
+
+    # Periodic bulk leaderboard recompute of every active program (seconds; 0 disables)
+    leaderboard_recompute_interval_seconds: float = 0.0
+
+    # Concurrent refresh of the materialized leaderboard (seconds; 0 disables)
+    leaderboard_refresh_interval_seconds: float = 60.0
+
+    # Public leaderboard pages: in-process cache TTL and Cache-Control max-age
+    leaderboard_cache_seconds: int = 5
+
+    # Live (SSE) leaderboard streams
+    live_max_connections: int = 1000
+    live_heartbeat_seconds: float = 15.0
+    live_min_interval_seconds: float = 1.0
+
+    # Community feed: shared public segment per program (TTL and rows kept in memory)
+    feed_cache_seconds: float = 30.0
+    feed_cache_rows: int = 200
+
+    # Write-behind flush interval for post like/comment counters
+    post_counter_flush_seconds: float = 5.0
+
+    # Author cards (name, avatar) cached per user
+    user_card_cache_seconds: float = 300.0
+
+    # Admin premium posts queue and stats cache TTL
+    premium_queue_cache_seconds: float = 15.0
+
+    # Write-behind flush interval for Winter Arc timer increments
+    timer_flush_seconds: float = 5.0
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
@@ -0,0 +1,116 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+
+Deltas = dict[str, int]
+FlushHandler = Callable[[dict[Hashable, Deltas]], Awaitable[None]]
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for counter increments.
+
+    - `add()` aggregates increments per key in memory.
+    - Every `interval_seconds`, or once `max_keys` keys are pending, everything pending is
+      handed to `flush` as one batch.
+    - A failed flush merges its batch back into the pending increments; nothing is lost.
+    - `pending()` includes increments still in flight, for read-your-writes.
+    - `after_flush` runs once a batch is written and no longer counted as pending.
+    - `stop()` flushes whatever is left before returning.
+    """
+
+    def __init__(
+        self,
+        flush: FlushHandler,
+        *,
+        name: str = "counter_buffer",
+        interval_seconds: float = 5.0,
+        max_keys: int = 10_000,
+        after_flush: FlushHandler | None = None,
+    ) -> None:
+        self.name = name
+        self.flush_handler = flush
+        self.after_flush = after_flush
+        self.interval_seconds = interval_seconds
+        self.max_keys = max_keys
+
+        self._pending: dict[Hashable, Deltas] = {}
+        self._inflight: dict[Hashable, Deltas] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    async def start(self) -> None:
+        if self._accepting:
+            return
+        self._accepting = True
+        self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    def add(self, key: Hashable, **deltas: int) -> bool:
+        """Buffer increments for `key`. Returns False when the buffer is not running."""
+        if not self._accepting:
+            return False
+        counters = self._pending.setdefault(key, {})
+        for field, delta in deltas.items():
+            counters[field] = counters.get(field, 0) + delta
+        if len(self._pending) >= self.max_keys:
+            self._wake.set()
+        return True
+
+    def pending(self, key: Hashable) -> Deltas:
+        """Increments for `key` not yet confirmed written."""
+        totals: Deltas = {}
+        for source in (self._inflight, self._pending):
+            for field, delta in source.get(key, {}).items():
+                totals[field] = totals.get(field, 0) + delta
+        return totals
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            try:
+                await self.flush_handler(batch)
+            except BaseException as exc:
+                # Failed or cancelled mid-flush: keep the increments for the next flush
+                for key, counters in batch.items():
+                    merged = self._pending.setdefault(key, {})
+                    for field, delta in counters.items():
+                        merged[field] = merged.get(field, 0) + delta
+                if not isinstance(exc, Exception):
+                    raise
+                log.warning("counter_flush_failed", buffer=self.name, keys=len(batch), error=str(exc))
+                return
+            finally:
+                self._inflight = {}
+        if self.after_flush is not None:
+            await self.after_flush(batch)
+
+    async def stop(self) -> None:
+        if not self._accepting:
+            return
+        self._accepting = False
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval_seconds)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
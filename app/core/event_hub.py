@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import Hashable
+
+
+class Subscription:
+    """
+    One connection's view of the hub.
+
+    Notifications are coalesced into the set of topics that fired since the last
+    `wait()`, so a slow consumer never accumulates a backlog: it wakes once and reads
+    the latest state. Memory per connection is bounded by its number of topics.
+    """
+
+    def __init__(self, topics: tuple[Hashable, ...]) -> None:
+        self.topics = topics
+        self._fired: set[Hashable] = set()
+        self._event = asyncio.Event()
+
+    def notify(self, topic: Hashable) -> None:
+        self._fired.add(topic)
+        self._event.set()
+
+    async def wait(self) -> set[Hashable]:
+        """Topics that fired since the last call, once one has; bound it with `asyncio.timeout`."""
+        await self._event.wait()
+        return self.drain()
+
+    def drain(self) -> set[Hashable]:
+        """Topics that fired since the last call, without waiting."""
+        self._event.clear()
+        fired, self._fired = self._fired, set()
+        return fired
+
+
+class EventHub:
+    """In-process fan-out of change notifications to live connections."""
+
+    def __init__(self, max_subscriptions: int = 1000) -> None:
+        self.max_subscriptions = max_subscriptions
+        self._subscribers: dict[Hashable, set[Subscription]] = {}
+        self._count = 0
+
+    @property
+    def subscriptions(self) -> int:
+        return self._count
+
+    def subscribe(self, *topics: Hashable) -> Subscription | None:
+        """Register a connection; None when the hub is at capacity."""
+        if self._count >= self.max_subscriptions:
+            return None
+        sub = Subscription(topics)
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(sub)
+        self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        for topic in sub.topics:
+            subs = self._subscribers.get(topic)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[topic]
+        self._count -= 1
+
+    def publish(self, topic: Hashable) -> None:
+        for sub in self._subscribers.get(topic, ()):
+            sub.notify(topic)
+
+    def has_subscribers(self, topic: Hashable) -> bool:
+        return topic in self._subscribers
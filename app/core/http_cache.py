@@ -0,0 +1,20 @@
+import hashlib
+
+from fastapi import Request
+
+
+def etag_for(body: bytes) -> str:
+    """Weak ETag derived from a response body."""
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match already matches `etag`."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: ignore W/ prefixes
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag.removeprefix("W/") in tags
@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+
+Reporter = Callable[..., None]
+JobFunc = Callable[[Reporter], Awaitable[Any]]
+
+
+class Job:
+    """State of one background job run, as reported by the status endpoints."""
+
+    def __init__(self, name: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "pending"
+        self.progress: dict[str, Any] = {}
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = datetime.now(UTC)
+        self.finished_at: datetime | None = None
+
+    def report(self, **progress: Any) -> None:
+        self.progress.update(progress)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class JobRegistry:
+    """
+    In-process registry for long-running admin/scheduled jobs.
+
+    - At most one run per job name is active; starting a running job returns the active run.
+    - Job functions receive a `report(**progress)` callback exposed through `get()`.
+    - The most recent `history` runs are kept for status polling.
+    - `every()` schedules a job periodically until `stop()`, which also cancels runs in flight.
+    """
+
+    def __init__(self, history: int = 50) -> None:
+        self.history = history
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._active: dict[str, Job] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._schedules: list[asyncio.Task[None]] = []
+
+    def start(self, name: str, func: JobFunc) -> Job:
+        active = self._active.get(name)
+        if active is not None:
+            return active
+        job = Job(name)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            self._jobs.popitem(last=False)
+        self._active[name] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, func), name=f"job-{name}")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: Job) -> Job:
+        task = self._tasks.get(job.id)
+        if task is not None:
+            await asyncio.shield(task)
+        return job
+
+    def every(self, name: str, interval_seconds: float, func: JobFunc) -> None:
+        async def loop() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await self.wait(self.start(name, func))
+
+        self._schedules.append(asyncio.create_task(loop(), name=f"schedule-{name}"))
+
+    async def stop(self) -> None:
+        for task in self._schedules:
+            task.cancel()
+        await asyncio.gather(*self._schedules, return_exceptions=True)
+        self._schedules.clear()
+        running = list(self._tasks.values())
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        job.status = "running"
+        try:
+            job.result = await func(job.report)
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            log.warning("job_failed", job=job.name, job_id=job.id, error=str(exc))
+        finally:
+            job.finished_at = datetime.now(UTC)
+            self._active.pop(job.name, None)
+            self._tasks.pop(job.id, None)
+
+
+jobs = JobRegistry()
@@ -0,0 +1,91 @@
+"""
+Keyset pagination helpers.
+
+List endpoints order by a unique key (e.g. `(created_at, id)`) and resume after the last
+row of the previous page instead of using OFFSET, so every page costs one bounded index
+range scan. The position is handed to clients as an opaque cursor in the
+`X-Next-Cursor` response header; list bodies stay plain JSON arrays.
+"""
+import base64
+import binascii
+from collections.abc import Sequence
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_limit(limit: int | None, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Page size within [1, maximum]; `None` means `default`."""
+    if limit is None:
+        return default
+    return max(1, min(limit, maximum))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = orjson.dumps(list(values), default=str)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> list | None:
+    """Key values stored in `cursor`, or None for the first page. Malformed cursors are a 400."""
+    if not cursor:
+        return None
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="invalid_cursor") from None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(v, (str, int, float)) for v in values)
+    ):
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    return values
+
+
+def keyset(query, cursor: str | None, columns: Sequence[str], limit: int, *, desc: bool = True):
+    """
+    Order `query` by `columns`, resume after `cursor`, and fetch one extra row.
+
+    The extra row tells `split_page` whether another page exists without a COUNT.
+    """
+    values = decode_cursor(cursor, len(columns))
+    if values is not None:
+        query = query.or_(_after(columns, values, "lt" if desc else "gt"))
+    for column in columns:
+        query = query.order(column, desc=desc)
+    return query.limit(limit + 1)
+
+
+def split_page(rows: list[dict] | None, limit: int, columns: Sequence[str]) -> tuple[list[dict], str | None]:
+    """Trim the look-ahead row and build the cursor for the next page, if any."""
+    rows = rows or []
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor([page[-1].get(column) for column in columns])
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def _after(columns: Sequence[str], values: Sequence[Any], op: str) -> str:
+    # (a, b) < (va, vb)  ==  a < va OR (a = va AND b < vb), as a PostgREST or= filter
+    clauses = []
+    for i, column in enumerate(columns):
+        terms = [f"{c}.eq.{_quote(v)}" for c, v in zip(columns[:i], values[:i], strict=True)]
+        terms.append(f"{column}.{op}.{_quote(values[i])}")
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(clauses)
+
+
+def _quote(value: Any) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
@@ -0,0 +1,147 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+
+Handler = Callable[[Hashable, set[str]], Awaitable[None]]
+
+
+class CoalescingWorkQueue:
+    """
+    In-process background work queue that coalesces jobs per key.
+
+    - Submitting a key that is already pending merges its reasons into the pending job.
+    - A key submitted while its job is running is re-queued once the current run ends.
+    - Jobs wait `debounce_seconds` before running so bursts collapse into one run.
+    - A fixed pool of workers drains the queue; failed jobs retry with backoff.
+    - `stop()` flushes everything still pending before the workers shut down.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        *,
+        name: str = "work_queue",
+        workers: int = 2,
+        debounce_seconds: float = 1.0,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.num_workers = max(1, workers)
+        self.debounce_seconds = debounce_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._queue: asyncio.Queue[Hashable] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._pending: dict[Hashable, set[str]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: set[Hashable] = set()
+        self._rerun: dict[Hashable, set[str]] = {}
+        self._accepting = False
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    async def start(self) -> None:
+        if self._accepting:
+            return
+        self._queue = asyncio.Queue()
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.num_workers)
+        ]
+
+    def submit(self, key: Hashable, *reasons: str) -> bool:
+        """Schedule `key` for processing. Returns False if the queue is not running."""
+        if not self._accepting:
+            return False
+        if key in self._running:
+            self._rerun.setdefault(key, set()).update(reasons)
+        elif key in self._pending:
+            self._pending[key].update(reasons)
+        else:
+            self._pending[key] = set(reasons)
+            self._schedule(key)
+        return True
+
+    async def stop(self) -> None:
+        """
+        Stop accepting work, run every pending job now, then stop the workers.
+
+        Bound the wait at the call site (`asyncio.timeout`); the workers are stopped
+        even when it is cut short.
+        """
+        if not self._accepting or self._queue is None:
+            return
+        self._accepting = False
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._queue.put_nowait(key)
+        self._timers.clear()
+        try:
+            await self._queue.join()
+        finally:
+            for task in self._workers:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+
+    def _schedule(self, key: Hashable) -> None:
+        assert self._queue is not None
+        if not self._accepting or self.debounce_seconds <= 0:
+            self._queue.put_nowait(key)
+            return
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(self.debounce_seconds, self._release, key)
+
+    def _release(self, key: Hashable) -> None:
+        self._timers.pop(key, None)
+        if self._queue is not None:
+            self._queue.put_nowait(key)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            key = await self._queue.get()
+            reasons = self._pending.pop(key, set())
+            self._running.add(key)
+            try:
+                await self._run_with_retry(key, reasons)
+            finally:
+                self._running.discard(key)
+                rerun = self._rerun.pop(key, None)
+                if rerun is not None:
+                    self._pending[key] = rerun
+                    self._schedule(key)
+                self._queue.task_done()
+
+    async def _run_with_retry(self, key: Hashable, reasons: set[str]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.handler(key, reasons)
+                return
+            except Exception as exc:
+                if attempt >= self.max_retries:
+                    log.error(
+                        "work_queue_job_failed",
+                        queue=self.name,
+                        key=str(key),
+                        reasons=sorted(reasons),
+                        error=str(exc),
+                    )
+                    return
+                log.warning(
+                    "work_queue_job_retry",
+                    queue=self.name,
+                    key=str(key),
+                    attempt=attempt + 1,
+                    error=str(exc),
+                )
+                await asyncio.sleep(self.retry_backoff_seconds * (2**attempt))
@@ -1,5 +1,7 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
 
 import orjson
 from fastapi import FastAPI, Request
@@ -9,9 +11,15 @@ from fastapi.responses import ORJSONResponse
 from app.api.v1 import api_router
 from app.core.config import settings
 from app.core.errors import init_error_handlers
+from app.core.jobs import jobs
 from app.core.logging import get_logger, setup_logging
 from app.core.rate_limit import init_rate_limiter
-import uuid
+from app.services.posts import post_counters
+from app.services.winter_arc import leaderboard_service, progress_service, side_effects
+from app.services.winter_arc.leaderboard_index import index as leaderboard_index
+
+# How long shutdown waits for queued side effects to finish
+SHUTDOWN_FLUSH_SECONDS = 10.0
 
 
 def orjson_dumps(v, *, default):
@@ -21,7 +29,35 @@ def orjson_dumps(v, *, default):
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     setup_logging(settings.log_level)
-    yield
+    if settings.leaderboard_index_enabled:
+        await leaderboard_index.load_all()
+    await side_effects.queue.start()
+    await progress_service.timer_buffer.start()
+    await post_counters.buffer.start()
+    if settings.leaderboard_recompute_interval_seconds > 0:
+        jobs.every(
+            "leaderboard_recompute",
+            settings.leaderboard_recompute_interval_seconds,
+            leaderboard_service.update_active_leaderboard_scores,
+        )
+    if settings.leaderboard_refresh_interval_seconds > 0:
+        jobs.every(
+            "leaderboard_refresh",
+            settings.leaderboard_refresh_interval_seconds,
+            leaderboard_service.refresh_materialized_leaderboard,
+        )
+    try:
+        yield
+    finally:
+        await jobs.stop()
+        await post_counters.buffer.stop()
+        # Flush buffered timer increments, then the side effects they queue
+        await progress_service.timer_buffer.stop()
+        try:
+            async with asyncio.timeout(SHUTDOWN_FLUSH_SECONDS):
+                await side_effects.queue.stop()
+        except TimeoutError:
+            log.warning("side_effects_flush_timeout", queue=side_effects.queue.name)
 
 
 app = FastAPI(
@@ -38,6 +74,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Leaderboard-Refreshed-At"],
 )
 
 # Observability and resilience
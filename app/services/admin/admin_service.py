@@ -1,22 +1,77 @@
+from datetime import date, datetime
+
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.pagination import clamp_limit, decode_cursor, split_page
 from app.infra.supabase.client import supabase
-from datetime import datetime
+from app.services.posts import posts_service
+from app.services.users import user_cards
+
+log = get_logger(__name__)
+
+# Queue pages and stats per program, briefly; cleared when a post is marked responded
+_premium_cache = TTLCache(ttl_seconds=settings.premium_queue_cache_seconds, max_entries=256)
+
+QUEUE_KEY = ("has_response", "posted_at", "post_id")
 
 
 async def analytics_sales():
     if supabase is None:
         return {"total_revenue_cents": 0, "paid_orders": 0}
-    paid = supabase.table("purchases").select("price_cents,status").eq("status", "paid").execute()
-    rows = paid.data if hasattr(paid, "data") else paid
-    total = sum(r.get("price_cents", 0) for r in rows or [])
-    return {"total_revenue_cents": total, "paid_orders": len(rows or [])}
+    # Summed in the database from the daily rollup (migration 0020)
+    res = supabase.rpc("get_sales_totals").execute()
+    data = res.data if hasattr(res, "data") else res
+    row = (data[0] if isinstance(data, list) else data) if data else {}
+    return {
+        "total_revenue_cents": row.get("total_revenue_cents") or 0,
+        "paid_orders": row.get("paid_orders") or 0,
+    }
 
 
 async def analytics_programs():
     if supabase is None:
         return {"memberships": 0}
-    res = supabase.table("user_programs").select("id").execute()
-    rows = res.data if hasattr(res, "data") else res
-    return {"memberships": len(rows or [])}
+    # COUNT(*) only; no rows are returned
+    res = supabase.table("user_programs").select("id", count="exact", head=True).execute()
+    return {"memberships": getattr(res, "count", None) or 0}
+
+
+async def analytics_timeseries(metric: str, start_date: date, end_date: date):
+    """
+    Daily `revenue` (paid purchases) or `enrollment` (memberships) between two days,
+    inclusive, split by product type and tier, from the rollup in migration 0020.
+    """
+    result = {
+        "metric": metric,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "points": [],
+        "totals": {"count": 0, "amount_cents": 0},
+    }
+    if supabase is None:
+        return result
+    # Grouped and summed in the database (migration 0020); one JSON document, so the
+    # series is not cut at the API row limit
+    res = supabase.rpc(
+        "get_analytics_timeseries",
+        {
+            "p_metric": metric,
+            "p_start_date": start_date.isoformat(),
+            "p_end_date": end_date.isoformat(),
+        },
+    ).execute()
+    data = res.data if hasattr(res, "data") else res
+    series = (data[0] if isinstance(data, list) else data) if data else {}
+    result["points"] = series.get("points") or []
+    totals = series.get("totals") or {}
+    result["totals"] = {
+        "count": totals.get("count") or 0,
+        "amount_cents": totals.get("amount_cents") or 0,
+    }
+    return result
 
 
 async def delete_post(post_id: int):
@@ -24,6 +79,8 @@ async def delete_post(post_id: int):
         return {"id": post_id, "deleted": True}
     res = supabase.table("posts").delete().eq("id", post_id).execute()
     data = res.data if hasattr(res, "data") else res
+    # The deleted row names its program; without it, drop every cached feed
+    posts_service.invalidate_feed(data[0].get("program_id") if data else None)
     return data[0] if data else {"id": post_id, "deleted": True}
 
 
@@ -32,108 +89,79 @@ async def delete_post(post_id: int):
 # ============================================================================
 
 
-async def get_premium_posts_queue(program_id: int):
+async def get_premium_posts_queue(
+    program_id: int, cursor: str | None = None, limit: int | None = None
+):
     """
     Get premium posts queue for Wagner admin view.
-    Returns posts from premium tier users, with unresponded posts first.
+    Returns posts from the program's premium tier users, unresponded first, then newest
+    first, one page at a time. Returns `(posts, next_cursor)`.
 
-    Returns:
+    Each post:
     - post_id, user_id, user_name, user_avatar
     - title, content, posted_at
     - has_response, responded_at, responded_by, notes
     """
     if supabase is None:
-        return []
+        return [], None
+
+    limit = clamp_limit(limit)
+    key = ("queue", program_id, cursor, limit)
+    page = _premium_cache.get(key)
+    if page is not None:
+        return page
 
+    after = _queue_position(cursor)
     try:
-        # Use the view created in migration 0009
-        res = (
-            supabase.from_("winter_arc_premium_posts_queue")
-            .select("*")
-            .eq("program_id", program_id)
-            .execute()
+        # Filtered and ordered in the database (migration 0018)
+        res = supabase.rpc(
+            "get_premium_posts_queue",
+            {
+                "p_program_id": program_id,
+                "p_after_has_response": after[0] if after else None,
+                "p_after_posted_at": after[1] if after else None,
+                "p_after_post_id": after[2] if after else None,
+                "p_limit": limit,
+            },
+        ).execute()
+    except Exception as e:
+        log.warning("premium_queue_failed", program_id=program_id, error=str(e))
+        return [], None
+    rows, next_cursor = split_page(res.data if hasattr(res, "data") else res, limit, QUEUE_KEY)
+    page = (await _with_author_cards(rows), next_cursor)
+    _premium_cache.set(key, page)
+    return page
+
+
+def _queue_position(cursor: str | None) -> list | None:
+    """`[has_response, posted_at, post_id]` from a queue cursor; wrong value types are a 400."""
+    values = decode_cursor(cursor, len(QUEUE_KEY))
+    if values is None:
+        return None
+    has_response, posted_at, post_id = values
+    try:
+        datetime.fromisoformat(posted_at)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="invalid_cursor") from None
+    if not isinstance(has_response, bool) or type(post_id) is not int:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    return values
+
+
+async def _with_author_cards(rows: list[dict]) -> list[dict]:
+    """Fill user_name/user_avatar from the cached author cards, one batched lookup."""
+    cards = await user_cards.get_user_cards(row.get("user_id") for row in rows)
+    result = []
+    for row in rows:
+        card = cards.get(row.get("user_id")) or {}
+        result.append(
+            {
+                **row,
+                "user_name": card.get("name") or row.get("user_name") or "Unknown",
+                "user_avatar": card.get("avatar_url") or row.get("user_avatar"),
+            }
         )
-        data = res.data if hasattr(res, "data") else res
-        return data or []
-    except Exception:
-        # Fallback: manual query if view doesn't exist yet
-        try:
-            # Get all premium users
-            premium_users_res = (
-                supabase.table("user_programs")
-                .select("user_id")
-                .eq("program_id", program_id)
-                .eq("tier", "premium")
-                .execute()
-            )
-            premium_users_data = (
-                premium_users_res.data
-                if hasattr(premium_users_res, "data")
-                else premium_users_res
-            )
-            premium_user_ids = [u["user_id"] for u in (premium_users_data or [])]
-
-            if not premium_user_ids:
-                return []
-
-            # Get their posts
-            posts_res = (
-                supabase.table("posts")
-                .select(
-                    """
-                    id,
-                    user_id,
-                    title,
-                    content,
-                    created_at,
-                    users!inner(full_name, avatar_url)
-                """
-                )
-                .eq("program_id", program_id)
-                .in_("user_id", premium_user_ids)
-                .order("created_at", desc=True)
-                .execute()
-            )
-            posts_data = posts_res.data if hasattr(posts_res, "data") else posts_res
-
-            # Get responses
-            responses_res = (
-                supabase.table("winter_arc_premium_responses")
-                .select("post_id, responded_at, responded_by, notes")
-                .execute()
-            )
-            responses_data = (
-                responses_res.data
-                if hasattr(responses_res, "data")
-                else responses_res
-            )
-            responses_by_post = {r["post_id"]: r for r in (responses_data or [])}
-
-            # Combine data
-            result = []
-            for post in posts_data or []:
-                response = responses_by_post.get(post["id"])
-                result.append(
-                    {
-                        "post_id": post["id"],
-                        "user_id": post["user_id"],
-                        "user_name": post.get("users", {}).get("full_name", "Unknown"),
-                        "user_avatar": post.get("users", {}).get("avatar_url"),
-                        "title": post.get("title"),
-                        "content": post.get("content"),
-                        "posted_at": post.get("created_at"),
-                        "has_response": response is not None,
-                        "responded_at": response.get("responded_at") if response else None,
-                        "responded_by": response.get("responded_by") if response else None,
-                        "notes": response.get("notes") if response else None,
-                    }
-                )
-
-            # Sort: unresponded first
-            result.sort(key=lambda x: (x["has_response"], x["posted_at"]), reverse=True)
-            return result
-        except Exception:
-            return []
+    return result
 
 
 async def mark_post_responded(post_id: int, responded_by: str, notes: str | None = None):
@@ -164,6 +192,7 @@ async def mark_post_responded(post_id: int, responded_by: str, notes: str | None
             .execute()
         )
         data = res.data if hasattr(res, "data") else res
+        _premium_cache.clear()
         return data[0] if data else {"post_id": post_id, "responded": True}
     except Exception as e:
         raise Exception(f"Failed to mark post as responded: {str(e)}")
@@ -177,46 +206,30 @@ async def get_premium_stats(program_id: int):
     - total_premium_users
     - total_premium_posts
     - unresponded_posts
-    - avg_response_time_hours
+    - avg_response_time_hours (from post creation to response, over responded posts)
     """
+    empty = {
+        "total_premium_users": 0,
+        "total_premium_posts": 0,
+        "unresponded_posts": 0,
+        "avg_response_time_hours": 0,
+    }
     if supabase is None:
-        return {
-            "total_premium_users": 0,
-            "total_premium_posts": 0,
-            "unresponded_posts": 0,
-            "avg_response_time_hours": 0,
-        }
+        return empty
 
-    try:
-        # Count premium users
-        premium_count_res = (
-            supabase.table("user_programs")
-            .select("id", count="exact")
-            .eq("program_id", program_id)
-            .eq("tier", "premium")
-            .execute()
-        )
+    key = ("stats", program_id)
+    stats = _premium_cache.get(key)
+    if stats is not None:
+        return stats
 
-        # Get posts queue
-        posts = await get_premium_posts_queue(program_id)
-
-        total_posts = len(posts)
-        unresponded = sum(1 for p in posts if not p.get("has_response"))
-
-        # Calculate avg response time (simplified)
-        # TODO: Improve this calculation
-        avg_response_time = 0
-
-        return {
-            "total_premium_users": premium_count_res.count if premium_count_res else 0,
-            "total_premium_posts": total_posts,
-            "unresponded_posts": unresponded,
-            "avg_response_time_hours": avg_response_time,
-        }
-    except Exception:
-        return {
-            "total_premium_users": 0,
-            "total_premium_posts": 0,
-            "unresponded_posts": 0,
-            "avg_response_time_hours": 0,
-        }
+    try:
+        # One aggregate query (migration 0018)
+        res = supabase.rpc("get_premium_stats", {"p_program_id": program_id}).execute()
+    except Exception as e:
+        log.warning("premium_stats_failed", program_id=program_id, error=str(e))
+        return empty
+    data = res.data if hasattr(res, "data") else res
+    row = (data[0] if isinstance(data, list) else data) if data else {}
+    stats = {field: row.get(field) or 0 for field in empty}
+    _premium_cache.set(key, stats)
+    return stats
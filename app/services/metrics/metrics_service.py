@@ -1,17 +1,18 @@
+from app.core.pagination import clamp_limit, keyset, split_page
 from app.infra.supabase.client import supabase
+from app.services.winter_arc.trends_service import invalidate_user_trends
 
+METRICS_KEY = ("date", "id")
 
-async def list_metrics(user: dict):
+
+async def list_metrics(user: dict, cursor: str | None = None, limit: int | None = None):
+    """One page of the user's metrics, newest first. Returns `(metrics, next_cursor)`."""
     if supabase is None:
-        return []
-    res = (
-        supabase.table("user_metrics")
-        .select("*")
-        .eq("user_id", user.get("sub"))
-        .order("date", desc=True)
-        .execute()
-    )
-    return res.data if hasattr(res, "data") else res
+        return [], None
+    limit = clamp_limit(limit)
+    q = supabase.table("user_metrics").select("*").eq("user_id", user.get("sub"))
+    res = keyset(q, cursor, METRICS_KEY, limit).execute()
+    return split_page(res.data if hasattr(res, "data") else res, limit, METRICS_KEY)
 
 
 async def create_metric(user: dict, payload: dict):
@@ -19,6 +20,7 @@ async def create_metric(user: dict, payload: dict):
         return {**payload, "user_id": user.get("sub")}
     rec = {**payload, "user_id": user.get("sub")}
     res = supabase.table("user_metrics").insert(rec).execute()
+    invalidate_user_trends(user.get("sub"))
     data = res.data if hasattr(res, "data") else res
     return data[0] if data else rec
 
@@ -33,5 +35,6 @@ async def delete_metric(user: dict, metric_id: int):
         .eq("user_id", user.get("sub"))
         .execute()
     )
+    invalidate_user_trends(user.get("sub"))
     data = res.data if hasattr(res, "data") else res
     return data[0] if data else {"id": metric_id, "deleted": True}
@@ -0,0 +1,161 @@
+"""Post comments - create, delete, and list threaded comments on community posts."""
+from app.core.pagination import clamp_limit, decode_cursor, encode_cursor
+from app.infra.supabase.client import supabase
+from app.services.posts import post_counters
+from app.services.users import user_cards
+
+COMMENTS_KEY = ("created_at", "id")
+THREAD_PAGE_SIZE = 20  # top-level comments per page
+MAX_THREAD_PAGE = 50
+MAX_DEPTH = 5  # deeper replies are shown under their ancestor at this depth
+MAX_PAGE_COMMENTS = 500  # comments per page, replies included
+
+
+async def list_comment_threads(post_id: int, cursor: str | None = None, limit: int | None = None):
+    """
+    One page of a post's comment threads, oldest first. Returns `(threads, next_cursor)`.
+
+    Pages are keyed on top-level comments; each thread arrives whole with its replies
+    nested under `replies`, from one RPC call (migrations 0017, 0021), with author cards
+    attached from one batched lookup.
+    """
+    if supabase is None:
+        return [], None
+    limit = clamp_limit(limit, default=THREAD_PAGE_SIZE, maximum=MAX_THREAD_PAGE)
+    after = decode_cursor(cursor, len(COMMENTS_KEY))
+    res = supabase.rpc(
+        "get_comment_threads",
+        {
+            "p_post_id": post_id,
+            "p_after_created_at": after[0] if after else None,
+            "p_after_id": after[1] if after else None,
+            "p_limit": limit,
+            "p_max_rows": MAX_PAGE_COMMENTS,
+        },
+    ).execute()
+    rows = (res.data if hasattr(res, "data") else res) or []
+    # Whether another top-level comment follows each thread, regardless of the row cap
+    more_roots = {row.get("thread_root_id"): row.pop("more_roots", False) for row in rows}
+
+    cards = await user_cards.get_user_cards(row.get("user_id") for row in rows)
+    threads = build_comment_tree(rows, MAX_DEPTH, cards)
+    if len(rows) >= MAX_PAGE_COMMENTS:
+        # The row cap may have cut the last thread short: leave it for the next page,
+        # unless it is the only one
+        if len(threads) > 1:
+            threads = threads[:-1]
+        else:
+            threads[0]["replies_truncated"] = True
+    threads = threads[:limit]
+    next_cursor = (
+        encode_cursor([threads[-1][column] for column in COMMENTS_KEY])
+        if threads and more_roots.get(threads[-1]["id"])
+        else None
+    )
+    return threads, next_cursor
+
+
+def build_comment_tree(rows: list[dict], max_depth: int = MAX_DEPTH, cards: dict | None = None) -> list[dict]:
+    """
+    Nest comment rows under their parents in one pass.
+
+    Rows must list parents before their replies (chronological order does). Replies
+    whose parent is missing from `rows` are dropped; replies to a comment at `max_depth`
+    are shown beside it, so nesting never goes deeper than `max_depth`.
+    """
+    cards = cards or {}
+    roots: list[dict] = []
+    # comment id -> the node its replies are attached to
+    containers: dict[int, dict] = {}
+    for row in rows:
+        node = {**row, "author": cards.get(row.get("user_id")), "depth": 0, "replies": []}
+        parent_id = row.get("parent_comment_id")
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in containers:
+            target = containers[parent_id]
+            node["depth"] = target["depth"] + 1
+            target["replies"].append(node)
+        else:
+            continue
+        at_cap = parent_id is not None and node["depth"] >= max_depth
+        containers[row["id"]] = containers[parent_id] if at_cap else node
+    return roots
+
+
+async def create_comment(
+    program_id: int,
+    post_id: int,
+    user_id: str,
+    content: str,
+    parent_comment_id: int | None = None,
+):
+    """Add a comment, optionally as a reply. Returns None when the parent is not on this post."""
+    record = {
+        "post_id": post_id,
+        "user_id": user_id,
+        "content": content,
+        "parent_comment_id": parent_comment_id,
+    }
+    if supabase is None:
+        return record
+
+    if parent_comment_id is not None:
+        parent = (
+            supabase.table("community_comments")
+            .select("id")
+            .eq("id", parent_comment_id)
+            .eq("post_id", post_id)
+            .limit(1)
+            .execute()
+        )
+        if not (parent.data if hasattr(parent, "data") else parent):
+            return None
+
+    res = supabase.table("community_comments").insert(record).execute()
+    await post_counters.add(program_id, post_id, comments_count=1)
+    data = res.data if hasattr(res, "data") else res
+    return data[0] if data else record
+
+
+async def delete_comment(program_id: int, post_id: int, comment_id: int, user: dict):
+    """
+    Delete a comment (author or admin) and its replies.
+
+    Returns the number of comments removed, or None when the comment does not exist or
+    belongs to someone else.
+    """
+    if supabase is None:
+        return 1
+
+    res = (
+        supabase.table("community_comments")
+        .select("id,parent_comment_id,user_id")
+        .eq("post_id", post_id)
+        .execute()
+    )
+    rows = (res.data if hasattr(res, "data") else res) or []
+    target = next((row for row in rows if row["id"] == comment_id), None)
+    if target is None:
+        return None
+    if target["user_id"] != user.get("sub") and "admin" not in user.get("roles", []):
+        return None
+
+    # Replies go with it (ON DELETE CASCADE), so the counter drops by the whole subtree
+    removed = 1 + _count_replies(rows, comment_id)
+    supabase.table("community_comments").delete().eq("id", comment_id).execute()
+    await post_counters.add(program_id, post_id, comments_count=-removed)
+    return removed
+
+
+def _count_replies(rows: list[dict], comment_id: int) -> int:
+    children: dict[int, list[int]] = {}
+    for row in rows:
+        if row.get("parent_comment_id") is not None:
+            children.setdefault(row["parent_comment_id"], []).append(row["id"])
+    count, stack = 0, [comment_id]
+    while stack:
+        replies = children.get(stack.pop(), [])
+        count += len(replies)
+        stack.extend(replies)
+    return count
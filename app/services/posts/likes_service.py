@@ -0,0 +1,52 @@
+"""Post likes - idempotent like/unlike on UNIQUE(post_id, user_id)."""
+from app.infra.supabase.client import supabase
+from app.services.posts import post_counters
+
+
+async def like_post(program_id: int, post_id: int, user_id: str) -> dict:
+    """Like a post. Liking twice is a no-op; only a new like moves the counter."""
+    if supabase is None:
+        return {"post_id": post_id, "liked": True}
+    res = (
+        supabase.table("community_likes")
+        .upsert(
+            {"post_id": post_id, "user_id": user_id},
+            on_conflict="post_id,user_id",
+            ignore_duplicates=True,
+        )
+        .execute()
+    )
+    # ON CONFLICT DO NOTHING returns only the rows actually inserted
+    if res.data if hasattr(res, "data") else res:
+        await post_counters.add(program_id, post_id, likes_count=1)
+    return {"post_id": post_id, "liked": True}
+
+
+async def unlike_post(program_id: int, post_id: int, user_id: str) -> dict:
+    """Remove a like. Unliking a post that is not liked is a no-op."""
+    if supabase is None:
+        return {"post_id": post_id, "liked": False}
+    res = (
+        supabase.table("community_likes")
+        .delete()
+        .eq("post_id", post_id)
+        .eq("user_id", user_id)
+        .execute()
+    )
+    if res.data if hasattr(res, "data") else res:
+        await post_counters.add(program_id, post_id, likes_count=-1)
+    return {"post_id": post_id, "liked": False}
+
+
+async def liked_post_ids(user_id: str, post_ids: list[int]) -> set[int]:
+    """Which of `post_ids` the user has liked, in one query."""
+    if supabase is None or not post_ids:
+        return set()
+    res = (
+        supabase.table("community_likes")
+        .select("post_id")
+        .eq("user_id", user_id)
+        .in_("post_id", post_ids)
+        .execute()
+    )
+    return {row["post_id"] for row in (res.data if hasattr(res, "data") else res) or []}
@@ -0,0 +1,53 @@
+"""Post engagement counters - batched maintenance of `likes_count` and `comments_count`."""
+from collections.abc import Hashable
+
+from app.core.config import settings
+from app.core.counter_buffer import CounterBuffer
+from app.infra.supabase.client import supabase
+
+COUNTER_FIELDS = ("likes_count", "comments_count")
+
+
+async def _flush_post_counters(batch: dict[Hashable, dict[str, int]]) -> None:
+    """Apply a batch of counter deltas with one RPC call (migration 0016)."""
+    rows = [
+        {"post_id": post_id, **{field: counters.get(field, 0) for field in COUNTER_FIELDS}}
+        for (_, post_id), counters in batch.items()
+    ]
+    supabase.rpc("increment_post_counters_batch", {"p_rows": rows}).execute()
+
+
+async def _after_counter_flush(batch: dict[Hashable, dict[str, int]]) -> None:
+    """
+    Cached feed rows carry counts: fold the written deltas into them, so a flush keeps
+    the feed cache. Runs right after the batch stops counting as pending.
+    """
+    # Imported here: posts_service reads pending deltas from this module
+    from app.services.posts import posts_service
+
+    posts_service.apply_counter_deltas(batch)
+
+
+# Like/comment deltas per (program_id, post_id); a hot post costs one row update per flush
+buffer = CounterBuffer(
+    _flush_post_counters,
+    name="post_counters",
+    interval_seconds=settings.post_counter_flush_seconds,
+    after_flush=_after_counter_flush,
+)
+
+
+async def add(program_id: int, post_id: int, **deltas: int) -> None:
+    key = (program_id, post_id)
+    if not buffer.add(key, **deltas):
+        # Buffer not running (scripts, tests without lifespan): write through
+        await _flush_post_counters({key: deltas})
+        await _after_counter_flush({key: deltas})
+
+
+def with_pending(post: dict) -> dict:
+    """Copy of a post row with counter deltas not yet written applied."""
+    post = dict(post)
+    for field, delta in buffer.pending((post.get("program_id"), post.get("id"))).items():
+        post[field] = max(0, (post.get(field) or 0) + delta)
+    return post
@@ -1,29 +1,186 @@
+from collections.abc import Hashable
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import clamp_limit, decode_cursor, keyset, split_page
 from app.infra.supabase.client import supabase
+from app.services.posts import likes_service, post_counters
+from app.services.users import user_cards
+
+FEED_KEY = ("created_at", "id")
+SEARCH_KEY = ("rank", "id")
+MAX_SEARCH_QUERY_LENGTH = 200
+FEED_COLUMNS = (
+    "id,user_id,program_id,title,message,photo_url,visibility,"
+    "likes_count,comments_count,is_pinned,created_at"
+)
+
+# Newest public posts of a program, shared by all members: program_id -> (rows, complete)
+_public_feed_cache = TTLCache(ttl_seconds=settings.feed_cache_seconds, max_entries=256)
+# A member's own private posts, merged over the public segment: (program_id, user_id) -> (rows, complete)
+_private_feed_cache = TTLCache(ttl_seconds=settings.feed_cache_seconds, max_entries=10_000)
+
+
+def invalidate_feed(program_id: int | None = None) -> None:
+    """Drop the cached feed of one program, or of every program."""
+    if program_id is None:
+        _public_feed_cache.clear()
+        _private_feed_cache.clear()
+        return
+    _public_feed_cache.invalidate(program_id)
+    _private_feed_cache.invalidate_where(lambda key: key[0] == program_id)
+
+
+def apply_counter_deltas(batch: dict[Hashable, dict[str, int]]) -> None:
+    """Fold written counter deltas into the cached feed rows of their programs."""
+    programs = {program_id for program_id, _ in batch}
+    deltas_by_post = {post_id: deltas for (_, post_id), deltas in batch.items()}
+    segments = _public_feed_cache.values_where(lambda key: key in programs)
+    segments += _private_feed_cache.values_where(lambda key: key[0] in programs)
+    for rows, _ in segments:
+        for row in rows:
+            for field, delta in deltas_by_post.get(row["id"], {}).items():
+                row[field] = max(0, (row.get(field) or 0) + delta)
+
 
+def _visible_to(query, user: dict):
+    """Public posts plus the user's own private posts; admins see everything."""
+    if "admin" in user.get("roles", []):
+        return query
+    return query.or_(f'visibility.eq.public,user_id.eq."{user.get("sub")}"')
 
-async def list_posts(program_id: int, user: dict):
+
+async def list_posts(program_id: int, user: dict, cursor: str | None = None, limit: int | None = None):
+    """
+    One feed page, newest first. Returns `(posts, next_cursor)`.
+
+    Members are served from the program's cached public segment merged with their own
+    private posts; pages past the cached segment, and admin feeds, go to the database.
+    """
     if supabase is None:
-        return []
-    # Show public posts and private posts authored by user or admin
-    # Visibility: 'public' or 'private'
-    q = (
-        supabase.table("posts")
-        .select("*")
-        .eq("program_id", program_id)
-        .order("created_at", desc=True)
-    )
-    res = q.execute()
-    posts = res.data if hasattr(res, "data") else res
-    uid = user.get("sub")
-    is_admin = "admin" in user.get("roles", [])
-    visible = []
-    for p in posts or []:
-        if p.get("visibility") == "public":
-            visible.append(p)
-        elif p.get("visibility") == "private":
-            if p.get("user_id") == uid or is_admin:
-                visible.append(p)
-    return visible
+        return [], None
+    limit = clamp_limit(limit)
+    if "admin" not in user.get("roles", []):
+        after = _cursor_position(cursor)
+        public, public_complete = _feed_segment(_public_feed_cache, program_id, program_id, None)
+        private, private_complete = _feed_segment(
+            _private_feed_cache, (program_id, user.get("sub")), program_id, user.get("sub")
+        )
+        if after is not None:
+            public = [p for p in public if _position(p) < after]
+            private = [p for p in private if _position(p) < after]
+        # Rows beyond an incomplete segment are older than every cached row, so the page is
+        # exact as long as each segment still has more than `limit` rows after the cursor
+        if (public_complete or len(public) > limit) and (private_complete or len(private) > limit):
+            merged = sorted(public + private, key=_position, reverse=True)
+            posts, next_cursor = split_page(merged[: limit + 1], limit, FEED_KEY)
+            return await _with_engagement(posts, user), next_cursor
+
+    # Visibility is filtered in the query, on idx_posts_program_feed (migration 0015)
+    q = _visible_to(supabase.table("posts").select(FEED_COLUMNS).eq("program_id", program_id), user)
+    res = keyset(q, cursor, FEED_KEY, limit).execute()
+    posts, next_cursor = split_page(res.data if hasattr(res, "data") else res, limit, FEED_KEY)
+    return await _with_engagement(posts, user), next_cursor
+
+
+def normalize_search_query(query: str | None) -> str:
+    """Collapse whitespace and cap the length; an empty result means there is nothing to search."""
+    return " ".join((query or "").split())[:MAX_SEARCH_QUERY_LENGTH]
+
+
+async def search_posts(
+    program_id: int, user: dict, query: str | None, cursor: str | None = None, limit: int | None = None
+):
+    """
+    Full-text search over a program's posts, best match first. Returns `(posts, next_cursor)`.
+
+    Runs on the GIN-indexed `search_vector` (migration 0019) with the same visibility
+    rule as `list_posts`; the query accepts websearch syntax ("phrase", or, -word).
+    """
+    query = normalize_search_query(query)
+    if supabase is None or len(query) < 2:
+        return [], None
+    limit = clamp_limit(limit)
+    after = _search_position(cursor)
+    res = supabase.rpc(
+        "search_posts",
+        {
+            "p_program_id": program_id,
+            "p_query": query,
+            "p_viewer": user.get("sub"),
+            "p_is_admin": "admin" in user.get("roles", []),
+            "p_after_rank": after[0] if after else None,
+            "p_after_id": after[1] if after else None,
+            "p_limit": limit,
+        },
+    ).execute()
+    posts, next_cursor = split_page(res.data if hasattr(res, "data") else res, limit, SEARCH_KEY)
+    return await _with_engagement(posts, user), next_cursor
+
+
+def _search_position(cursor: str | None) -> list | None:
+    """`[rank, post_id]` from a search cursor; wrong value types are a 400."""
+    values = decode_cursor(cursor, len(SEARCH_KEY))
+    if values is None:
+        return None
+    rank, post_id = values
+    if type(rank) not in (int, float) or type(post_id) is not int:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+    return values
+
+
+async def get_visible_post(program_id: int, post_id: int, user: dict):
+    """The post if it is in the program and the user may see it, else None."""
+    if supabase is None:
+        return {"id": post_id, "program_id": program_id}
+    q = supabase.table("posts").select(FEED_COLUMNS).eq("id", post_id).eq("program_id", program_id)
+    res = _visible_to(q, user).limit(1).execute()
+    data = res.data if hasattr(res, "data") else res
+    return data[0] if data else None
+
+
+async def _with_engagement(posts: list[dict], user: dict) -> list[dict]:
+    """Copies of `posts` with unflushed counter deltas, the viewer's `liked` flag and author cards."""
+    liked = await likes_service.liked_post_ids(user.get("sub"), [p["id"] for p in posts])
+    posts = [{**post_counters.with_pending(p), "liked": p["id"] in liked} for p in posts]
+    return await user_cards.attach_user_cards(posts)
+
+
+def _feed_segment(cache: TTLCache, key, program_id: int, private_author: str | None):
+    segment = cache.get(key)
+    if segment is None:
+        q = supabase.table("posts").select(FEED_COLUMNS).eq("program_id", program_id)
+        if private_author is None:
+            q = q.eq("visibility", "public")
+        else:
+            q = q.eq("visibility", "private").eq("user_id", private_author)
+        res = (
+            q.order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(settings.feed_cache_rows + 1)
+            .execute()
+        )
+        rows = (res.data if hasattr(res, "data") else res) or []
+        segment = (rows[: settings.feed_cache_rows], len(rows) <= settings.feed_cache_rows)
+        cache.set(key, segment)
+    return segment
+
+
+def _position(post: dict) -> tuple[datetime, int]:
+    return datetime.fromisoformat(post["created_at"]), post["id"]
+
+
+def _cursor_position(cursor: str | None) -> tuple[datetime, int] | None:
+    values = decode_cursor(cursor, len(FEED_KEY))
+    if values is None:
+        return None
+    try:
+        return _position({"created_at": values[0], "id": int(values[1])})
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="invalid_cursor") from None
 
 
 async def create_post(program_id: int, payload: dict, user: dict):
@@ -51,5 +208,9 @@ async def create_post(program_id: int, payload: dict, user: dict):
             # mirror RLS; service-level guard for clearer error
             return {"error": {"code": "FORBIDDEN", "message": "Premium required for private posts"}}
     res = supabase.table("posts").insert(payload).execute()
+    if payload["visibility"] == "private":
+        _private_feed_cache.invalidate((program_id, payload["user_id"]))
+    else:
+        _public_feed_cache.invalidate(program_id)
     data = res.data if hasattr(res, "data") else res
     return data[0] if data else payload
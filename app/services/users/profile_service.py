@@ -1,4 +1,5 @@
 from app.infra.supabase.client import supabase
+from app.services.users.user_cards import invalidate_user_card
 
 
 async def get_profile(user):
@@ -40,5 +41,6 @@ async def update_profile(user, payload):
     res = (
         supabase.table("user_profiles").update(payload).eq("user_id", user["sub"]).execute()
     )
+    invalidate_user_card(user["sub"])
     data = res.data if hasattr(res, "data") else res
     return data[0] if data else {}
@@ -0,0 +1,47 @@
+"""User cards - the public name and avatar shown next to community content."""
+from collections.abc import Iterable
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.infra.supabase.client import supabase
+
+# user_id -> {user_id, name, avatar_url}; users without a profile are cached too
+_cards = TTLCache(ttl_seconds=settings.user_card_cache_seconds, max_entries=20_000)
+
+
+def invalidate_user_card(user_id: str) -> None:
+    _cards.invalidate(user_id)
+
+
+async def get_user_cards(user_ids: Iterable[str | None]) -> dict[str, dict]:
+    """`{user_id: {user_id, name, avatar_url}}` for the given users; cache misses cost one query."""
+    cards: dict[str, dict] = {}
+    misses: list[str] = []
+    for user_id in sorted({user_id for user_id in user_ids if user_id}):
+        card = _cards.get(user_id)
+        if card is None:
+            misses.append(user_id)
+        else:
+            cards[user_id] = card
+    if not misses or supabase is None:
+        return cards
+
+    res = (
+        supabase.table("user_profiles")
+        .select("user_id,name,avatar_url")
+        .in_("user_id", misses)
+        .execute()
+    )
+    profiles = {row["user_id"]: row for row in (res.data if hasattr(res, "data") else res) or []}
+    for user_id in misses:
+        profile = profiles.get(user_id, {})
+        card = {"user_id": user_id, "name": profile.get("name"), "avatar_url": profile.get("avatar_url")}
+        _cards.set(user_id, card)
+        cards[user_id] = card
+    return cards
+
+
+async def attach_user_cards(items: list[dict], field: str = "author") -> list[dict]:
+    """Copies of `items` with the card of each item's `user_id` under `field`, resolved in one batch."""
+    cards = await get_user_cards(item.get("user_id") for item in items)
+    return [{**item, field: cards.get(item.get("user_id"))} for item in items]
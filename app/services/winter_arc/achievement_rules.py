@@ -0,0 +1,134 @@
+"""Winter Arc Achievement Rules - Compiles achievement `requirements` JSONB into evaluators."""
+from collections.abc import Callable, Iterable
+
+from app.core.logging import get_logger
+
+log = get_logger(__name__)
+
+Facts = dict
+Measure = Callable[[Facts], float]
+
+
+def _field(name: str) -> Measure:
+    return lambda facts: float(facts.get(name) or 0)
+
+
+def _percent_of(name: str, full: float) -> Measure:
+    return lambda facts: min(float(facts.get(name) or 0), full) / full * 100
+
+
+# Requirement key (as stored in winter_arc_achievements.requirements) -> how to measure it.
+# Facts are the user's winter_arc_user_progress row plus the EXTRA_FACTS below.
+METRICS: dict[str, Measure] = {
+    "daily_completions": _field("total_days_completed"),
+    "total_days": _field("total_days_completed"),
+    "daily_streak": _field("current_daily_streak"),
+    "weekly_streak": _field("current_weekly_streak"),
+    "total_weeks": _field("total_weeks_completed"),
+    "timer_completions": _field("three_min_timer_completions"),
+    # Percent-style requirements: a full week of daily checklists / one full weekly checklist
+    "daily_completion": _percent_of("current_daily_streak", 7),
+    "weekly_completion": _percent_of("current_weekly_streak", 1),
+    "wake_up_early_count": _field("wake_up_early_count"),
+    "monk_mode": _field("monk_mode_weeks"),
+}
+
+# Facts that are not columns of winter_arc_user_progress and must be loaded separately
+EXTRA_FACTS: dict[str, str] = {
+    "wake_up_early_count": "wake_up_early_count",
+    "monk_mode": "monk_mode_weeks",
+}
+
+
+class Requirement:
+    """One `key: target` pair of an achievement's requirements."""
+
+    def __init__(self, key: str, target: float, measure: Measure) -> None:
+        self.key = key
+        self.target = target
+        self.measure = measure
+
+    def current(self, facts: Facts) -> float:
+        return min(self.measure(facts), self.target)
+
+    def percentage(self, facts: Facts) -> int:
+        if self.target <= 0:
+            return 100
+        return int(self.current(facts) / self.target * 100)
+
+
+class AchievementRule:
+    """Compiled requirements of one achievement; all requirements must be met."""
+
+    def __init__(self, achievement: dict, requirements: list[Requirement]) -> None:
+        self.achievement = achievement
+        self.requirements = requirements
+
+    @property
+    def achievement_id(self) -> int:
+        return self.achievement["id"]
+
+    def is_satisfied(self, facts: Facts) -> bool:
+        return bool(self.requirements) and all(
+            r.measure(facts) >= r.target for r in self.requirements
+        )
+
+    def progress(self, facts: Facts) -> dict:
+        """Progress toward the least complete requirement."""
+        if not self.requirements:
+            return {"current": 0, "target": 0, "percentage": 0}
+        bottleneck = min(self.requirements, key=lambda r: r.percentage(facts))
+        return {
+            "current": _as_number(bottleneck.current(facts)),
+            "target": _as_number(bottleneck.target),
+            "percentage": bottleneck.percentage(facts),
+        }
+
+
+class RuleSet:
+    """All compiled achievement rules, shared by unlock checks and progress reports."""
+
+    def __init__(self, rules: list[AchievementRule]) -> None:
+        self.rules = rules
+        self.extra_facts = {
+            EXTRA_FACTS[r.key] for rule in rules for r in rule.requirements if r.key in EXTRA_FACTS
+        }
+
+    def satisfied(self, facts: Facts) -> list[AchievementRule]:
+        return [rule for rule in self.rules if rule.is_satisfied(facts)]
+
+
+def compile_rules(achievements: Iterable[dict]) -> RuleSet:
+    """Compile achievement rows into a RuleSet. Unknown requirement keys never unlock."""
+    rules = []
+    for achievement in achievements:
+        requirements = []
+        for key, target in (achievement.get("requirements") or {}).items():
+            measure = METRICS.get(key)
+            if measure is None:
+                log.warning(
+                    "achievement_unknown_requirement", code=achievement.get("code"), key=key
+                )
+                requirements.append(Requirement(key, max(_as_target(target), 1.0), _never))
+                continue
+            requirements.append(Requirement(key, _as_target(target), measure))
+        rules.append(AchievementRule(achievement, requirements))
+    return RuleSet(rules)
+
+
+def _never(_: Facts) -> float:
+    return 0.0
+
+
+def _as_target(value) -> float:
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # non-numeric flags such as "yes" mean "at least once"
+        return 1.0
+
+
+def _as_number(value: float) -> int | float:
+    return int(value) if float(value).is_integer() else round(value, 2)
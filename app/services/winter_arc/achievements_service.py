@@ -1,7 +1,14 @@
 """Winter Arc Achievements Service - Badge unlocking and management."""
 from datetime import UTC, datetime
 
+from app.core.cache import TTLCache
 from app.infra.supabase.client import supabase
+from app.services.winter_arc import checklist_service
+from app.services.winter_arc.achievement_rules import RuleSet, compile_rules
+from app.services.winter_arc.checklist_service import DAILY_ITEMS, WEEKLY_ITEMS
+
+# The achievement catalog rarely changes; compile its rules once per TTL window
+_rules_cache = TTLCache(ttl_seconds=300, max_entries=1)
 
 
 async def get_all_achievements():
@@ -23,53 +30,76 @@ async def get_user_achievements(user_id: str, program_id: int):
         .select("*, achievement:achievement_id(*)")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
-        .order("unlocked_at", desc=True)
+        .order("earned_at", desc=True)
         .execute()
     )
     return res.data if hasattr(res, "data") else res
 
 
-async def unlock_achievement(user_id: str, program_id: int, achievement_id: int):
-    """Unlock an achievement for a user (idempotent - won't duplicate)."""
+async def get_unlocked_achievement_ids(user_id: str, program_id: int) -> set[int]:
+    """IDs of the achievements a user has already unlocked for a program."""
     if supabase is None:
-        return None
+        return set()
 
-    # Check if already unlocked
-    existing = (
+    res = (
         supabase.table("winter_arc_user_achievements")
-        .select("id")
+        .select("achievement_id")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
-        .eq("achievement_id", achievement_id)
-        .limit(1)
         .execute()
     )
-    already_unlocked = bool(
-        (existing.data if hasattr(existing, "data") else existing) or []
-    )
+    data = res.data if hasattr(res, "data") else res
+    return {row["achievement_id"] for row in data or []}
 
-    if already_unlocked:
-        return {"already_unlocked": True}
 
-    # Insert new achievement
-    data = {
-        "user_id": user_id,
-        "program_id": program_id,
-        "achievement_id": achievement_id,
-        "unlocked_at": datetime.now(UTC).isoformat(),
-    }
+async def unlock_achievements(user_id: str, program_id: int, achievement_ids: list[int]):
+    """
+    Unlock several achievements in one batched insert.
 
-    res = supabase.table("winter_arc_user_achievements").insert(data).execute()
-    result_data = res.data if hasattr(res, "data") else res
-    return result_data[0] if result_data else None
+    Conflicts on UNIQUE(user_id, program_id, achievement_id) are ignored, so only rows
+    that were actually inserted are returned.
+    """
+    if supabase is None or not achievement_ids:
+        return []
 
+    earned_at = datetime.now(UTC).isoformat()
+    rows = [
+        {
+            "user_id": user_id,
+            "program_id": program_id,
+            "achievement_id": achievement_id,
+            "earned_at": earned_at,
+        }
+        for achievement_id in achievement_ids
+    ]
+    res = (
+        supabase.table("winter_arc_user_achievements")
+        .upsert(rows, on_conflict="user_id,program_id,achievement_id", ignore_duplicates=True)
+        .execute()
+    )
+    return (res.data if hasattr(res, "data") else res) or []
 
-async def check_and_unlock_achievements(user_id: str, program_id: int):
-    """Check user's progress and unlock any achievements they've earned."""
+
+async def unlock_achievement(user_id: str, program_id: int, achievement_id: int):
+    """Unlock an achievement for a user (idempotent - won't duplicate)."""
     if supabase is None:
-        return []
+        return None
+
+    inserted = await unlock_achievements(user_id, program_id, [achievement_id])
+    return inserted[0] if inserted else {"already_unlocked": True}
 
-    # Get user progress
+
+async def get_rule_set() -> RuleSet:
+    """Compiled achievement rules, rebuilt when the catalog cache expires."""
+    rules = _rules_cache.get("rules")
+    if rules is None:
+        rules = compile_rules(await get_all_achievements())
+        _rules_cache.set("rules", rules)
+    return rules
+
+
+async def _load_facts(user_id: str, program_id: int, rule_set: RuleSet) -> dict | None:
+    """Load the user's progress row plus any extra facts the rule set needs."""
     progress_res = (
         supabase.table("winter_arc_user_progress")
         .select("*")
@@ -80,74 +110,64 @@ async def check_and_unlock_achievements(user_id: str, program_id: int):
     )
     progress_data = progress_res.data if hasattr(progress_res, "data") else progress_res
     if not progress_data:
-        return []
+        return None
 
-    progress = progress_data[0]
-    newly_unlocked = []
+    facts = dict(progress_data[0])
+    if "wake_up_early_count" in rule_set.extra_facts:
+        facts["wake_up_early_count"] = _count_checklists(
+            "winter_arc_daily_checklists", user_id, program_id, "wake_up_early"
+        )
+    if "monk_mode_weeks" in rule_set.extra_facts:
+        facts["monk_mode_weeks"] = _count_checklists(
+            "winter_arc_weekly_checklists", user_id, program_id, "monk_mode_period"
+        )
+    return facts
 
-    # Define achievement criteria (these IDs should match database)
-    # Note: You'll need to insert these achievements into the database first
 
-    criteria = [
-        # Streak achievements
-        {
-            "code": "FIRST_DAY",
-            "check": lambda p: p.get("current_daily_streak", 0) >= 1,
-        },
-        {
-            "code": "WEEK_WARRIOR",
-            "check": lambda p: p.get("current_daily_streak", 0) >= 7,
-        },
-        {
-            "code": "FORTNIGHT_FORCE",
-            "check": lambda p: p.get("current_daily_streak", 0) >= 14,
-        },
-        {
-            "code": "MONTH_MASTER",
-            "check": lambda p: p.get("current_daily_streak", 0) >= 30,
-        },
-        {
-            "code": "PERFECT_WEEK",
-            "check": lambda p: p.get("current_weekly_streak", 0) >= 1,
-        },
-        {
-            "code": "MONTHLY_MOMENTUM",
-            "check": lambda p: p.get("current_weekly_streak", 0) >= 4,
-        },
-        # Timer achievements
-        {
-            "code": "SILENCE_SEEKER",
-            "check": lambda p: p.get("three_min_timer_completions", 0) >= 10,
-        },
-        {
-            "code": "MEDITATION_MASTER",
-            "check": lambda p: p.get("three_min_timer_completions", 0) >= 50,
-        },
-        # Total completion achievements
-        {
-            "code": "CONSISTENCY_KING",
-            "check": lambda p: p.get("total_days_completed", 0) >= 30,
-        },
-        {
-            "code": "WINTER_WARRIOR",
-            "check": lambda p: p.get("total_days_completed", 0) >= 84,
-        },  # 12 weeks
-    ]
+def _count_checklists(table: str, user_id: str, program_id: int, item: str) -> int:
+    if checklist_service.bitmask_mode():
+        # PostgREST cannot filter on bits; counted in the database (migration 0023)
+        weekly = item in WEEKLY_ITEMS
+        res = supabase.rpc(
+            "count_checklist_item",
+            {
+                "p_user_id": user_id,
+                "p_program_id": program_id,
+                "p_weekly": weekly,
+                "p_bit": (WEEKLY_ITEMS if weekly else DAILY_ITEMS).index(item),
+            },
+        ).execute()
+        return (res.data if hasattr(res, "data") else res) or 0
 
-    # Get all achievements from database to match codes to IDs
-    all_achievements = await get_all_achievements()
-    achievement_map = {a["code"]: a["id"] for a in all_achievements}
+    res = (
+        supabase.table(table)
+        .select("id", count="exact", head=True)
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .eq(item, True)
+        .execute()
+    )
+    return res.count or 0
 
-    # Check each criterion
-    for criterion in criteria:
-        code = criterion["code"]
-        if code in achievement_map and criterion["check"](progress):
-            achievement_id = achievement_map[code]
-            result = await unlock_achievement(user_id, program_id, achievement_id)
-            if result and not result.get("already_unlocked"):
-                newly_unlocked.append(result)
 
-    return newly_unlocked
+async def check_and_unlock_achievements(user_id: str, program_id: int):
+    """Check user's progress and unlock any achievements they've earned."""
+    if supabase is None:
+        return []
+
+    rule_set = await get_rule_set()
+    facts = await _load_facts(user_id, program_id, rule_set)
+    if facts is None:
+        return []
+
+    # Diff satisfied rules against what is already unlocked, then write once
+    unlocked_ids = await get_unlocked_achievement_ids(user_id, program_id)
+    to_unlock = [
+        rule.achievement_id
+        for rule in rule_set.satisfied(facts)
+        if rule.achievement_id not in unlocked_ids
+    ]
+    return await unlock_achievements(user_id, program_id, to_unlock)
 
 
 async def get_achievement_progress(user_id: str, program_id: int):
@@ -155,78 +175,17 @@ async def get_achievement_progress(user_id: str, program_id: int):
     if supabase is None:
         return []
 
-    # Get all achievements
-    all_achievements = await get_all_achievements()
+    rule_set = await get_rule_set()
 
-    # Get user's unlocked achievements
-    unlocked = await get_user_achievements(user_id, program_id)
-    unlocked_ids = {ua["achievement_id"] for ua in unlocked}
+    unlocked_ids = await get_unlocked_achievement_ids(user_id, program_id)
 
-    # Get user progress
-    progress_res = (
-        supabase.table("winter_arc_user_progress")
-        .select("*")
-        .eq("user_id", user_id)
-        .eq("program_id", program_id)
-        .limit(1)
-        .execute()
-    )
-    progress_data = progress_res.data if hasattr(progress_res, "data") else progress_res
-    progress = progress_data[0] if progress_data else {}
-
-    # Build progress report
-    achievement_progress = []
-    for achievement in all_achievements:
-        code = achievement["code"]
-        unlocked = achievement["id"] in unlocked_ids
-
-        # Calculate progress percentage based on code
-        current = 0
-        target = 100
-        percentage = 0
-
-        if code == "FIRST_DAY":
-            target = 1
-            current = min(progress.get("current_daily_streak", 0), target)
-        elif code == "WEEK_WARRIOR":
-            target = 7
-            current = min(progress.get("current_daily_streak", 0), target)
-        elif code == "FORTNIGHT_FORCE":
-            target = 14
-            current = min(progress.get("current_daily_streak", 0), target)
-        elif code == "MONTH_MASTER":
-            target = 30
-            current = min(progress.get("current_daily_streak", 0), target)
-        elif code == "PERFECT_WEEK":
-            target = 1
-            current = min(progress.get("current_weekly_streak", 0), target)
-        elif code == "MONTHLY_MOMENTUM":
-            target = 4
-            current = min(progress.get("current_weekly_streak", 0), target)
-        elif code == "SILENCE_SEEKER":
-            target = 10
-            current = min(progress.get("three_min_timer_completions", 0), target)
-        elif code == "MEDITATION_MASTER":
-            target = 50
-            current = min(progress.get("three_min_timer_completions", 0), target)
-        elif code == "CONSISTENCY_KING":
-            target = 30
-            current = min(progress.get("total_days_completed", 0), target)
-        elif code == "WINTER_WARRIOR":
-            target = 84
-            current = min(progress.get("total_days_completed", 0), target)
-
-        if target > 0:
-            percentage = int((current / target) * 100)
-
-        achievement_progress.append(
-            {
-                "achievement": achievement,
-                "unlocked": unlocked,
-                "current": current,
-                "target": target,
-                "percentage": percentage,
-            }
-        )
+    facts = await _load_facts(user_id, program_id, rule_set) or {}
 
-    return achievement_progress
+    return [
+        {
+            "achievement": rule.achievement,
+            "unlocked": rule.achievement_id in unlocked_ids,
+            **rule.progress(facts),
+        }
+        for rule in rule_set.rules
+    ]
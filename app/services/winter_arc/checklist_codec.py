@@ -0,0 +1,46 @@
+"""Winter Arc Checklist Codec - Packs checklist items into integer bitmasks.
+
+Bit `i` of a mask is item `i` of `DAILY_ITEMS` / `WEEKLY_ITEMS` (least significant bit first).
+"""
+import base64
+from collections.abc import Iterable, Mapping, Sequence
+
+
+def encode_mask(row: Mapping, items: Sequence[str]) -> int:
+    """Pack the boolean item columns of a checklist row into a bitmask."""
+    mask = 0
+    for bit, item in enumerate(items):
+        if row.get(item):
+            mask |= 1 << bit
+    return mask
+
+
+def decode_mask(mask: int, items: Sequence[str]) -> dict[str, bool]:
+    """Expand a bitmask back into `{item: bool}`."""
+    return {item: bool(mask >> bit & 1) for bit, item in enumerate(items)}
+
+
+def pack_masks(masks: Iterable[int], width: int) -> str:
+    """Base64 of the masks as fixed-width little-endian unsigned integers."""
+    return base64.b64encode(b"".join(m.to_bytes(width, "little") for m in masks)).decode()
+
+
+def mask_delta(updates: Mapping[str, bool | None], items: Sequence[str]) -> tuple[int, int]:
+    """Bits to set and bits to clear for a partial `{item: bool}` update."""
+    set_bits = clear_bits = 0
+    for bit, item in enumerate(items):
+        value = updates.get(item)
+        if value is True:
+            set_bits |= 1 << bit
+        elif value is False:
+            clear_bits |= 1 << bit
+    return set_bits, clear_bits
+
+
+def decode_row(row: dict | None, items: Sequence[str]) -> dict | None:
+    """Replace a stored `items_mask` with the boolean item fields of the API contract."""
+    if not row or "items_mask" not in row:
+        return row
+    decoded = {k: v for k, v in row.items() if k != "items_mask"}
+    decoded.update(decode_mask(row["items_mask"] or 0, items))
+    return decoded
@@ -1,7 +1,48 @@
 """Winter Arc Checklist Service - Daily and weekly checklist operations with streak tracking."""
 from datetime import UTC, date, datetime, timedelta
 
+from app.core.config import settings
+from app.core.pagination import clamp_limit, keyset, split_page
 from app.infra.supabase.client import supabase
+from app.services.winter_arc.checklist_codec import (
+    decode_row,
+    encode_mask,
+    mask_delta,
+    pack_masks,
+)
+
+# Checklist items, in display order
+DAILY_ITEMS = (
+    "wake_up_early",
+    "ten_min_silence",
+    "morning_hydration",
+    "workout",
+    "clean_eating",
+    "review_mission",
+    "small_sacrifice",
+    "moment_silence",
+    "act_of_honor",
+    "small_overcoming",
+)
+WEEKLY_ITEMS = (
+    "strength_workouts_3_4",
+    "cardio_sessions_2_3",
+    "meal_prep",
+    "progress_review",
+    "plan_adjustment",
+    "monk_mode_period",
+    "reflection_on_principles",
+    "planning_next_week",
+)
+
+# Range reads page on the per-user unique date keys
+DAILY_RANGE_KEY = ("checklist_date",)
+WEEKLY_RANGE_KEY = ("week_start_date",)
+
+
+def bitmask_mode() -> bool:
+    """True when checklist items are stored packed in `items_mask` (migration 0010)."""
+    return settings.checklist_storage_mode == "bitmask"
 
 
 def get_iso_week_info(target_date: date):
@@ -38,27 +79,33 @@ async def get_daily_checklist(user_id: str, program_id: int, checklist_date: dat
         .execute()
     )
     data = res.data if hasattr(res, "data") else res
-    return data[0] if data else None
+    return decode_row(data[0], DAILY_ITEMS) if data else None
 
 
 async def get_daily_checklists_range(
-    user_id: str, program_id: int, start_date: date, end_date: date
+    user_id: str,
+    program_id: int,
+    start_date: date,
+    end_date: date,
+    cursor: str | None = None,
+    limit: int | None = None,
 ):
-    """Get daily checklists for a date range."""
+    """Get daily checklists for a date range, oldest first. Returns `(checklists, next_cursor)`."""
     if supabase is None:
-        return []
+        return [], None
 
-    res = (
+    limit = clamp_limit(limit)
+    q = (
         supabase.table("winter_arc_daily_checklists")
         .select("*")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
         .gte("checklist_date", start_date.isoformat())
         .lte("checklist_date", end_date.isoformat())
-        .order("checklist_date", desc=False)
-        .execute()
     )
-    return res.data if hasattr(res, "data") else res
+    res = keyset(q, cursor, DAILY_RANGE_KEY, limit, desc=False).execute()
+    rows, next_cursor = split_page(res.data if hasattr(res, "data") else res, limit, DAILY_RANGE_KEY)
+    return [decode_row(row, DAILY_ITEMS) for row in rows], next_cursor
 
 
 async def update_daily_checklist(
@@ -68,25 +115,30 @@ async def update_daily_checklist(
     if supabase is None:
         return None
 
+    if bitmask_mode():
+        # One atomic upsert that sets/clears bits; no existence check needed
+        set_bits, clear_bits = mask_delta(updates, DAILY_ITEMS)
+        res = supabase.rpc(
+            "apply_daily_checklist_mask",
+            {
+                "p_user_id": user_id,
+                "p_program_id": program_id,
+                "p_date": checklist_date.isoformat(),
+                "p_set": set_bits,
+                "p_clear": clear_bits,
+            },
+        ).execute()
+        result_data = res.data if hasattr(res, "data") else res
+        updated_checklist = decode_row(result_data[0], DAILY_ITEMS) if result_data else None
+        if updated_checklist and updated_checklist.get("is_fully_completed"):
+            await update_daily_streak(user_id, program_id)
+        return updated_checklist
+
     # Check if checklist exists for this date
     existing = await get_daily_checklist(user_id, program_id, checklist_date)
 
-    # Valid daily checklist fields
-    valid_fields = {
-        "wake_up_early",
-        "ten_min_silence",
-        "morning_hydration",
-        "workout",
-        "clean_eating",
-        "review_mission",
-        "small_sacrifice",
-        "moment_silence",
-        "act_of_honor",
-        "small_overcoming",
-    }
-
     # Filter to only valid fields
-    data = {k: v for k, v in updates.items() if k in valid_fields}
+    data = {k: v for k, v in updates.items() if k in DAILY_ITEMS}
 
     if existing:
         # Update existing checklist
@@ -134,7 +186,13 @@ async def update_daily_streak(user_id: str, program_id: int):
 
     if not completed:
         # No completed checklists - reset streaks
-        await _update_progress_streaks(user_id, program_id, 0, 0, None, None)
+        await _update_progress_streaks(
+            user_id,
+            program_id,
+            current_daily_streak=0,
+            longest_daily_streak=0,
+            total_days_completed=0,
+        )
         return
 
     # Calculate current streak (consecutive days from today backwards)
@@ -177,7 +235,11 @@ async def update_daily_streak(user_id: str, program_id: int):
     total_completed = len(completed)
 
     await _update_progress_streaks(
-        user_id, program_id, current_streak, longest_streak, None, total_completed
+        user_id,
+        program_id,
+        current_daily_streak=current_streak,
+        longest_daily_streak=longest_streak,
+        total_days_completed=total_completed,
     )
 
 
@@ -200,28 +262,33 @@ async def get_weekly_checklist(user_id: str, program_id: int, year: int, week: i
         .execute()
     )
     data = res.data if hasattr(res, "data") else res
-    return data[0] if data else None
+    return decode_row(data[0], WEEKLY_ITEMS) if data else None
 
 
 async def get_weekly_checklists_range(
-    user_id: str, program_id: int, start_date: date, end_date: date
+    user_id: str,
+    program_id: int,
+    start_date: date,
+    end_date: date,
+    cursor: str | None = None,
+    limit: int | None = None,
 ):
-    """Get weekly checklists for a date range."""
+    """Get weekly checklists for a date range, oldest first. Returns `(checklists, next_cursor)`."""
     if supabase is None:
-        return []
+        return [], None
 
-    res = (
+    limit = clamp_limit(limit)
+    q = (
         supabase.table("winter_arc_weekly_checklists")
         .select("*")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
         .gte("week_start_date", start_date.isoformat())
         .lte("week_end_date", end_date.isoformat())
-        .order("year", desc=False)
-        .order("week_number", desc=False)
-        .execute()
     )
-    return res.data if hasattr(res, "data") else res
+    res = keyset(q, cursor, WEEKLY_RANGE_KEY, limit, desc=False).execute()
+    rows, next_cursor = split_page(res.data if hasattr(res, "data") else res, limit, WEEKLY_RANGE_KEY)
+    return [decode_row(row, WEEKLY_ITEMS) for row in rows], next_cursor
 
 
 async def update_weekly_checklist(
@@ -231,23 +298,33 @@ async def update_weekly_checklist(
     if supabase is None:
         return None
 
+    if bitmask_mode():
+        set_bits, clear_bits = mask_delta(updates, WEEKLY_ITEMS)
+        week_start, week_end = get_week_start_end(year, week)
+        res = supabase.rpc(
+            "apply_weekly_checklist_mask",
+            {
+                "p_user_id": user_id,
+                "p_program_id": program_id,
+                "p_year": year,
+                "p_week": week,
+                "p_week_start": week_start.isoformat(),
+                "p_week_end": week_end.isoformat(),
+                "p_set": set_bits,
+                "p_clear": clear_bits,
+            },
+        ).execute()
+        result_data = res.data if hasattr(res, "data") else res
+        updated_checklist = decode_row(result_data[0], WEEKLY_ITEMS) if result_data else None
+        if updated_checklist and updated_checklist.get("is_fully_completed"):
+            await update_weekly_streak(user_id, program_id)
+        return updated_checklist
+
     # Check if checklist exists for this week
     existing = await get_weekly_checklist(user_id, program_id, year, week)
 
-    # Valid weekly checklist fields
-    valid_fields = {
-        "strength_workouts_3_4",
-        "cardio_sessions_2_3",
-        "meal_prep",
-        "progress_review",
-        "plan_adjustment",
-        "monk_mode_period",
-        "reflection_on_principles",
-        "planning_next_week",
-    }
-
     # Filter to only valid fields
-    data = {k: v for k, v in updates.items() if k in valid_fields}
+    data = {k: v for k, v in updates.items() if k in WEEKLY_ITEMS}
 
     if existing:
         # Update existing checklist
@@ -301,7 +378,13 @@ async def update_weekly_streak(user_id: str, program_id: int):
 
     if not completed:
         # No completed checklists - reset streaks
-        await _update_progress_streaks(user_id, program_id, None, None, 0, 0)
+        await _update_progress_streaks(
+            user_id,
+            program_id,
+            current_weekly_streak=0,
+            longest_weekly_streak=0,
+            total_weeks_completed=0,
+        )
         return
 
     # Calculate current streak (consecutive weeks from this week backwards)
@@ -351,7 +434,11 @@ async def update_weekly_streak(user_id: str, program_id: int):
     total_completed = len(completed)
 
     await _update_progress_streaks(
-        user_id, program_id, None, None, current_streak, longest_streak, total_completed
+        user_id,
+        program_id,
+        current_weekly_streak=current_streak,
+        longest_weekly_streak=longest_streak,
+        total_weeks_completed=total_completed,
     )
 
 
@@ -404,6 +491,208 @@ async def _update_progress_streaks(
         supabase.table("winter_arc_user_progress").insert(data).execute()
 
 
+# ===== CALENDAR =====
+
+
+async def get_checklist_calendar(
+    user_id: str, program_id: int, start_date: date, end_date: date
+):
+    """
+    Packed checklist history for calendar/heatmap rendering.
+
+    - `daily`: base64 of one little-endian uint16 per day from `start_date` to `end_date`;
+      bit i is DAILY_ITEMS[i] (0 when no checklist exists).
+    - `weekly`: base64 of one byte per ISO week starting at `week_start`;
+      bit i is WEEKLY_ITEMS[i].
+    """
+    days = (end_date - start_date).days + 1
+    week_start = start_date - timedelta(days=start_date.weekday())
+    weeks = (end_date - week_start).days // 7 + 1
+    daily_masks = [0] * days
+    weekly_masks = [0] * weeks
+
+    bitmask = bitmask_mode()
+
+    if supabase is not None:
+        daily_res = (
+            supabase.table("winter_arc_daily_checklists")
+            .select(
+                "checklist_date,items_mask"
+                if bitmask
+                else ",".join(("checklist_date", *DAILY_ITEMS))
+            )
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+            .gte("checklist_date", start_date.isoformat())
+            .lte("checklist_date", end_date.isoformat())
+            .execute()
+        )
+        for row in (daily_res.data if hasattr(daily_res, "data") else daily_res) or []:
+            offset = (_as_date(row["checklist_date"]) - start_date).days
+            daily_masks[offset] = row["items_mask"] if bitmask else encode_mask(row, DAILY_ITEMS)
+
+        weekly_res = (
+            supabase.table("winter_arc_weekly_checklists")
+            .select(
+                "week_start_date,items_mask"
+                if bitmask
+                else ",".join(("week_start_date", *WEEKLY_ITEMS))
+            )
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+            .gte("week_start_date", week_start.isoformat())
+            .lte("week_start_date", end_date.isoformat())
+            .execute()
+        )
+        for row in (weekly_res.data if hasattr(weekly_res, "data") else weekly_res) or []:
+            offset = (_as_date(row["week_start_date"]) - week_start).days // 7
+            weekly_masks[offset] = row["items_mask"] if bitmask else encode_mask(row, WEEKLY_ITEMS)
+
+    return {
+        "format": "bitmask-v1",
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "week_start": week_start.isoformat(),
+        "daily": pack_masks(daily_masks, 2),
+        "weekly": pack_masks(weekly_masks, 1),
+    }
+
+
+# ===== BATCH SYNC =====
+
+
+async def sync_checklists(
+    user_id: str, program_id: int, daily: list[dict], weekly: list[dict]
+):
+    """
+    Apply many daily and weekly checklist deltas at once (offline replay).
+
+    Deltas are merged over the stored rows, written with one bulk upsert per table,
+    and streaks are recomputed once at the end.
+    """
+    if supabase is None:
+        return {"daily": [], "weekly": []}
+
+    daily_rows = await _merge_daily_deltas(user_id, program_id, daily) if daily else []
+    weekly_rows = await _merge_weekly_deltas(user_id, program_id, weekly) if weekly else []
+
+    synced_daily = []
+    if daily_rows:
+        res = (
+            supabase.table("winter_arc_daily_checklists")
+            .upsert(daily_rows, on_conflict="user_id,program_id,checklist_date")
+            .execute()
+        )
+        synced_daily = [
+            decode_row(row, DAILY_ITEMS)
+            for row in (res.data if hasattr(res, "data") else res) or []
+        ]
+        await update_daily_streak(user_id, program_id)
+
+    synced_weekly = []
+    if weekly_rows:
+        res = (
+            supabase.table("winter_arc_weekly_checklists")
+            .upsert(weekly_rows, on_conflict="user_id,program_id,year,week_number")
+            .execute()
+        )
+        synced_weekly = [
+            decode_row(row, WEEKLY_ITEMS)
+            for row in (res.data if hasattr(res, "data") else res) or []
+        ]
+        await update_weekly_streak(user_id, program_id)
+
+    return {"daily": synced_daily, "weekly": synced_weekly}
+
+
+async def _merge_daily_deltas(user_id: str, program_id: int, deltas: list[dict]):
+    """Fold deltas per date over the stored rows so every upserted row is complete."""
+    merged: dict[str, dict] = {}
+    for delta in deltas:
+        day = _as_date(delta["checklist_date"]).isoformat()
+        merged.setdefault(day, {}).update(
+            {k: v for k, v in delta.items() if k in DAILY_ITEMS and v is not None}
+        )
+
+    res = (
+        supabase.table("winter_arc_daily_checklists")
+        .select(",".join(("checklist_date", *_stored_item_columns(DAILY_ITEMS))))
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .in_("checklist_date", list(merged))
+        .execute()
+    )
+    existing = {
+        row["checklist_date"]: row for row in (res.data if hasattr(res, "data") else res) or []
+    }
+
+    return [
+        {
+            "user_id": user_id,
+            "program_id": program_id,
+            "checklist_date": day,
+            **_merge_items(existing.get(day, {}), changes, DAILY_ITEMS),
+        }
+        for day, changes in merged.items()
+    ]
+
+
+async def _merge_weekly_deltas(user_id: str, program_id: int, deltas: list[dict]):
+    """Fold deltas per ISO week over the stored rows so every upserted row is complete."""
+    merged: dict[tuple[int, int], dict] = {}
+    for delta in deltas:
+        key = (delta["year"], delta["week_number"])
+        merged.setdefault(key, {}).update(
+            {k: v for k, v in delta.items() if k in WEEKLY_ITEMS and v is not None}
+        )
+
+    res = (
+        supabase.table("winter_arc_weekly_checklists")
+        .select(",".join(("year", "week_number", *_stored_item_columns(WEEKLY_ITEMS))))
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .in_("year", sorted({year for year, _ in merged}))
+        .in_("week_number", sorted({week for _, week in merged}))
+        .execute()
+    )
+    existing = {
+        (row["year"], row["week_number"]): row
+        for row in (res.data if hasattr(res, "data") else res) or []
+    }
+
+    rows = []
+    for (year, week), changes in merged.items():
+        week_start, week_end = get_week_start_end(year, week)
+        rows.append(
+            {
+                "user_id": user_id,
+                "program_id": program_id,
+                "year": year,
+                "week_number": week,
+                "week_start_date": week_start.isoformat(),
+                "week_end_date": week_end.isoformat(),
+                **_merge_items(existing.get((year, week), {}), changes, WEEKLY_ITEMS),
+            }
+        )
+    return rows
+
+
+def _stored_item_columns(items: tuple[str, ...]) -> tuple[str, ...]:
+    return ("items_mask",) if bitmask_mode() else items
+
+
+def _merge_items(stored: dict, changes: dict, items: tuple[str, ...]) -> dict:
+    """Item columns to write: the stored row with `changes` applied, in the storage format."""
+    if bitmask_mode():
+        set_bits, clear_bits = mask_delta(changes, items)
+        return {"items_mask": ((stored.get("items_mask") or 0) & ~clear_bits) | set_bits}
+    return {item: bool(changes.get(item, stored.get(item))) for item in items}
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
 # ===== HELPER FOR CURRENT DATE =====
 
 
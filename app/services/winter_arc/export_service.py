@@ -0,0 +1,91 @@
+"""Winter Arc Export Service - Streams a user's full Winter Arc history as NDJSON."""
+import zlib
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+import orjson
+
+from app.infra.supabase.client import supabase
+from app.services.winter_arc.checklist_codec import decode_row
+from app.services.winter_arc.checklist_service import DAILY_ITEMS, WEEKLY_ITEMS
+
+EXPORT_PAGE_SIZE = 500
+
+# (record type, table, checklist items for bitmask decoding)
+EXPORT_TABLES: tuple[tuple[str, str, tuple[str, ...] | None], ...] = (
+    ("progress", "winter_arc_user_progress", None),
+    ("daily_checklist", "winter_arc_daily_checklists", DAILY_ITEMS),
+    ("weekly_checklist", "winter_arc_weekly_checklists", WEEKLY_ITEMS),
+    ("progress_snapshot", "winter_arc_progress_snapshots", None),
+    ("achievement", "winter_arc_user_achievements", None),
+    ("post_suggestion", "winter_arc_post_suggestions", None),
+)
+
+
+async def iter_table_rows(
+    table: str, user_id: str, program_id: int, page_size: int = EXPORT_PAGE_SIZE
+) -> AsyncIterator[dict]:
+    """Yield a user's rows from `table`, paging with a keyset cursor on `id`."""
+    if supabase is None:
+        return
+
+    last_id = None
+    while True:
+        q = (
+            supabase.table(table)
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+        )
+        if last_id is not None:
+            q = q.gt("id", last_id)
+        res = q.order("id", desc=False).limit(page_size).execute()
+        rows = (res.data if hasattr(res, "data") else res) or []
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def export_ndjson(
+    user_id: str, program_id: int, page_size: int = EXPORT_PAGE_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export one NDJSON line at a time.
+
+    The first line is an `export` header; every other line is `{"type": ..., **row}`.
+    """
+    yield _line(
+        {
+            "type": "export",
+            "version": 1,
+            "user_id": user_id,
+            "program_id": program_id,
+            "exported_at": datetime.now(UTC).isoformat(),
+        }
+    )
+    for kind, table, items in EXPORT_TABLES:
+        async for row in iter_table_rows(table, user_id, program_id, page_size):
+            if items is not None:
+                row = decode_row(row, items)
+            yield _line({"type": kind, **row})
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], flush_bytes: int = 64 * 1024):
+    """Gzip an async byte stream incrementally, emitting roughly every `flush_bytes` input."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    pending = 0
+    async for chunk in chunks:
+        out = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _line(record: dict) -> bytes:
+    return orjson.dumps(record, default=str) + b"\n"
@@ -0,0 +1,316 @@
+"""Winter Arc Leaderboard Index - In-process ranked leaderboard per program.
+
+Each program keeps an indexable skip list ordered like the materialized leaderboard
+(score desc, total days desc, user id), answering top-N pages, a user's rank and ±K context
+in O(log n) without touching the database. The index is loaded at startup, updated
+incrementally whenever a user's score or visibility changes in this process, and
+reloaded after each materialized leaderboard refresh.
+"""
+import itertools
+import random
+from collections.abc import Callable, Hashable
+from datetime import UTC, datetime
+from typing import Any
+
+from app.core.logging import get_logger
+from app.infra.supabase.client import supabase
+
+log = get_logger(__name__)
+
+MAX_LEVELS = 24  # comfortably above log2(max participants per program)
+LOAD_PAGE_SIZE = 1000
+SOURCE_TABLE = "winter_arc_leaderboard_ranked"
+
+# Process-wide, so a reloaded board never reuses an older board's version
+_versions = itertools.count(1)
+
+# Progress columns that change an existing leaderboard entry
+SCORE_FIELDS = (
+    "leaderboard_score",
+    "current_daily_streak",
+    "longest_daily_streak",
+    "current_weekly_streak",
+    "total_days_completed",
+    "total_weeks_completed",
+    "show_on_leaderboard",
+    "last_activity_at",
+)
+
+
+class _Node:
+    __slots__ = ("key", "next", "value", "width")
+
+    def __init__(self, key: Any, value: Any, levels: int) -> None:
+        self.key = key
+        self.value = value
+        self.next: list[_Node | None] = [None] * levels
+        self.width: list[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """Skip list keyed by sortable tuples with per-link widths for O(log n) rank lookups."""
+
+    def __init__(self) -> None:
+        self._head = _Node(None, None, MAX_LEVELS)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _predecessors(self, key: Any) -> tuple[list[_Node], list[int]]:
+        chain: list[_Node] = [self._head] * MAX_LEVELS
+        positions = [0] * MAX_LEVELS
+        node, pos = self._head, 0
+        for level in reversed(range(MAX_LEVELS)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[level]
+                node, nxt = nxt, nxt.next[level]
+            chain[level] = node
+            positions[level] = pos
+        return chain, positions
+
+    def insert(self, key: Any, value: Any) -> None:
+        chain, positions = self._predecessors(key)
+        levels = 1
+        while levels < MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        node = _Node(key, value, levels)
+        for level in range(MAX_LEVELS):
+            prev = chain[level]
+            if level < levels:
+                # distance from prev to the new node along this level
+                offset = positions[0] - positions[level] + 1
+                node.next[level] = prev.next[level]
+                node.width[level] = prev.width[level] - offset + 1
+                prev.next[level] = node
+                prev.width[level] = offset
+            else:
+                prev.width[level] += 1
+        self._size += 1
+
+    def remove(self, key: Any) -> Any:
+        chain, _ = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(MAX_LEVELS):
+            prev = chain[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        self._size -= 1
+        return target.value
+
+    def rank(self, key: Any) -> int:
+        """0-based position of `key`."""
+        chain, positions = self._predecessors(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def slice(self, start: int, count: int) -> list[Any]:
+        """Values at positions [start, start + count)."""
+        if start < 0 or start >= self._size or count <= 0:
+            return []
+        node, remaining = self._head, start + 1
+        for level in reversed(range(MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+        values = []
+        current: _Node | None = node
+        while current is not None and len(values) < count:
+            values.append(current.value)
+            current = current.next[0]
+        return values
+
+
+def _sort_key(entry: dict) -> tuple:
+    return (
+        -float(entry.get("leaderboard_score") or 0),
+        -int(entry.get("total_days_completed") or 0),
+        str(entry["user_id"]),
+    )
+
+
+class ProgramLeaderboard:
+    """Ranked, opted-in entries of one program."""
+
+    def __init__(self) -> None:
+        self._ranked = IndexableSkipList()
+        self._keys: dict[Hashable, tuple] = {}
+        self._entries: dict[Hashable, dict] = {}
+        self.updated_at = datetime.now(UTC)
+        self.version = next(_versions)
+        self.on_change: Callable[[], None] | None = None
+
+    def _touch(self) -> None:
+        self.updated_at = datetime.now(UTC)
+        self.version = next(_versions)
+        if self.on_change is not None:
+            self.on_change()
+
+    def __len__(self) -> int:
+        return len(self._ranked)
+
+    def upsert(self, entry: dict) -> None:
+        """Insert or update an entry; entries not shown on the leaderboard are removed."""
+        user_id = entry["user_id"]
+        merged = {**self._entries.get(user_id, {}), **entry}
+        if merged == self._entries.get(user_id):
+            return
+        if not merged.get("show_on_leaderboard", True):
+            self.remove(user_id)
+            return
+        key = _sort_key(merged)
+        old_key = self._keys.get(user_id)
+        if old_key is not None:
+            self._ranked.remove(old_key)
+        self._ranked.insert(key, merged)
+        self._keys[user_id] = key
+        self._entries[user_id] = merged
+        self._touch()
+
+    def remove(self, user_id: Hashable) -> None:
+        key = self._keys.pop(user_id, None)
+        if key is not None:
+            self._ranked.remove(key)
+            self._entries.pop(user_id, None)
+            self._touch()
+
+    def rank(self, user_id: Hashable) -> int | None:
+        """1-based rank, or None if the user is not on the leaderboard."""
+        key = self._keys.get(user_id)
+        return None if key is None else self._ranked.rank(key) + 1
+
+    def page(self, offset: int, limit: int) -> list[dict]:
+        return [
+            {**entry, "leaderboard_rank": offset + i + 1}
+            for i, entry in enumerate(self._ranked.slice(offset, limit))
+        ]
+
+    def position(self, user_id: Hashable) -> dict | None:
+        rank = self.rank(user_id)
+        if rank is None:
+            return None
+        return {**self._entries[user_id], "leaderboard_rank": rank}
+
+    def context(self, user_id: Hashable, size: int) -> dict | None:
+        rank = self.rank(user_id)
+        if rank is None:
+            return None
+        above_start = max(1, rank - size)
+        return {
+            "user_entry": {**self._entries[user_id], "leaderboard_rank": rank},
+            "entries_above": self.page(above_start - 1, rank - above_start),
+            "entries_below": self.page(rank, size),
+        }
+
+
+class LeaderboardIndex:
+    """Per-program leaderboards for this process."""
+
+    def __init__(self) -> None:
+        self._programs: dict[int, ProgramLeaderboard] = {}
+        self._listeners: list[Callable[[int], None]] = []
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call `listener(program_id)` whenever a loaded program's ranking changes."""
+        self._listeners.append(listener)
+
+    def _notify(self, program_id: int) -> None:
+        for listener in self._listeners:
+            listener(program_id)
+
+    def get(self, program_id: int) -> ProgramLeaderboard | None:
+        return self._programs.get(program_id)
+
+    def program_ids(self) -> list[int]:
+        return list(self._programs)
+
+    async def sync_progress(self, program_id: int, row: dict | None) -> None:
+        """Fold a freshly written winter_arc_user_progress row into a loaded program."""
+        board = self._programs.get(program_id)
+        if board is None or not row or "user_id" not in row:
+            return
+        user_id = row["user_id"]
+        if board.rank(user_id) is None and row.get("show_on_leaderboard"):
+            # New entrant: fetch the full view row so profile fields are present
+            await self.refresh_user(program_id, user_id)
+            return
+        board.upsert({"user_id": user_id, **{f: row[f] for f in SCORE_FIELDS if f in row}})
+
+    async def refresh_user(self, program_id: int, user_id: str) -> None:
+        """
+        Re-read one user's entry.
+
+        Score fields come from progress; profile fields come from the materialized
+        leaderboard, which may not list a user who just opted in until its next refresh.
+        """
+        board = self._programs.get(program_id)
+        if board is None or supabase is None:
+            return
+        progress_res = (
+            supabase.table("winter_arc_user_progress")
+            .select("user_id," + ",".join(SCORE_FIELDS))
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+            .limit(1)
+            .execute()
+        )
+        progress = (progress_res.data if hasattr(progress_res, "data") else progress_res) or []
+        if not progress or not progress[0].get("show_on_leaderboard"):
+            board.remove(user_id)
+            return
+        res = (
+            supabase.table(SOURCE_TABLE)
+            .select("*")
+            .eq("program_id", program_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        rows = (res.data if hasattr(res, "data") else res) or []
+        entry = {**(rows[0] if rows else {"program_id": program_id}), **progress[0]}
+        entry.pop("leaderboard_rank", None)
+        board.upsert(entry)
+
+    async def load(self, program_id: int) -> ProgramLeaderboard:
+        """(Re)build a program's leaderboard from the database, paging by user_id."""
+        board = ProgramLeaderboard()
+        last_user_id = None
+        while supabase is not None:
+            q = supabase.table(SOURCE_TABLE).select("*").eq("program_id", program_id)
+            if last_user_id is not None:
+                q = q.gt("user_id", last_user_id)
+            res = q.order("user_id", desc=False).limit(LOAD_PAGE_SIZE).execute()
+            rows = (res.data if hasattr(res, "data") else res) or []
+            for row in rows:
+                row.pop("leaderboard_rank", None)
+                board.upsert(row)
+            if len(rows) < LOAD_PAGE_SIZE:
+                break
+            last_user_id = rows[-1]["user_id"]
+        board.on_change = lambda: self._notify(program_id)
+        self._programs[program_id] = board
+        self._notify(program_id)
+        return board
+
+    async def load_all(self) -> None:
+        if supabase is None:
+            return
+        try:
+            res = supabase.table("programs").select("id").execute()
+            for program in (res.data if hasattr(res, "data") else res) or []:
+                board = await self.load(program["id"])
+                log.info("leaderboard_index_loaded", program_id=program["id"], entries=len(board))
+        except Exception as exc:
+            # Reads fall back to the database for programs that failed to load
+            log.warning("leaderboard_index_load_failed", error=str(exc))
+
+
+index = LeaderboardIndex()
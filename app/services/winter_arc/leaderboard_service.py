@@ -1,5 +1,49 @@
 """Winter Arc Leaderboard Service - Score calculation and rankings."""
+from collections import Counter
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+import orjson
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http_cache import etag_for
+from app.core.logging import get_logger
+from app.core.pagination import clamp_limit
 from app.infra.supabase.client import supabase
+from app.services.users import user_cards
+from app.services.winter_arc.leaderboard_index import index
+
+log = get_logger(__name__)
+
+LEADERBOARD_TABLE = "winter_arc_leaderboard_ranked"
+REFRESH_TABLE = "winter_arc_leaderboard_refresh"
+MAX_LEADERBOARD_PAGE = 100
+
+# Serialized public pages keyed by (program_id, version, offset, limit); version is the
+# in-process index version, or None for materialized-view reads (expired by TTL/refresh)
+_page_cache = TTLCache(ttl_seconds=settings.leaderboard_cache_seconds, max_entries=512)
+
+RECOMPUTE_PAGE_SIZE = 1000
+RECOMPUTE_WRITE_CHUNK = 500
+
+SCORE_INPUT_COLUMNS = (
+    "current_daily_streak",
+    "current_weekly_streak",
+    "total_days_completed",
+    "total_weeks_completed",
+)
+
+
+def compute_score(progress: dict, achievement_count: int) -> float:
+    """Apply the scoring formula to one progress row (see calculate_leaderboard_score)."""
+    score = 0.0
+    score += (progress.get("current_daily_streak") or 0) * 10
+    score += (progress.get("current_weekly_streak") or 0) * 50
+    score += (progress.get("total_days_completed") or 0) * 5
+    score += (progress.get("total_weeks_completed") or 0) * 25
+    score += achievement_count * 100
+    return score
 
 
 async def calculate_leaderboard_score(user_id: str, program_id: int) -> float:
@@ -44,35 +88,69 @@ async def calculate_leaderboard_score(user_id: str, program_id: int) -> float:
     )
     achievement_count = len(achievements_data) if achievements_data else 0
 
-    # Calculate score
-    score = 0.0
-    score += progress.get("current_daily_streak", 0) * 10
-    score += progress.get("current_weekly_streak", 0) * 50
-    score += progress.get("total_days_completed", 0) * 5
-    score += progress.get("total_weeks_completed", 0) * 25
-    score += achievement_count * 100
-
-    return score
+    return compute_score(progress, achievement_count)
 
 
 async def update_user_leaderboard_score(user_id: str, program_id: int):
-    """Recalculate and update user's leaderboard score."""
+    """
+    Recalculate and update user's leaderboard score if its inputs changed.
+
+    The write is a compare-and-set on `score_inputs_version` (see migration 0011):
+    if the inputs change again mid-recompute, the row stays dirty for the next run.
+    """
     if supabase is None:
         return None
 
-    score = await calculate_leaderboard_score(user_id, program_id)
+    progress_res = (
+        supabase.table("winter_arc_user_progress")
+        .select("*")
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .limit(1)
+        .execute()
+    )
+    progress_data = progress_res.data if hasattr(progress_res, "data") else progress_res
+    if not progress_data:
+        return None
+
+    progress = progress_data[0]
+    inputs_version = progress.get("score_inputs_version")
+    if inputs_version is not None and (progress.get("score_version") or 0) >= inputs_version:
+        return progress
+
+    achievements_res = (
+        supabase.table("winter_arc_user_achievements")
+        .select("id")
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .execute()
+    )
+    achievements_data = (
+        achievements_res.data if hasattr(achievements_res, "data") else achievements_res
+    )
+    score = compute_score(progress, len(achievements_data) if achievements_data else 0)
 
     # Update score in progress table
-    res = (
+    update = (
         supabase.table("winter_arc_user_progress")
-        .update({"leaderboard_score": score})
+        .update(
+            {"leaderboard_score": score}
+            if inputs_version is None
+            else {"leaderboard_score": score, "score_version": inputs_version}
+        )
         .eq("user_id", user_id)
         .eq("program_id", program_id)
-        .execute()
     )
+    if inputs_version is not None:
+        update = update.eq("score_inputs_version", inputs_version)
+    res = update.execute()
 
     result_data = res.data if hasattr(res, "data") else res
-    return result_data[0] if result_data else None
+    if not result_data:
+        # Inputs changed since the read: the row stays dirty for the next recompute
+        return None
+    await index.sync_progress(program_id, result_data[0])
+    return result_data[0]
 
 
 async def get_leaderboard(program_id: int, limit: int = 100, offset: int = 0):
@@ -80,19 +158,68 @@ async def get_leaderboard(program_id: int, limit: int = 100, offset: int = 0):
     Get the leaderboard for a program.
     Only includes users who have opted in (show_on_leaderboard = true).
     """
+    entries, _ = await get_leaderboard_page(program_id, limit, offset)
+    return entries
+
+
+async def get_leaderboard_page(
+    program_id: int, limit: int = 100, offset: int = 0
+) -> tuple[list[dict], str | None]:
+    """Leaderboard entries plus when the data they were ranked from was last refreshed."""
     if supabase is None:
-        return []
+        return [], None
 
+    # Ranks are a dense key, so an offset here is a bounded range read, not a scan
+    limit = clamp_limit(limit, maximum=MAX_LEADERBOARD_PAGE)
+    offset = max(0, offset)
+
+    board = index.get(program_id)
+    if board is not None:
+        entries = await user_cards.attach_user_cards(board.page(offset, limit))
+        return entries, board.updated_at.isoformat()
+
+    # Rank-range read on the materialized leaderboard's (program_id, rank) index
     res = (
-        supabase.table("winter_arc_leaderboard_view")
+        supabase.table(LEADERBOARD_TABLE)
         .select("*")
         .eq("program_id", program_id)
-        .eq("show_on_leaderboard", True)
+        .gte("leaderboard_rank", offset + 1)
+        .lte("leaderboard_rank", offset + limit)
         .order("leaderboard_rank", desc=False)
-        .range(offset, offset + limit - 1)
         .execute()
     )
-    return res.data if hasattr(res, "data") else res
+    entries = await user_cards.attach_user_cards((res.data if hasattr(res, "data") else res) or [])
+    return entries, await _last_refreshed_at() if entries else None
+
+
+async def _last_refreshed_at() -> str | None:
+    """When the materialized leaderboard was last refreshed (migration 0022)."""
+    res = supabase.table(REFRESH_TABLE).select("refreshed_at").limit(1).execute()
+    data = res.data if hasattr(res, "data") else res
+    return data[0].get("refreshed_at") if data else None
+
+
+async def get_cached_leaderboard_page(
+    program_id: int, limit: int = 100, offset: int = 0
+) -> dict:
+    """
+    Serialized leaderboard page for the public endpoint.
+
+    Returns `{"body": bytes, "etag": str, "refreshed_at": str | None}`. Pages are
+    rendered once per leaderboard version; the ETag is derived from the body so it is
+    stable across worker processes.
+    """
+    limit = clamp_limit(limit, maximum=MAX_LEADERBOARD_PAGE)
+    offset = max(0, offset)
+    board = index.get(program_id)
+    key = (program_id, board.version if board is not None else None, offset, limit)
+    page = _page_cache.get(key)
+    if page is None:
+        entries, refreshed_at = await get_leaderboard_page(program_id, limit, offset)
+        body = orjson.dumps(entries, default=str)
+        page = {"body": body, "etag": etag_for(body), "refreshed_at": refreshed_at}
+        _page_cache.set(key, page)
+    return page
 
 
 async def get_user_leaderboard_position(user_id: str, program_id: int):
@@ -100,15 +227,18 @@ async def get_user_leaderboard_position(user_id: str, program_id: int):
     if supabase is None:
         return None
 
-    # First update their score
-    await update_user_leaderboard_score(user_id, program_id)
+    board = index.get(program_id)
+    if board is not None:
+        # The board holds everyone the materialized view does (it is loaded from it), so
+        # users missing from it - hidden or not participating - need no database lookup
+        return board.position(user_id)
 
-    # Get their rank from the view
+    # Get their rank from the materialized leaderboard
     res = (
-        supabase.table("winter_arc_leaderboard_view")
+        supabase.table(LEADERBOARD_TABLE)
         .select("*")
-        .eq("user_id", user_id)
         .eq("program_id", program_id)
+        .eq("user_id", user_id)
         .limit(1)
         .execute()
     )
@@ -132,74 +262,171 @@ async def get_leaderboard_context(
     if not user_entry:
         return {"user_entry": None, "entries_above": [], "entries_below": []}
 
+    board = index.get(program_id)
+    if board is not None:
+        # Users hidden from the leaderboard have no neighbours in the index
+        context = board.context(user_id, context_size)
+        return await _context_with_cards(
+            context or {"user_entry": user_entry, "entries_above": [], "entries_below": []}
+        )
+
     user_rank = user_entry.get("leaderboard_rank")
     if user_rank is None:
-        return {"user_entry": user_entry, "entries_above": [], "entries_below": []}
-
-    # Get entries above (lower rank numbers)
-    above_start = max(1, user_rank - context_size)
-    above_end = user_rank - 1
-
-    entries_above = []
-    if above_end >= above_start:
-        res_above = (
-            supabase.table("winter_arc_leaderboard_view")
-            .select("*")
-            .eq("program_id", program_id)
-            .eq("show_on_leaderboard", True)
-            .gte("leaderboard_rank", above_start)
-            .lte("leaderboard_rank", above_end)
-            .order("leaderboard_rank", desc=False)
-            .execute()
+        return await _context_with_cards(
+            {"user_entry": user_entry, "entries_above": [], "entries_below": []}
         )
-        entries_above = (
-            res_above.data if hasattr(res_above, "data") else res_above
-        ) or []
 
-    # Get entries below (higher rank numbers)
-    below_start = user_rank + 1
-    below_end = user_rank + context_size
-
-    res_below = (
-        supabase.table("winter_arc_leaderboard_view")
+    # Entries above and below in one rank-range read
+    res = (
+        supabase.table(LEADERBOARD_TABLE)
         .select("*")
         .eq("program_id", program_id)
-        .eq("show_on_leaderboard", True)
-        .gte("leaderboard_rank", below_start)
-        .lte("leaderboard_rank", below_end)
+        .gte("leaderboard_rank", max(1, user_rank - context_size))
+        .lte("leaderboard_rank", user_rank + context_size)
         .order("leaderboard_rank", desc=False)
         .execute()
     )
-    entries_below = (res_below.data if hasattr(res_below, "data") else res_below) or []
+    entries = (res.data if hasattr(res, "data") else res) or []
+
+    return await _context_with_cards(
+        {
+            "user_entry": user_entry,
+            "entries_above": [e for e in entries if e["leaderboard_rank"] < user_rank],
+            "entries_below": [e for e in entries if e["leaderboard_rank"] > user_rank],
+        }
+    )
+
 
+async def _context_with_cards(context: dict) -> dict:
+    """Attach author cards to a context response with one batched lookup."""
+    above, below = context["entries_above"], context["entries_below"]
+    entries = await user_cards.attach_user_cards([context["user_entry"], *above, *below])
     return {
-        "user_entry": user_entry,
-        "entries_above": entries_above,
-        "entries_below": entries_below,
+        "user_entry": entries[0],
+        "entries_above": entries[1 : 1 + len(above)],
+        "entries_below": entries[1 + len(above) :],
     }
 
 
-async def update_all_leaderboard_scores(program_id: int):
+async def refresh_materialized_leaderboard(report: Callable[..., None] | None = None):
+    """
+    Refresh the materialized leaderboard (migrations 0012, 0022) and reload loaded program indexes.
+
+    Reloading also picks up score changes made by other worker processes.
+    """
+    if supabase is None:
+        return {"refreshed_at": None}
+
+    res = supabase.rpc("refresh_winter_arc_leaderboard", {}).execute()
+    refreshed_at = res.data if hasattr(res, "data") else res
+    _page_cache.clear()
+    if report:
+        report(phase="refreshed", refreshed_at=refreshed_at)
+    for program_id in index.program_ids():
+        await index.load(program_id)
+    return {"refreshed_at": refreshed_at}
+
+
+async def update_all_leaderboard_scores(
+    program_id: int, report: Callable[..., None] | None = None
+):
     """
     Recalculate scores for all users in a program.
     This can be run periodically or triggered manually.
+
+    Progress rows and achievement counts are read with two paginated set queries,
+    scores are computed in one pass, and only changed scores are written back
+    with chunked bulk upserts.
     """
     if supabase is None:
         return {"updated": 0}
 
-    # Get all users in the program
-    res = (
-        supabase.table("winter_arc_user_progress")
-        .select("user_id")
-        .eq("program_id", program_id)
-        .execute()
-    )
-    users = res.data if hasattr(res, "data") else res
+    report = report or (lambda **_: None)
 
-    updated_count = 0
-    for user in users:
-        user_id = user["user_id"]
-        await update_user_leaderboard_score(user_id, program_id)
-        updated_count += 1
+    progress_rows = await _page_rows(
+        "winter_arc_user_progress",
+        program_id,
+        "user_id",
+        ("user_id", "leaderboard_score", "score_inputs_version", "score_version",
+         *SCORE_INPUT_COLUMNS),
+    )
+    report(phase="loaded_progress", users=len(progress_rows))
 
-    return {"updated": updated_count}
+    achievement_rows = await _page_rows(
+        "winter_arc_user_achievements", program_id, "id", ("id", "user_id")
+    )
+    achievement_counts = Counter(row["user_id"] for row in achievement_rows)
+    report(phase="loaded_achievements", achievements=len(achievement_rows))
+
+    changed = []
+    for row in progress_rows:
+        score = compute_score(row, achievement_counts.get(row["user_id"], 0))
+        inputs_version = row.get("score_inputs_version") or 0
+        dirty = (row.get("score_version") or 0) < inputs_version
+        if dirty or float(row.get("leaderboard_score") or 0) != score:
+            # score_version is the inputs version read above; inputs changed since then
+            # bump score_inputs_version past it, so those rows stay dirty
+            changed.append(
+                {
+                    "user_id": row["user_id"],
+                    "program_id": program_id,
+                    "leaderboard_score": score,
+                    "score_version": inputs_version,
+                }
+            )
+
+    written = 0
+    for start in range(0, len(changed), RECOMPUTE_WRITE_CHUNK):
+        chunk = changed[start : start + RECOMPUTE_WRITE_CHUNK]
+        supabase.table("winter_arc_user_progress").upsert(
+            chunk, on_conflict="user_id,program_id"
+        ).execute()
+        written += len(chunk)
+        report(phase="writing", written=written, to_write=len(changed))
+
+    if changed:
+        await refresh_materialized_leaderboard()
+
+    return {"users": len(progress_rows), "updated": written}
+
+
+async def update_active_leaderboard_scores(report: Callable[..., None] | None = None):
+    """
+    Run `update_all_leaderboard_scores` for every active program (no `end_date`, or
+    one not yet passed). A program that fails is logged and the others still run.
+    """
+    if supabase is None:
+        return {"programs": {}}
+
+    report = report or (lambda **_: None)
+    now = datetime.now(UTC).isoformat()
+    res = supabase.table("programs").select("id").or_(f"end_date.is.null,end_date.gte.{now}").execute()
+    program_ids = [row["id"] for row in (res.data if hasattr(res, "data") else res) or []]
+
+    results = {}
+    for done, program_id in enumerate(program_ids, start=1):
+        try:
+            results[program_id] = await update_all_leaderboard_scores(program_id)
+        except Exception as exc:
+            log.warning("leaderboard_recompute_failed", program_id=program_id, error=str(exc))
+            results[program_id] = {"error": str(exc)}
+        report(phase="programs", done=done, programs=len(program_ids))
+    return {"programs": results}
+
+
+async def _page_rows(
+    table: str, program_id: int, key: str, columns: tuple[str, ...]
+) -> list[dict]:
+    """Read every row of a program from `table`, paging with a keyset cursor on `key`."""
+    rows: list[dict] = []
+    last = None
+    while True:
+        q = supabase.table(table).select(",".join(columns)).eq("program_id", program_id)
+        if last is not None:
+            q = q.gt(key, last)
+        res = q.order(key, desc=False).limit(RECOMPUTE_PAGE_SIZE).execute()
+        page = (res.data if hasattr(res, "data") else res) or []
+        rows.extend(page)
+        if len(page) < RECOMPUTE_PAGE_SIZE:
+            return rows
+        last = page[-1][key]
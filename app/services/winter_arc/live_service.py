@@ -0,0 +1,119 @@
+"""Winter Arc Live Service - Server-Sent Events for leaderboard, rank and progress changes.
+
+One in-process hub fans change notifications out to open streams:
+- ("leaderboard", program_id) fires when the program's ranking changes in this process
+- ("progress", user_id, program_id) fires when the user's side-effect pipeline finishes
+
+Each stream re-reads the latest state when woken and only sends what changed, so a slow
+client never builds a backlog (see `Subscription`).
+"""
+import asyncio
+from collections.abc import AsyncIterator, Hashable
+from typing import cast
+
+import orjson
+
+from app.core.config import settings
+from app.core.event_hub import EventHub
+from app.services.winter_arc import leaderboard_service, progress_service
+from app.services.winter_arc.leaderboard_index import index
+
+hub = EventHub(max_subscriptions=settings.live_max_connections)
+
+_UNSENT = object()
+
+# Fields of the subscriber's entry reported as deltas in `me` events
+DELTA_FIELDS = (
+    "leaderboard_rank",
+    "leaderboard_score",
+    "current_daily_streak",
+    "current_weekly_streak",
+    "total_days_completed",
+)
+
+
+def leaderboard_topic(program_id: int) -> tuple:
+    return ("leaderboard", program_id)
+
+
+def progress_topic(user_id: str, program_id: int) -> tuple:
+    return ("progress", user_id, program_id)
+
+
+def notify_progress(user_id: str, program_id: int) -> None:
+    hub.publish(progress_topic(user_id, program_id))
+
+
+index.add_listener(lambda program_id: hub.publish(leaderboard_topic(program_id)))
+
+
+def sse(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+def _me_event(entry: dict | None, previous: dict | None) -> dict:
+    entry = entry or {"leaderboard_rank": None}
+    deltas = {}
+    if previous:
+        for field in DELTA_FIELDS:
+            new, old = entry.get(field), previous.get(field)
+            if isinstance(new, (int, float)) and isinstance(old, (int, float)) and new != old:
+                deltas[field] = new - old
+    return {**entry, "deltas": deltas}
+
+
+async def leaderboard_stream(
+    user_id: str, program_id: int, top_n: int, is_disconnected=None
+) -> AsyncIterator[bytes]:
+    """
+    Yield SSE frames for one connection until the client disconnects.
+
+    Events: `leaderboard` (top-N page), `me` (own rank/score/streaks with deltas since
+    the last `me`) and `progress` (own progress row). A comment heartbeat is sent when
+    nothing changed for `live_heartbeat_seconds`.
+    """
+    lb_topic = leaderboard_topic(program_id)
+    user_topic = progress_topic(user_id, program_id)
+    sub = hub.subscribe(lb_topic, user_topic)
+    if sub is None:
+        yield sse("error", b'{"detail":"too_many_connections"}')
+        return
+
+    last_etag = None
+    last_me: object = _UNSENT
+    fired: set[Hashable] = {lb_topic, user_topic}
+    try:
+        while True:
+            if is_disconnected is not None and await is_disconnected():
+                return
+            # Heartbeats also re-check the leaderboard: programs served from the
+            # materialized view (no in-process index) have no change notifications
+            if lb_topic in fired or not fired:
+                page = await leaderboard_service.get_cached_leaderboard_page(
+                    program_id, top_n, 0
+                )
+                if page["etag"] != last_etag:
+                    last_etag = page["etag"]
+                    yield sse("leaderboard", page["body"])
+                me = await leaderboard_service.get_user_leaderboard_position(user_id, program_id)
+                if me != last_me:
+                    previous = None if last_me is _UNSENT else cast(dict | None, last_me)
+                    yield sse("me", orjson.dumps(_me_event(me, previous), default=str))
+                    last_me = me
+            if user_topic in fired:
+                progress = await progress_service.get_user_progress(user_id, program_id)
+                yield sse("progress", orjson.dumps(progress, default=str))
+
+            try:
+                async with asyncio.timeout(settings.live_heartbeat_seconds):
+                    fired = await sub.wait()
+            except TimeoutError:
+                fired = set()
+            if not fired:
+                yield b": heartbeat\n\n"
+                continue
+            # Coalesce bursts: changes during this pause are folded into one update
+            await asyncio.sleep(settings.live_min_interval_seconds)
+            fired |= sub.drain()
+    finally:
+        hub.unsubscribe(sub)
@@ -1,7 +1,15 @@
 """Winter Arc Progress Service - User progress tracking, snapshots, and macro calculations."""
+from collections.abc import Hashable
 from datetime import UTC, datetime
 
+from app.core.config import settings
+from app.core.counter_buffer import CounterBuffer
+from app.core.pagination import clamp_limit, keyset, split_page
 from app.infra.supabase.client import supabase
+from app.services.winter_arc import trends_service
+from app.services.winter_arc.leaderboard_index import index as leaderboard_index
+
+SNAPSHOTS_KEY = ("snapshot_date", "id")
 
 
 async def get_user_progress(user_id: str, program_id: int):
@@ -18,7 +26,16 @@ async def get_user_progress(user_id: str, program_id: int):
         .execute()
     )
     data = res.data if hasattr(res, "data") else res
-    return data[0] if data else None
+    progress = data[0] if data else None
+
+    # Read-your-writes: include timer increments that are still buffered
+    pending = timer_buffer.pending((user_id, program_id))
+    if progress and pending:
+        progress = {
+            **progress,
+            **{field: (progress.get(field) or 0) + delta for field, delta in pending.items()},
+        }
+    return progress
 
 
 async def create_or_update_progress(
@@ -96,38 +113,60 @@ async def create_or_update_progress(
 
 
 async def increment_timer_completions(user_id: str, program_id: int, minutes: int = 3):
-    """Increment timer completion count and total minutes."""
+    """
+    Increment timer completion count and total minutes.
+
+    Increments are buffered and written in batches (see `timer_buffer`); the response
+    acknowledges the increment with the counts still waiting to be written.
+    """
     if supabase is None:
         return None
 
-    # Ensure progress record exists
-    progress = await get_user_progress(user_id, program_id)
-    if not progress:
-        progress = await create_or_update_progress(user_id, program_id)
+    key = (user_id, program_id)
+    deltas = {"three_min_timer_completions": 1, "total_timer_minutes": minutes}
+    buffered = timer_buffer.add(key, **deltas)
+    if not buffered:
+        # Buffer not running (scripts, tests without lifespan): write through
+        await _flush_timer_stats({key: deltas})
+        await _after_timer_flush({key: deltas})
 
-    # Increment counters using SQL
-    res = (
-        supabase.rpc(
-            "increment_timer_stats",
-            {"p_user_id": user_id, "p_program_id": program_id, "p_minutes": minutes},
-        )
-        .execute()
-    )
+    return {
+        "user_id": user_id,
+        "program_id": program_id,
+        "buffered": buffered,
+        "pending": timer_buffer.pending(key),
+    }
+
+
+async def _flush_timer_stats(batch: dict[Hashable, dict[str, int]]) -> None:
+    """Apply a batch of timer increments with one atomic RPC call."""
+    rows = [
+        {
+            "user_id": user_id,
+            "program_id": program_id,
+            "three_min_timer_completions": counters.get("three_min_timer_completions", 0),
+            "total_timer_minutes": counters.get("total_timer_minutes", 0),
+        }
+        for (user_id, program_id), counters in batch.items()
+    ]
+    supabase.rpc("increment_timer_stats_batch", {"p_rows": rows}).execute()
 
-    # If RPC doesn't exist, fallback to manual update
-    if not res or (hasattr(res, "data") and not res.data):
-        current_completions = progress.get("three_min_timer_completions", 0)
-        current_minutes = progress.get("total_timer_minutes", 0)
-        return await create_or_update_progress(
-            user_id,
-            program_id,
-            **{
-                "three_min_timer_completions": current_completions + 1,
-                "total_timer_minutes": current_minutes + minutes,
-            },
-        )
 
-    return res.data if hasattr(res, "data") else res
+async def _after_timer_flush(batch: dict[Hashable, dict[str, int]]) -> None:
+    """Evaluate timer achievements once per flushed user."""
+    # Imported here: side_effects depends on this module through suggestions_service
+    from app.services.winter_arc import side_effects
+
+    for user_id, program_id in batch:
+        await side_effects.schedule_side_effects(user_id, program_id, "timer")
+
+
+timer_buffer = CounterBuffer(
+    _flush_timer_stats,
+    name="timer_stats",
+    interval_seconds=settings.timer_flush_seconds,
+    after_flush=_after_timer_flush,
+)
 
 
 async def create_progress_snapshot(
@@ -147,31 +186,47 @@ async def create_progress_snapshot(
         data["notes"] = notes
 
     res = supabase.table("winter_arc_progress_snapshots").insert(data).execute()
+    trends_service.invalidate_user_trends(user_id)
+
+    # The first snapshot's weight is the baseline for weight-progress suggestions;
+    # current_weight_kg stays with create_or_update_progress
+    (
+        supabase.table("winter_arc_user_progress")
+        .update({"baseline_weight_kg": weight_kg})
+        .eq("user_id", user_id)
+        .eq("program_id", program_id)
+        .is_("baseline_weight_kg", "null")
+        .execute()
+    )
+
     result_data = res.data if hasattr(res, "data") else res
     return result_data[0] if result_data else None
 
 
-async def get_progress_snapshots(user_id: str, program_id: int, limit: int = 50):
-    """Get user's progress snapshots ordered by date."""
+async def get_progress_snapshots(
+    user_id: str, program_id: int, limit: int | None = None, cursor: str | None = None
+):
+    """Get user's progress snapshots, newest first. Returns `(snapshots, next_cursor)`."""
     if supabase is None:
-        return []
+        return [], None
 
-    res = (
+    limit = clamp_limit(limit)
+    q = (
         supabase.table("winter_arc_progress_snapshots")
         .select("*")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
-        .order("snapshot_date", desc=True)
-        .limit(limit)
-        .execute()
     )
-    return res.data if hasattr(res, "data") else res
+    res = keyset(q, cursor, SNAPSHOTS_KEY, limit).execute()
+    return split_page(res.data if hasattr(res, "data") else res, limit, SNAPSHOTS_KEY)
 
 
 async def update_leaderboard_visibility(
     user_id: str, program_id: int, show_on_leaderboard: bool
 ):
     """Update user's leaderboard visibility preference."""
-    return await create_or_update_progress(
+    progress = await create_or_update_progress(
         user_id, program_id, show_on_leaderboard=show_on_leaderboard
     )
+    await leaderboard_index.refresh_user(program_id, user_id)
+    return progress
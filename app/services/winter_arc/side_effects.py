@@ -0,0 +1,53 @@
+"""Winter Arc Side Effects - Background evaluation of suggestions, achievements, and score."""
+from collections.abc import Hashable
+from typing import cast
+
+from app.core.config import settings
+from app.core.work_queue import CoalescingWorkQueue
+from app.services.winter_arc import (
+    achievements_service,
+    leaderboard_service,
+    live_service,
+    suggestions_service,
+)
+
+
+async def run_side_effects(user_id: str, program_id: int, reasons: set[str] | None = None):
+    """
+    Run the post-update pipeline for one user/program.
+
+    Achievements run first so newly unlocked ones feed the suggestion rules; `reasons`
+    limits suggestions to the rules the triggering changes can affect.
+    """
+    new_achievements = await achievements_service.check_and_unlock_achievements(
+        user_id, program_id
+    )
+    await suggestions_service.check_and_trigger_suggestions(
+        user_id, program_id, reasons, new_achievements
+    )
+    await leaderboard_service.update_user_leaderboard_score(user_id, program_id)
+    live_service.notify_progress(user_id, program_id)
+
+
+async def _handle(key: Hashable, reasons: set[str]) -> None:
+    user_id, program_id = cast(tuple[str, int], key)
+    await run_side_effects(user_id, program_id, reasons)
+
+
+queue = CoalescingWorkQueue(
+    _handle,
+    name="winter_arc_side_effects",
+    workers=settings.side_effects_workers,
+    debounce_seconds=settings.side_effects_debounce_seconds,
+    max_retries=settings.side_effects_max_retries,
+)
+
+
+async def schedule_side_effects(user_id: str, program_id: int, reason: str):
+    """
+    Queue the side-effect pipeline for a user/program.
+
+    Runs inline when the background queue is not running (scripts, tests without lifespan).
+    """
+    if not queue.submit((user_id, program_id), reason):
+        await run_side_effects(user_id, program_id, {reason})
@@ -1,7 +1,16 @@
 """Winter Arc Post Suggestions Service - Trigger logic for community engagement prompts."""
 from datetime import UTC, datetime
 
+from app.core.cache import TTLCache
+from app.core.pagination import clamp_limit, keyset, split_page
 from app.infra.supabase.client import supabase
+from app.services.winter_arc import achievements_service, progress_service
+
+# Suggestion types already created per (user_id, program_id); the unique key in the
+# database stays authoritative, this only skips writes that would be no-ops
+_suggested_cache = TTLCache(ttl_seconds=600, max_entries=10_000)
+
+SUGGESTIONS_KEY = ("triggered_at", "id")
 
 
 async def create_suggestion(
@@ -12,45 +21,36 @@ async def create_suggestion(
     message: str,
     metadata: dict | None = None,
 ):
-    """Create a new post suggestion for a user."""
+    """Create a new post suggestion for a user (idempotent per suggestion_type)."""
     if supabase is None:
         return None
 
-    data = {
-        "user_id": user_id,
-        "program_id": program_id,
-        "suggestion_type": suggestion_type,
-        "title": title,
-        "message": message,
-        "triggered_at": datetime.now(UTC).isoformat(),
-        "is_dismissed": False,
-        "is_posted": False,
-    }
-
+    suggestion = {"suggestion_type": suggestion_type, "title": title, "message": message}
     if metadata:
-        data["metadata"] = metadata
+        suggestion["metadata"] = metadata
 
-    res = supabase.table("winter_arc_post_suggestions").insert(data).execute()
-    result_data = res.data if hasattr(res, "data") else res
-    return result_data[0] if result_data else None
+    created = await create_suggestions(user_id, program_id, [suggestion])
+    return created[0] if created else None
 
 
-async def get_active_suggestions(user_id: str, program_id: int):
-    """Get all active (not dismissed, not posted) suggestions for a user."""
+async def get_active_suggestions(
+    user_id: str, program_id: int, cursor: str | None = None, limit: int | None = None
+):
+    """Get active (not dismissed, not posted) suggestions, newest first. Returns `(suggestions, next_cursor)`."""
     if supabase is None:
-        return []
+        return [], None
 
-    res = (
+    limit = clamp_limit(limit)
+    q = (
         supabase.table("winter_arc_post_suggestions")
         .select("*")
         .eq("user_id", user_id)
         .eq("program_id", program_id)
         .eq("is_dismissed", False)
         .eq("is_posted", False)
-        .order("triggered_at", desc=True)
-        .execute()
     )
-    return res.data if hasattr(res, "data") else res
+    res = keyset(q, cursor, SUGGESTIONS_KEY, limit).execute()
+    return split_page(res.data if hasattr(res, "data") else res, limit, SUGGESTIONS_KEY)
 
 
 async def dismiss_suggestion(suggestion_id: int):
@@ -83,161 +83,195 @@ async def mark_suggestion_posted(suggestion_id: int):
     return result_data[0] if result_data else None
 
 
-async def check_and_trigger_suggestions(user_id: str, program_id: int):
+# (progress field, threshold, suggestion_type, title, message, metadata)
+STREAK_MILESTONES = (
+    (
+        "current_daily_streak",
+        7,
+        "streak_7",
+        "7-Day Streak!",
+        "You've completed 7 days in a row! Share your progress and inspire others in the community.",
+        {"streak_days": 7},
+    ),
+    (
+        "current_daily_streak",
+        14,
+        "streak_14",
+        "2-Week Warrior!",
+        "14 days of consistency! Your discipline is showing. Share what's working for you.",
+        {"streak_days": 14},
+    ),
+    (
+        "current_daily_streak",
+        30,
+        "streak_30",
+        "30-Day Champion!",
+        "A full month of dedication! Share your transformation story with the community.",
+        {"streak_days": 30},
+    ),
+    (
+        "current_weekly_streak",
+        4,
+        "weekly_streak_4",
+        "Monthly Momentum!",
+        "4 perfect weeks! You're in the zone. Share your weekly routine with others.",
+        {"streak_weeks": 4},
+    ),
+)
+
+# Side-effect reasons (see side_effects.py) that can move each kind of rule
+STREAK_REASONS = {"daily_checklist", "weekly_checklist", "checklist_sync"}
+WEIGHT_REASONS = {"snapshot", "progress"}
+
+
+async def get_suggested_types(user_id: str, program_id: int) -> set[str]:
+    """Every suggestion type ever created for the user, including dismissed and posted."""
+    key = (user_id, program_id)
+    types = _suggested_cache.get(key)
+    if types is None:
+        res = (
+            supabase.table("winter_arc_post_suggestions")
+            .select("suggestion_type")
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+            .execute()
+        )
+        rows = (res.data if hasattr(res, "data") else res) or []
+        types = {row["suggestion_type"] for row in rows}
+        _suggested_cache.set(key, types)
+    return types
+
+
+async def create_suggestions(user_id: str, program_id: int, suggestions: list[dict]):
     """
-    Check user's progress and trigger appropriate post suggestions.
+    Insert several suggestions in one idempotent batch.
 
-    Suggestion types:
-    - milestone_streak: Daily/weekly streak milestones (7, 14, 30 days)
-    - achievement_unlocked: New achievement earned
-    - weight_progress: Significant weight change (5% or more)
-    - weekly_completion: Completed all weekly tasks
-    - perfect_week: 7 days completed in a row
+    Conflicts on the unique (user_id, program_id, suggestion_type) key are ignored, so
+    only newly created suggestions are returned.
     """
-    if supabase is None:
+    if supabase is None or not suggestions:
         return []
 
-    # Get user progress
-    progress_res = (
-        supabase.table("winter_arc_user_progress")
-        .select("*")
-        .eq("user_id", user_id)
-        .eq("program_id", program_id)
-        .limit(1)
+    triggered_at = datetime.now(UTC).isoformat()
+    rows = [
+        {
+            "user_id": user_id,
+            "program_id": program_id,
+            "triggered_at": triggered_at,
+            "is_dismissed": False,
+            "is_posted": False,
+            "metadata": {},  # every row of a bulk insert needs the same columns
+            **suggestion,
+        }
+        for suggestion in suggestions
+    ]
+    res = (
+        supabase.table("winter_arc_post_suggestions")
+        .upsert(rows, on_conflict="user_id,program_id,suggestion_type", ignore_duplicates=True)
         .execute()
     )
-    progress_data = progress_res.data if hasattr(progress_res, "data") else progress_res
-    if not progress_data:
+    _suggested_cache.get((user_id, program_id), set()).update(
+        row["suggestion_type"] for row in rows
+    )
+    return (res.data if hasattr(res, "data") else res) or []
+
+
+async def check_and_trigger_suggestions(
+    user_id: str,
+    program_id: int,
+    reasons: set[str] | None = None,
+    new_achievements: list[dict] | None = None,
+):
+    """
+    Evaluate the post suggestion rules affected by what changed.
+
+    Suggestion types:
+    - streak_7 / streak_14 / streak_30 / weekly_streak_4: streak milestones
+      (checklist reasons); only the highest milestone reached in each series is suggested
+    - weight_milestone_5: 5% or more weight change from the baseline (snapshot and
+      progress reasons)
+    - achievement_<code>: one per achievement in `new_achievements`
+
+    `reasons=None` (manual check) evaluates the streak and weight rules.
+    Each suggestion type is created at most once per user and program.
+    """
+    if supabase is None:
         return []
 
-    progress = progress_data[0]
+    check_streaks = reasons is None or bool(reasons & STREAK_REASONS)
+    check_weight = reasons is None or bool(reasons & WEIGHT_REASONS)
+    if not (check_streaks or check_weight or new_achievements):
+        return []
 
-    # Get existing suggestions to avoid duplicates
-    existing = await get_active_suggestions(user_id, program_id)
-    existing_types = {s["suggestion_type"] for s in existing}
+    suggested = await get_suggested_types(user_id, program_id)
+    candidates: list[dict] = []
 
-    triggered = []
+    if check_streaks or check_weight:
+        progress = await progress_service.get_user_progress(user_id, program_id)
+        if progress:
+            if check_streaks:
+                candidates += _streak_suggestions(progress)
+            if check_weight:
+                candidates += _weight_suggestions(progress)
 
-    # Check for streak milestones
-    daily_streak = progress.get("current_daily_streak", 0)
-    if daily_streak == 7 and "streak_7" not in existing_types:
-        suggestion = await create_suggestion(
-            user_id,
-            program_id,
-            "streak_7",
-            "7-Day Streak!",
-            "You've completed 7 days in a row! Share your progress and inspire others in the community.",
-            {"streak_days": 7},
-        )
-        if suggestion:
-            triggered.append(suggestion)
-
-    if daily_streak == 14 and "streak_14" not in existing_types:
-        suggestion = await create_suggestion(
-            user_id,
-            program_id,
-            "streak_14",
-            "2-Week Warrior!",
-            "14 days of consistency! Your discipline is showing. Share what's working for you.",
-            {"streak_days": 14},
-        )
-        if suggestion:
-            triggered.append(suggestion)
-
-    if daily_streak == 30 and "streak_30" not in existing_types:
-        suggestion = await create_suggestion(
-            user_id,
-            program_id,
-            "streak_30",
-            "30-Day Champion!",
-            "A full month of dedication! Share your transformation story with the community.",
-            {"streak_days": 30},
-        )
-        if suggestion:
-            triggered.append(suggestion)
-
-    # Check for weekly streak milestones
-    weekly_streak = progress.get("current_weekly_streak", 0)
-    if weekly_streak == 4 and "weekly_streak_4" not in existing_types:
-        suggestion = await create_suggestion(
-            user_id,
-            program_id,
-            "weekly_streak_4",
-            "Monthly Momentum!",
-            "4 perfect weeks! You're in the zone. Share your weekly routine with others.",
-            {"streak_weeks": 4},
-        )
-        if suggestion:
-            triggered.append(suggestion)
+    if new_achievements:
+        candidates += await _achievement_suggestions(new_achievements)
 
-    # Check for weight progress (if tracked)
-    current_weight = progress.get("current_weight_kg")
-    if current_weight:
-        # Get first snapshot to compare
-        snapshots_res = (
-            supabase.table("winter_arc_progress_snapshots")
-            .select("weight_kg")
-            .eq("user_id", user_id)
-            .eq("program_id", program_id)
-            .order("snapshot_date", desc=False)
-            .limit(1)
-            .execute()
-        )
-        snapshots = (
-            snapshots_res.data if hasattr(snapshots_res, "data") else snapshots_res
-        )
+    new = [c for c in candidates if c["suggestion_type"] not in suggested]
+    return await create_suggestions(user_id, program_id, new)
 
-        if snapshots and len(snapshots) > 0:
-            first_weight = snapshots[0]["weight_kg"]
-            weight_change_pct = abs(
-                (current_weight - first_weight) / first_weight * 100
-            )
-
-            if weight_change_pct >= 5 and "weight_milestone_5" not in existing_types:
-                suggestion = await create_suggestion(
-                    user_id,
-                    program_id,
-                    "weight_milestone_5",
-                    "Major Progress!",
-                    f"You've achieved a {weight_change_pct:.1f}% change! Share your journey with the community.",
-                    {
-                        "weight_change_pct": round(weight_change_pct, 1),
-                        "first_weight": first_weight,
-                        "current_weight": current_weight,
-                    },
-                )
-                if suggestion:
-                    triggered.append(suggestion)
-
-    # Check for achievement unlocks (recent)
-    achievements_res = (
-        supabase.table("winter_arc_user_achievements")
-        .select("achievement:achievement_id(*)")
-        .eq("user_id", user_id)
-        .eq("program_id", program_id)
-        .order("unlocked_at", desc=True)
-        .limit(1)
-        .execute()
-    )
-    recent_achievements = (
-        achievements_res.data if hasattr(achievements_res, "data") else achievements_res
-    )
 
-    if recent_achievements and len(recent_achievements) > 0:
-        achievement = recent_achievements[0].get("achievement", {})
+def _streak_suggestions(progress: dict) -> list[dict]:
+    reached: dict[str, tuple] = {}
+    for milestone in STREAK_MILESTONES:
+        field, threshold = milestone[0], milestone[1]
+        if (progress.get(field) or 0) >= threshold:
+            reached[field] = milestone  # milestones are listed in ascending order
+    return [
+        {"suggestion_type": kind, "title": title, "message": message, "metadata": metadata}
+        for _, _, kind, title, message, metadata in reached.values()
+    ]
+
+
+def _weight_suggestions(progress: dict) -> list[dict]:
+    current_weight = progress.get("current_weight_kg")
+    first_weight = progress.get("baseline_weight_kg")
+    if not current_weight or not first_weight:
+        return []
+
+    current_weight, first_weight = float(current_weight), float(first_weight)
+    weight_change_pct = abs((current_weight - first_weight) / first_weight * 100)
+    if weight_change_pct < 5:
+        return []
+    return [
+        {
+            "suggestion_type": "weight_milestone_5",
+            "title": "Major Progress!",
+            "message": f"You've achieved a {weight_change_pct:.1f}% change! Share your journey with the community.",
+            "metadata": {
+                "weight_change_pct": round(weight_change_pct, 1),
+                "first_weight": first_weight,
+                "current_weight": current_weight,
+            },
+        }
+    ]
+
+
+async def _achievement_suggestions(new_achievements: list[dict]) -> list[dict]:
+    rule_set = await achievements_service.get_rule_set()
+    catalog = {rule.achievement_id: rule.achievement for rule in rule_set.rules}
+    suggestions = []
+    for unlocked in new_achievements:
+        achievement = catalog.get(unlocked.get("achievement_id")) or {}
         achievement_code = achievement.get("code")
-        suggestion_type = f"achievement_{achievement_code}"
-
-        if suggestion_type not in existing_types:
-            suggestion = await create_suggestion(
-                user_id,
-                program_id,
-                suggestion_type,
-                f"Achievement Unlocked: {achievement.get('name', 'Achievement')}",
-                f"You just earned {achievement.get('name')}! Share your accomplishment.",
-                {"achievement_code": achievement_code},
-            )
-            if suggestion:
-                triggered.append(suggestion)
-
-    return triggered
+        if not achievement_code:
+            continue
+        suggestions.append(
+            {
+                "suggestion_type": f"achievement_{achievement_code}",
+                "title": f"Achievement Unlocked: {achievement.get('name', 'Achievement')}",
+                "message": f"You just earned {achievement.get('name')}! Share your accomplishment.",
+                "metadata": {"achievement_code": achievement_code},
+            }
+        )
+    return suggestions
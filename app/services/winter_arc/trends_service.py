@@ -0,0 +1,144 @@
+"""Winter Arc Trends Service - Server-side trend analytics for weight and body metrics.
+
+Combines `winter_arc_progress_snapshots` (program weight) and `user_metrics` (weight,
+body fat) into fixed-size summaries: rolling averages, a least-squares slope per week,
+a projection to the program's end date, and capped daily/weekly series.
+"""
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from statistics import StatisticsError, fmean, linear_regression
+
+from app.core.cache import TTLCache
+from app.infra.supabase.client import supabase
+
+DAILY_POINTS = 28  # last 4 weeks, one point per day with data
+WEEKLY_POINTS = 26  # last ~6 months, one point per ISO week with data
+REGRESSION_DAYS = 56  # slope is fitted on the most recent 8 weeks
+
+# Trends per (user_id, program_id), dropped when a snapshot or metric is written
+_trends_cache = TTLCache(ttl_seconds=24 * 3600, max_entries=10_000)
+
+
+def invalidate_user_trends(user_id: str) -> None:
+    _trends_cache.invalidate_where(lambda key: key[0] == user_id)
+
+
+async def get_trends(user_id: str, program_id: int) -> dict:
+    """Trend summary for weight and body fat; the payload size does not grow with history."""
+    key = (user_id, program_id)
+    trends = _trends_cache.get(key)
+    if trends is None:
+        trends = await _compute_trends(user_id, program_id)
+        _trends_cache.set(key, trends)
+    return trends
+
+
+async def _compute_trends(user_id: str, program_id: int) -> dict:
+    weight: dict[date, list[float]] = defaultdict(list)
+    body_fat: dict[date, list[float]] = defaultdict(list)
+    end_date = None
+
+    if supabase is not None:
+        snapshots_res = (
+            supabase.table("winter_arc_progress_snapshots")
+            .select("snapshot_date,weight_kg")
+            .eq("user_id", user_id)
+            .eq("program_id", program_id)
+            .order("snapshot_date", desc=False)
+            .execute()
+        )
+        for row in (snapshots_res.data if hasattr(snapshots_res, "data") else snapshots_res) or []:
+            if row.get("weight_kg") is not None:
+                weight[_as_date(row["snapshot_date"])].append(float(row["weight_kg"]))
+
+        metrics_res = (
+            supabase.table("user_metrics")
+            .select("date,weight,body_fat")
+            .eq("user_id", user_id)
+            .order("date", desc=False)
+            .execute()
+        )
+        for row in (metrics_res.data if hasattr(metrics_res, "data") else metrics_res) or []:
+            day = _as_date(row["date"])
+            if row.get("weight") is not None:
+                weight[day].append(float(row["weight"]))
+            if row.get("body_fat") is not None:
+                body_fat[day].append(float(row["body_fat"]))
+
+        program_res = (
+            supabase.table("programs").select("end_date").eq("id", program_id).limit(1).execute()
+        )
+        program = (program_res.data if hasattr(program_res, "data") else program_res) or []
+        if program and program[0].get("end_date"):
+            end_date = _as_date(program[0]["end_date"])
+
+    return {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "program_end_date": end_date.isoformat() if end_date else None,
+        "weight_kg": summarize_series(_daily_means(weight), end_date),
+        "body_fat_pct": summarize_series(_daily_means(body_fat), end_date),
+    }
+
+
+def summarize_series(points: list[tuple[date, float]], end_date: date | None = None) -> dict:
+    """Fixed-size summary of a date-ordered daily series."""
+    if not points:
+        return {"count": 0}
+
+    days = [d for d, _ in points]
+    values = [v for _, v in points]
+    latest_day = days[-1]
+    summary = {
+        "count": len(points),
+        "first": {"date": days[0].isoformat(), "value": values[0]},
+        "latest": {"date": latest_day.isoformat(), "value": values[-1]},
+        "min": min(values),
+        "max": max(values),
+        "change": round(values[-1] - values[0], 2),
+        "avg_7d": _window_mean(points, latest_day, 7),
+        "avg_28d": _window_mean(points, latest_day, 28),
+        "slope_per_week": None,
+        "projected_end_value": None,
+        "daily": [{"date": d.isoformat(), "value": round(v, 2)} for d, v in points[-DAILY_POINTS:]],
+        "weekly": _weekly_buckets(points)[-WEEKLY_POINTS:],
+    }
+
+    recent = [(d, v) for d, v in points if (latest_day - d).days < REGRESSION_DAYS]
+    try:
+        slope, intercept = linear_regression(
+            [(d - latest_day).days for d, _ in recent], [v for _, v in recent]
+        )
+    except StatisticsError:  # fewer than two distinct days
+        return summary
+
+    summary["slope_per_week"] = round(slope * 7, 3)
+    if end_date and end_date > latest_day:
+        summary["projected_end_value"] = round(intercept + slope * (end_date - latest_day).days, 2)
+    return summary
+
+
+def _daily_means(by_day: dict[date, list[float]]) -> list[tuple[date, float]]:
+    return [(day, fmean(values)) for day, values in sorted(by_day.items())]
+
+
+def _window_mean(points: list[tuple[date, float]], latest_day: date, days: int) -> float:
+    start = latest_day - timedelta(days=days - 1)
+    return round(fmean(v for d, v in points if d >= start), 2)
+
+
+def _weekly_buckets(points: list[tuple[date, float]]) -> list[dict]:
+    buckets: dict[date, list[float]] = defaultdict(list)
+    for d, v in points:
+        buckets[d - timedelta(days=d.weekday())].append(v)
+    return [
+        {"week_start": week.isoformat(), "value": round(fmean(values), 2), "samples": len(values)}
+        for week, values in sorted(buckets.items())
+    ]
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
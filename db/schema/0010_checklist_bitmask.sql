@@ -0,0 +1,211 @@
+-- Migration 0010: Bitmask storage for Winter Arc checklists
+-- Packs the 10 daily / 8 weekly checklist booleans into one integer column (items_mask).
+-- Completion columns become generated columns derived from the mask, replacing the
+-- CASE-summing triggers from 0008.
+--
+-- Rollout:
+--   Phase 1 (this file): add items_mask, backfill, keep booleans in sync both ways so
+--                        instances running CHECKLIST_STORAGE_MODE=columns keep working.
+--   Phase 2 (bottom, commented): once every instance runs CHECKLIST_STORAGE_MODE=bitmask,
+--                        drop the boolean columns and the sync triggers.
+--
+-- Bit order matches app/services/winter_arc/checklist_service.py (DAILY_ITEMS / WEEKLY_ITEMS).
+
+-- ============================================================================
+-- 1. DAILY CHECKLISTS
+-- ============================================================================
+
+ALTER TABLE winter_arc_daily_checklists
+  ADD COLUMN IF NOT EXISTS items_mask SMALLINT NOT NULL DEFAULT 0
+  CHECK (items_mask >= 0 AND items_mask < 1024);
+
+CREATE OR REPLACE FUNCTION daily_checklist_bool_mask(r winter_arc_daily_checklists)
+RETURNS SMALLINT AS $$
+  SELECT (
+    (CASE WHEN r.wake_up_early THEN 1 ELSE 0 END) |
+    (CASE WHEN r.ten_min_silence THEN 2 ELSE 0 END) |
+    (CASE WHEN r.morning_hydration THEN 4 ELSE 0 END) |
+    (CASE WHEN r.workout THEN 8 ELSE 0 END) |
+    (CASE WHEN r.clean_eating THEN 16 ELSE 0 END) |
+    (CASE WHEN r.review_mission THEN 32 ELSE 0 END) |
+    (CASE WHEN r.small_sacrifice THEN 64 ELSE 0 END) |
+    (CASE WHEN r.moment_silence THEN 128 ELSE 0 END) |
+    (CASE WHEN r.act_of_honor THEN 256 ELSE 0 END) |
+    (CASE WHEN r.small_overcoming THEN 512 ELSE 0 END)
+  )::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE winter_arc_daily_checklists d
+SET items_mask = daily_checklist_bool_mask(d)
+WHERE items_mask = 0;
+
+-- Keep booleans and mask in sync while both representations exist
+CREATE OR REPLACE FUNCTION sync_daily_checklist_mask()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    NEW.items_mask := NEW.items_mask | daily_checklist_bool_mask(NEW);
+  ELSIF NEW.items_mask IS NOT DISTINCT FROM OLD.items_mask THEN
+    NEW.items_mask := daily_checklist_bool_mask(NEW);
+  END IF;
+
+  NEW.wake_up_early := (NEW.items_mask & 1) <> 0;
+  NEW.ten_min_silence := (NEW.items_mask & 2) <> 0;
+  NEW.morning_hydration := (NEW.items_mask & 4) <> 0;
+  NEW.workout := (NEW.items_mask & 8) <> 0;
+  NEW.clean_eating := (NEW.items_mask & 16) <> 0;
+  NEW.review_mission := (NEW.items_mask & 32) <> 0;
+  NEW.small_sacrifice := (NEW.items_mask & 64) <> 0;
+  NEW.moment_silence := (NEW.items_mask & 128) <> 0;
+  NEW.act_of_honor := (NEW.items_mask & 256) <> 0;
+  NEW.small_overcoming := (NEW.items_mask & 512) <> 0;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS calculate_daily_completion_trigger ON winter_arc_daily_checklists;
+DROP TRIGGER IF EXISTS sync_daily_checklist_mask_trigger ON winter_arc_daily_checklists;
+CREATE TRIGGER sync_daily_checklist_mask_trigger
+  BEFORE INSERT OR UPDATE ON winter_arc_daily_checklists
+  FOR EACH ROW
+  EXECUTE FUNCTION sync_daily_checklist_mask();
+
+-- Completion columns derived from the mask
+ALTER TABLE winter_arc_daily_checklists
+  DROP COLUMN IF EXISTS items_completed,
+  DROP COLUMN IF EXISTS completion_percentage,
+  DROP COLUMN IF EXISTS is_fully_completed;
+
+ALTER TABLE winter_arc_daily_checklists
+  ADD COLUMN items_completed SMALLINT
+    GENERATED ALWAYS AS (bit_count(items_mask::INTEGER::bit(10))::SMALLINT) STORED,
+  ADD COLUMN completion_percentage NUMERIC(5,2)
+    GENERATED ALWAYS AS (bit_count(items_mask::INTEGER::bit(10)) * 10.0) STORED,
+  ADD COLUMN is_fully_completed BOOLEAN
+    GENERATED ALWAYS AS (items_mask = 1023) STORED;
+
+-- Streak scans only read completed days
+CREATE INDEX IF NOT EXISTS idx_daily_checklist_completed
+  ON winter_arc_daily_checklists(user_id, program_id, checklist_date DESC)
+  WHERE is_fully_completed;
+
+-- Atomic partial update: set/clear bits without a read-modify-write round trip
+CREATE OR REPLACE FUNCTION apply_daily_checklist_mask(
+  p_user_id UUID, p_program_id BIGINT, p_date DATE, p_set INTEGER, p_clear INTEGER
+)
+RETURNS SETOF winter_arc_daily_checklists AS $$
+  INSERT INTO winter_arc_daily_checklists AS d (user_id, program_id, checklist_date, items_mask)
+  VALUES (p_user_id, p_program_id, p_date, p_set::SMALLINT)
+  ON CONFLICT (user_id, program_id, checklist_date)
+  DO UPDATE SET items_mask = ((d.items_mask & ~p_clear) | p_set)::SMALLINT
+  RETURNING *;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- 2. WEEKLY CHECKLISTS
+-- ============================================================================
+
+ALTER TABLE winter_arc_weekly_checklists
+  ADD COLUMN IF NOT EXISTS items_mask SMALLINT NOT NULL DEFAULT 0
+  CHECK (items_mask >= 0 AND items_mask < 256);
+
+CREATE OR REPLACE FUNCTION weekly_checklist_bool_mask(r winter_arc_weekly_checklists)
+RETURNS SMALLINT AS $$
+  SELECT (
+    (CASE WHEN r.strength_workouts_3_4 THEN 1 ELSE 0 END) |
+    (CASE WHEN r.cardio_sessions_2_3 THEN 2 ELSE 0 END) |
+    (CASE WHEN r.meal_prep THEN 4 ELSE 0 END) |
+    (CASE WHEN r.progress_review THEN 8 ELSE 0 END) |
+    (CASE WHEN r.plan_adjustment THEN 16 ELSE 0 END) |
+    (CASE WHEN r.monk_mode_period THEN 32 ELSE 0 END) |
+    (CASE WHEN r.reflection_on_principles THEN 64 ELSE 0 END) |
+    (CASE WHEN r.planning_next_week THEN 128 ELSE 0 END)
+  )::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+UPDATE winter_arc_weekly_checklists w
+SET items_mask = weekly_checklist_bool_mask(w)
+WHERE items_mask = 0;
+
+CREATE OR REPLACE FUNCTION sync_weekly_checklist_mask()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    NEW.items_mask := NEW.items_mask | weekly_checklist_bool_mask(NEW);
+  ELSIF NEW.items_mask IS NOT DISTINCT FROM OLD.items_mask THEN
+    NEW.items_mask := weekly_checklist_bool_mask(NEW);
+  END IF;
+
+  NEW.strength_workouts_3_4 := (NEW.items_mask & 1) <> 0;
+  NEW.cardio_sessions_2_3 := (NEW.items_mask & 2) <> 0;
+  NEW.meal_prep := (NEW.items_mask & 4) <> 0;
+  NEW.progress_review := (NEW.items_mask & 8) <> 0;
+  NEW.plan_adjustment := (NEW.items_mask & 16) <> 0;
+  NEW.monk_mode_period := (NEW.items_mask & 32) <> 0;
+  NEW.reflection_on_principles := (NEW.items_mask & 64) <> 0;
+  NEW.planning_next_week := (NEW.items_mask & 128) <> 0;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS calculate_weekly_completion_trigger ON winter_arc_weekly_checklists;
+DROP TRIGGER IF EXISTS sync_weekly_checklist_mask_trigger ON winter_arc_weekly_checklists;
+CREATE TRIGGER sync_weekly_checklist_mask_trigger
+  BEFORE INSERT OR UPDATE ON winter_arc_weekly_checklists
+  FOR EACH ROW
+  EXECUTE FUNCTION sync_weekly_checklist_mask();
+
+ALTER TABLE winter_arc_weekly_checklists
+  DROP COLUMN IF EXISTS items_completed,
+  DROP COLUMN IF EXISTS completion_percentage,
+  DROP COLUMN IF EXISTS is_fully_completed;
+
+ALTER TABLE winter_arc_weekly_checklists
+  ADD COLUMN items_completed SMALLINT
+    GENERATED ALWAYS AS (bit_count(items_mask::INTEGER::bit(8))::SMALLINT) STORED,
+  ADD COLUMN completion_percentage NUMERIC(5,2)
+    GENERATED ALWAYS AS (bit_count(items_mask::INTEGER::bit(8)) * 12.5) STORED,
+  ADD COLUMN is_fully_completed BOOLEAN
+    GENERATED ALWAYS AS (items_mask = 255) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_weekly_checklist_completed
+  ON winter_arc_weekly_checklists(user_id, program_id, year DESC, week_number DESC)
+  WHERE is_fully_completed;
+
+CREATE OR REPLACE FUNCTION apply_weekly_checklist_mask(
+  p_user_id UUID,
+  p_program_id BIGINT,
+  p_year INTEGER,
+  p_week INTEGER,
+  p_week_start DATE,
+  p_week_end DATE,
+  p_set INTEGER,
+  p_clear INTEGER
+)
+RETURNS SETOF winter_arc_weekly_checklists AS $$
+  INSERT INTO winter_arc_weekly_checklists AS w
+    (user_id, program_id, year, week_number, week_start_date, week_end_date, items_mask)
+  VALUES (p_user_id, p_program_id, p_year, p_week, p_week_start, p_week_end, p_set::SMALLINT)
+  ON CONFLICT (user_id, program_id, year, week_number)
+  DO UPDATE SET items_mask = ((w.items_mask & ~p_clear) | p_set)::SMALLINT
+  RETURNING *;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- 3. PHASE 2 (run after every instance uses CHECKLIST_STORAGE_MODE=bitmask)
+-- ============================================================================
+-- DROP TRIGGER IF EXISTS sync_daily_checklist_mask_trigger ON winter_arc_daily_checklists;
+-- DROP TRIGGER IF EXISTS sync_weekly_checklist_mask_trigger ON winter_arc_weekly_checklists;
+-- ALTER TABLE winter_arc_daily_checklists
+--   DROP COLUMN wake_up_early, DROP COLUMN ten_min_silence, DROP COLUMN morning_hydration,
+--   DROP COLUMN workout, DROP COLUMN clean_eating, DROP COLUMN review_mission,
+--   DROP COLUMN small_sacrifice, DROP COLUMN moment_silence, DROP COLUMN act_of_honor,
+--   DROP COLUMN small_overcoming, DROP COLUMN total_items;
+-- ALTER TABLE winter_arc_weekly_checklists
+--   DROP COLUMN strength_workouts_3_4, DROP COLUMN cardio_sessions_2_3, DROP COLUMN meal_prep,
+--   DROP COLUMN progress_review, DROP COLUMN plan_adjustment, DROP COLUMN monk_mode_period,
+--   DROP COLUMN reflection_on_principles, DROP COLUMN planning_next_week, DROP COLUMN total_items;
+-- DROP FUNCTION IF EXISTS sync_daily_checklist_mask();
+-- DROP FUNCTION IF EXISTS sync_weekly_checklist_mask();
+-- DROP FUNCTION IF EXISTS daily_checklist_bool_mask(winter_arc_daily_checklists);
+-- DROP FUNCTION IF EXISTS weekly_checklist_bool_mask(winter_arc_weekly_checklists);
@@ -0,0 +1,73 @@
+-- Migration 0011: Dirty tracking for Winter Arc leaderboard scores
+-- Leaderboard scores are only recomputed when their inputs change, instead of on every read.
+--
+--   score_inputs_version  bumped by triggers whenever a scoring input changes
+--                         (streaks, totals, or the user's achievements)
+--   score_version         the inputs version the stored leaderboard_score was computed from
+--   score_dirty           generated: the stored score is stale
+--
+-- Writers recompute with a compare-and-set on score_inputs_version, so a concurrent input
+-- change leaves the row dirty instead of being overwritten by a stale score.
+-- Inputs must match compute_score in app/services/winter_arc/leaderboard_service.py.
+
+-- ============================================================================
+-- 1. VERSION COLUMNS
+-- ============================================================================
+
+ALTER TABLE winter_arc_user_progress
+  ADD COLUMN IF NOT EXISTS score_inputs_version BIGINT NOT NULL DEFAULT 1,
+  ADD COLUMN IF NOT EXISTS score_version BIGINT NOT NULL DEFAULT 0;
+
+ALTER TABLE winter_arc_user_progress
+  ADD COLUMN IF NOT EXISTS score_dirty BOOLEAN
+  GENERATED ALWAYS AS (score_version < score_inputs_version) STORED;
+
+-- Dirty rows per program, for the bulk recompute job
+CREATE INDEX IF NOT EXISTS idx_winter_arc_progress_score_dirty
+  ON winter_arc_user_progress(program_id, user_id)
+  WHERE score_dirty;
+
+-- ============================================================================
+-- 2. PROGRESS INPUT CHANGES
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION bump_winter_arc_score_inputs_version()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.current_daily_streak IS DISTINCT FROM OLD.current_daily_streak
+     OR NEW.current_weekly_streak IS DISTINCT FROM OLD.current_weekly_streak
+     OR NEW.total_days_completed IS DISTINCT FROM OLD.total_days_completed
+     OR NEW.total_weeks_completed IS DISTINCT FROM OLD.total_weeks_completed THEN
+    NEW.score_inputs_version := OLD.score_inputs_version + 1;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_score_inputs_version_trigger ON winter_arc_user_progress;
+CREATE TRIGGER bump_score_inputs_version_trigger
+  BEFORE UPDATE ON winter_arc_user_progress
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_winter_arc_score_inputs_version();
+
+-- ============================================================================
+-- 3. ACHIEVEMENT CHANGES
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION bump_winter_arc_score_on_achievement()
+RETURNS TRIGGER AS $$
+DECLARE
+  r winter_arc_user_achievements := COALESCE(NEW, OLD);
+BEGIN
+  UPDATE winter_arc_user_progress
+  SET score_inputs_version = score_inputs_version + 1
+  WHERE user_id = r.user_id AND program_id = r.program_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_score_on_achievement_trigger ON winter_arc_user_achievements;
+CREATE TRIGGER bump_score_on_achievement_trigger
+  AFTER INSERT OR DELETE ON winter_arc_user_achievements
+  FOR EACH ROW
+  EXECUTE FUNCTION bump_winter_arc_score_on_achievement();
@@ -0,0 +1,61 @@
+-- Migration 0012: Materialized Winter Arc leaderboard
+-- Ranks are computed once per refresh instead of on every leaderboard query.
+--
+--   winter_arc_leaderboard_ranked   one row per opted-in participant, ranked per program
+--   refresh_winter_arc_leaderboard  RPC: REFRESH ... CONCURRENTLY, returns the refresh time
+--
+-- Reads by rank range use the (program_id, leaderboard_rank) unique index, so
+-- offset pagination becomes an index range scan. The (program_id, user_id) unique index
+-- serves per-user lookups and is what allows concurrent refreshes.
+-- The backend refreshes on a schedule (LEADERBOARD_REFRESH_INTERVAL_SECONDS) and after
+-- bulk score recomputes. Email addresses are not exposed on this public surface.
+
+-- ============================================================================
+-- 1. MATERIALIZED VIEW
+-- ============================================================================
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS winter_arc_leaderboard_ranked AS
+SELECT
+  ROW_NUMBER() OVER (
+    PARTITION BY wap.program_id
+    ORDER BY wap.leaderboard_score DESC, wap.total_days_completed DESC, wap.user_id
+  ) AS leaderboard_rank,
+  wap.id,
+  wap.user_id,
+  u.raw_user_meta_data->>'name' AS user_name,
+  wap.program_id,
+  wap.leaderboard_score,
+  wap.current_daily_streak,
+  wap.longest_daily_streak,
+  wap.current_weekly_streak,
+  wap.total_days_completed,
+  wap.total_weeks_completed,
+  wap.show_on_leaderboard,
+  wap.started_at,
+  wap.last_activity_at,
+  NOW() AS refreshed_at
+FROM winter_arc_user_progress wap
+JOIN auth.users u ON wap.user_id = u.id
+WHERE wap.show_on_leaderboard = TRUE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_winter_arc_leaderboard_ranked_rank
+  ON winter_arc_leaderboard_ranked(program_id, leaderboard_rank);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_winter_arc_leaderboard_ranked_user
+  ON winter_arc_leaderboard_ranked(program_id, user_id);
+
+GRANT SELECT ON winter_arc_leaderboard_ranked TO anon, authenticated;
+
+-- ============================================================================
+-- 2. REFRESH RPC
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION refresh_winter_arc_leaderboard()
+RETURNS TIMESTAMPTZ AS $$
+BEGIN
+  REFRESH MATERIALIZED VIEW CONCURRENTLY winter_arc_leaderboard_ranked;
+  RETURN NOW();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION refresh_winter_arc_leaderboard() FROM PUBLIC, anon, authenticated;
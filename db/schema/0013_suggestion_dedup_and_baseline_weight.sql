@@ -0,0 +1,69 @@
+-- Migration 0013: Idempotent post suggestions and cached baseline weight
+--
+--   winter_arc_post_suggestions   one row per (user_id, program_id, suggestion_type), so a
+--                                 dismissed or posted milestone is never created again
+--   winter_arc_user_progress      baseline_weight_kg = weight of the first progress snapshot,
+--                                 so the weight rule no longer re-queries snapshots
+--
+-- 0008 created the suggestions table with trigger_type / trigger_data / suggested_*;
+-- the columns suggestions_service.py reads and writes are added here and backfilled
+-- from them before the dedup key is built.
+
+-- ============================================================================
+-- 1. SUGGESTION DEDUP KEY
+-- ============================================================================
+
+ALTER TABLE winter_arc_post_suggestions
+  ADD COLUMN IF NOT EXISTS suggestion_type TEXT,
+  ADD COLUMN IF NOT EXISTS title TEXT,
+  ADD COLUMN IF NOT EXISTS message TEXT,
+  ADD COLUMN IF NOT EXISTS metadata JSONB,
+  ADD COLUMN IF NOT EXISTS triggered_at TIMESTAMP WITH TIME ZONE;
+
+-- The service does not write trigger_type
+ALTER TABLE winter_arc_post_suggestions
+  ALTER COLUMN trigger_type DROP NOT NULL;
+
+-- 0008 rows have no milestone key: suffix the id so none of them collide below
+UPDATE winter_arc_post_suggestions
+SET suggestion_type = COALESCE(suggestion_type, trigger_type || ':' || id),
+    title = COALESCE(title, suggested_title),
+    message = COALESCE(message, suggested_content),
+    metadata = COALESCE(metadata, trigger_data, '{}'::JSONB),
+    triggered_at = COALESCE(triggered_at, created_at)
+WHERE suggestion_type IS NULL;
+
+ALTER TABLE winter_arc_post_suggestions
+  ALTER COLUMN suggestion_type SET NOT NULL,
+  ALTER COLUMN metadata SET DEFAULT '{}'::JSONB,
+  ALTER COLUMN triggered_at SET DEFAULT NOW();
+
+-- Keep the oldest row of each duplicate group before adding the unique index
+DELETE FROM winter_arc_post_suggestions s
+USING winter_arc_post_suggestions keep
+WHERE s.user_id = keep.user_id
+  AND s.program_id = keep.program_id
+  AND s.suggestion_type = keep.suggestion_type
+  AND s.id > keep.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_post_suggestions_dedup
+  ON winter_arc_post_suggestions(user_id, program_id, suggestion_type);
+
+-- ============================================================================
+-- 2. BASELINE WEIGHT
+-- ============================================================================
+
+ALTER TABLE winter_arc_user_progress
+  ADD COLUMN IF NOT EXISTS baseline_weight_kg NUMERIC(5,2);
+
+UPDATE winter_arc_user_progress p
+SET baseline_weight_kg = first_snapshot.weight_kg
+FROM (
+  SELECT DISTINCT ON (user_id, program_id) user_id, program_id, weight_kg
+  FROM winter_arc_progress_snapshots
+  WHERE weight_kg IS NOT NULL
+  ORDER BY user_id, program_id, snapshot_date ASC
+) first_snapshot
+WHERE p.user_id = first_snapshot.user_id
+  AND p.program_id = first_snapshot.program_id
+  AND p.baseline_weight_kg IS NULL;
@@ -0,0 +1,40 @@
+-- Migration 0014: Batched meditation timer increments
+-- The backend aggregates timer completions per (user, program) in memory and flushes them
+-- every few seconds with one call to increment_timer_stats_batch.
+--
+--   p_rows: [{"user_id": uuid, "program_id": bigint,
+--             "three_min_timer_completions": int, "total_timer_minutes": int}, ...]
+--
+-- Increments are applied atomically (col = col + delta) and create the progress row if it
+-- does not exist yet, so no read is needed before the write.
+
+CREATE OR REPLACE FUNCTION increment_timer_stats_batch(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  affected INTEGER;
+BEGIN
+  INSERT INTO winter_arc_user_progress (
+    user_id, program_id, three_min_timer_completions, total_timer_minutes
+  )
+  SELECT r.user_id, r.program_id, SUM(r.three_min_timer_completions), SUM(r.total_timer_minutes)
+  FROM jsonb_to_recordset(p_rows) AS r(
+    user_id UUID,
+    program_id BIGINT,
+    three_min_timer_completions INTEGER,
+    total_timer_minutes INTEGER
+  )
+  GROUP BY r.user_id, r.program_id
+  ON CONFLICT (user_id, program_id) DO UPDATE SET
+    three_min_timer_completions =
+      COALESCE(winter_arc_user_progress.three_min_timer_completions, 0)
+      + EXCLUDED.three_min_timer_completions,
+    total_timer_minutes =
+      COALESCE(winter_arc_user_progress.total_timer_minutes, 0)
+      + EXCLUDED.total_timer_minutes;
+
+  GET DIAGNOSTICS affected = ROW_COUNT;
+  RETURN affected;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION increment_timer_stats_batch(JSONB) FROM PUBLIC, anon, authenticated;
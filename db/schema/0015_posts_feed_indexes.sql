@@ -0,0 +1,23 @@
+-- Migration 0015: Indexes for the paginated community feed
+-- list_posts filters visibility in the query (public OR own OR admin) and pages on
+-- (created_at, id), newest first:
+--
+--   idx_posts_program_feed        (program_id, visibility, created_at, id) for the public
+--                                 segment of a program's feed
+--   idx_posts_program_author_feed (program_id, user_id, created_at, id) for a member's
+--                                 own posts, including private ones
+--   idx_posts_program_created_id  (program_id, created_at, id) for the admin feed and
+--                                 ordered scans of the combined predicate
+--
+-- idx_posts_program_created_id supersedes idx_posts_program_id_created from 0001.
+
+CREATE INDEX IF NOT EXISTS idx_posts_program_feed
+  ON posts(program_id, visibility, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_posts_program_author_feed
+  ON posts(program_id, user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_posts_program_created_id
+  ON posts(program_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_posts_program_id_created;
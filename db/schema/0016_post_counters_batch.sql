@@ -0,0 +1,52 @@
+-- Migration 0016: Batched post like/comment counters
+-- The backend aggregates like and comment deltas per post in memory and flushes them
+-- every few seconds with one call to increment_post_counters_batch, so a popular post
+-- takes one row update per flush instead of one per like.
+--
+--   p_rows: [{"post_id": bigint, "likes_count": int, "comments_count": int}, ...]
+--
+-- The per-row count triggers from 0002 would count every like twice, so they are dropped.
+
+-- ============================================================================
+-- 1. DROP PER-ROW COUNT TRIGGERS
+-- ============================================================================
+
+DROP TRIGGER IF EXISTS trg_increment_post_comments ON community_comments;
+DROP TRIGGER IF EXISTS trg_decrement_post_comments ON community_comments;
+DROP TRIGGER IF EXISTS trg_increment_post_likes ON community_likes;
+DROP TRIGGER IF EXISTS trg_decrement_post_likes ON community_likes;
+
+-- ============================================================================
+-- 2. BATCH INCREMENT
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION increment_post_counters_batch(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  affected INTEGER;
+BEGIN
+  UPDATE posts p
+  SET likes_count = GREATEST(0, COALESCE(p.likes_count, 0) + d.likes_count),
+      comments_count = GREATEST(0, COALESCE(p.comments_count, 0) + d.comments_count),
+      updated_at = NOW()
+  FROM (
+    SELECT r.post_id, SUM(r.likes_count) AS likes_count, SUM(r.comments_count) AS comments_count
+    FROM jsonb_to_recordset(p_rows) AS r(post_id BIGINT, likes_count INTEGER, comments_count INTEGER)
+    GROUP BY r.post_id
+  ) d
+  WHERE p.id = d.post_id;
+
+  GET DIAGNOSTICS affected = ROW_COUNT;
+  RETURN affected;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION increment_post_counters_batch(JSONB) FROM PUBLIC, anon, authenticated;
+
+-- ============================================================================
+-- 3. RECONCILE EXISTING COUNTS
+-- ============================================================================
+
+UPDATE posts p
+SET likes_count = (SELECT COUNT(*) FROM community_likes l WHERE l.post_id = p.id),
+    comments_count = (SELECT COUNT(*) FROM community_comments c WHERE c.post_id = p.id);
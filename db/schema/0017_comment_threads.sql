@@ -0,0 +1,92 @@
+-- Migration 0017: Threaded comment loading
+-- Every comment records the top-level comment of its thread (thread_root_id), so a page
+-- of threads is read in one call instead of one query per reply level:
+--
+--   get_comment_threads(post, after, limit, max_rows)
+--     top-level comments of the post after the (created_at, id) cursor, up to limit + 1
+--     (the extra one tells the backend another page exists), plus all of their replies,
+--     ordered thread by thread and capped at max_rows rows
+--
+-- The backend nests the rows into a tree (app/services/posts/comments_service.py).
+
+-- ============================================================================
+-- 1. THREAD ROOT
+-- ============================================================================
+
+ALTER TABLE community_comments
+  ADD COLUMN IF NOT EXISTS thread_root_id BIGINT;
+
+WITH RECURSIVE threads AS (
+  SELECT id, id AS root_id
+  FROM community_comments
+  WHERE parent_comment_id IS NULL
+  UNION ALL
+  SELECT c.id, t.root_id
+  FROM community_comments c
+  JOIN threads t ON c.parent_comment_id = t.id
+)
+UPDATE community_comments c
+SET thread_root_id = t.root_id
+FROM threads t
+WHERE c.id = t.id
+  AND c.thread_root_id IS DISTINCT FROM t.root_id;
+
+CREATE OR REPLACE FUNCTION set_comment_thread_root()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.parent_comment_id IS NULL THEN
+    NEW.thread_root_id := NEW.id;
+  ELSE
+    SELECT COALESCE(thread_root_id, id) INTO NEW.thread_root_id
+    FROM community_comments
+    WHERE id = NEW.parent_comment_id;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_set_comment_thread_root ON community_comments;
+CREATE TRIGGER trg_set_comment_thread_root
+  BEFORE INSERT ON community_comments
+  FOR EACH ROW
+  EXECUTE FUNCTION set_comment_thread_root();
+
+-- Top-level comments of a post, in page order
+CREATE INDEX IF NOT EXISTS idx_community_comments_post_roots
+  ON community_comments(post_id, created_at, id)
+  WHERE parent_comment_id IS NULL;
+
+-- All comments of a thread, in reading order
+CREATE INDEX IF NOT EXISTS idx_community_comments_thread
+  ON community_comments(thread_root_id, created_at, id);
+
+-- ============================================================================
+-- 2. THREAD PAGE
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_comment_threads(
+  p_post_id BIGINT,
+  p_after_created_at TIMESTAMPTZ,
+  p_after_id BIGINT,
+  p_limit INTEGER,
+  p_max_rows INTEGER
+)
+RETURNS SETOF community_comments AS $$
+  WITH roots AS (
+    SELECT id, created_at
+    FROM community_comments
+    WHERE post_id = p_post_id
+      AND parent_comment_id IS NULL
+      AND (p_after_id IS NULL OR (created_at, id) > (p_after_created_at, p_after_id))
+    ORDER BY created_at, id
+    LIMIT p_limit + 1
+  )
+  SELECT c.*
+  FROM roots r
+  JOIN community_comments c ON c.thread_root_id = r.id
+  ORDER BY r.created_at, r.id, c.created_at, c.id
+  LIMIT p_max_rows;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_comment_threads(BIGINT, TIMESTAMPTZ, BIGINT, INTEGER, INTEGER)
+  FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,100 @@
+-- Migration 0018: Server-side premium posts queue and stats
+--
+--   get_premium_posts_queue(program, after..., limit)
+--     posts of the program's premium members, unresponded first, then newest first,
+--     keyset-paginated on (has_response, posted_at, post_id); returns limit + 1 rows so
+--     the backend can tell whether another page exists
+--   get_premium_stats(program)
+--     premium members, their posts, unresponded posts and the average hours from post
+--     to response, in one aggregate
+--
+-- Also rebuilds winter_arc_premium_posts_queue (0009), which joined columns that do not
+-- exist on users/posts, was pinned to program 1 and did not filter memberships by program.
+
+-- ============================================================================
+-- 1. QUEUE VIEW
+-- ============================================================================
+
+DROP VIEW IF EXISTS winter_arc_premium_posts_queue;
+
+CREATE VIEW winter_arc_premium_posts_queue AS
+SELECT
+  p.id AS post_id,
+  p.program_id,
+  p.user_id,
+  p.title,
+  p.message AS content,
+  p.created_at AS posted_at,
+  (wpr.id IS NOT NULL) AS has_response,
+  wpr.responded_at,
+  wpr.responded_by,
+  wpr.notes
+FROM posts p
+JOIN user_programs up
+  ON up.user_id = p.user_id
+ AND up.program_id = p.program_id
+ AND up.tier = 'premium'
+LEFT JOIN winter_arc_premium_responses wpr ON wpr.post_id = p.id;
+
+COMMENT ON VIEW winter_arc_premium_posts_queue IS 'Wagner admin view: premium members'' posts with response status';
+
+-- ============================================================================
+-- 2. QUEUE PAGE
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_premium_posts_queue(
+  p_program_id BIGINT,
+  p_after_has_response BOOLEAN,
+  p_after_posted_at TIMESTAMPTZ,
+  p_after_post_id BIGINT,
+  p_limit INTEGER
+)
+RETURNS SETOF winter_arc_premium_posts_queue AS $$
+  SELECT q.*
+  FROM winter_arc_premium_posts_queue q
+  WHERE q.program_id = p_program_id
+    AND (
+      p_after_post_id IS NULL
+      OR q.has_response > p_after_has_response
+      OR (
+        q.has_response = p_after_has_response
+        AND (q.posted_at, q.post_id) < (p_after_posted_at, p_after_post_id)
+      )
+    )
+  ORDER BY q.has_response, q.posted_at DESC, q.post_id DESC
+  LIMIT p_limit + 1;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_premium_posts_queue(BIGINT, BOOLEAN, TIMESTAMPTZ, BIGINT, INTEGER)
+  FROM PUBLIC, anon, authenticated;
+
+-- ============================================================================
+-- 3. STATS
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_premium_stats(p_program_id BIGINT)
+RETURNS TABLE (
+  total_premium_users BIGINT,
+  total_premium_posts BIGINT,
+  unresponded_posts BIGINT,
+  avg_response_time_hours NUMERIC
+) AS $$
+  SELECT
+    (SELECT COUNT(*) FROM user_programs
+      WHERE program_id = p_program_id AND tier = 'premium'),
+    COUNT(*),
+    COUNT(*) FILTER (WHERE NOT q.has_response),
+    ROUND(
+      (AVG(EXTRACT(EPOCH FROM (q.responded_at - q.posted_at))) FILTER (WHERE q.has_response)
+        / 3600)::NUMERIC,
+      2
+    )
+  FROM winter_arc_premium_posts_queue q
+  WHERE q.program_id = p_program_id;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_premium_stats(BIGINT) FROM PUBLIC, anon, authenticated;
+
+-- Premium memberships of a program
+CREATE INDEX IF NOT EXISTS idx_user_programs_program_tier
+  ON user_programs(program_id, tier, user_id);
@@ -0,0 +1,69 @@
+-- Migration 0019: Full-text search over community posts
+-- posts.search_vector is a generated tsvector of title (weight A) and message (weight B),
+-- indexed with GIN. The 'simple' configuration is used because posts are written in
+-- both English and Portuguese; it lowercases and splits words without stemming.
+--
+--   search_posts(program, query, viewer, is_admin, after_rank, after_id, limit)
+--     posts of the program matching a websearch-style query (quoted phrases, OR, -word),
+--     ranked by ts_rank and keyset-paginated on (rank, id); the visibility rule matches
+--     list_posts: public, or the viewer's own, or everything for admins.
+--     Returns limit + 1 rows so the backend can tell whether another page exists.
+
+-- ============================================================================
+-- 1. SEARCH VECTOR
+-- ============================================================================
+
+ALTER TABLE posts
+  ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', COALESCE(title, '')), 'A')
+    || setweight(to_tsvector('simple', COALESCE(message, '')), 'B')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_posts_search_vector
+  ON posts USING GIN (search_vector);
+
+-- ============================================================================
+-- 2. SEARCH
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION search_posts(
+  p_program_id BIGINT,
+  p_query TEXT,
+  p_viewer UUID,
+  p_is_admin BOOLEAN,
+  p_after_rank REAL,
+  p_after_id BIGINT,
+  p_limit INTEGER
+)
+RETURNS TABLE (
+  id BIGINT,
+  user_id UUID,
+  program_id BIGINT,
+  title TEXT,
+  message TEXT,
+  photo_url TEXT,
+  visibility TEXT,
+  likes_count INTEGER,
+  comments_count INTEGER,
+  is_pinned BOOLEAN,
+  created_at TIMESTAMPTZ,
+  rank REAL
+) AS $$
+  WITH matches AS (
+    SELECT p.*, ts_rank(p.search_vector, q.query) AS rank
+    FROM posts p, websearch_to_tsquery('simple', p_query) AS q(query)
+    WHERE p.program_id = p_program_id
+      AND p.search_vector @@ q.query
+      AND (p_is_admin OR p.visibility = 'public' OR p.user_id = p_viewer)
+  )
+  SELECT m.id, m.user_id, m.program_id, m.title, m.message, m.photo_url, m.visibility,
+         m.likes_count, m.comments_count, m.is_pinned, m.created_at, m.rank
+  FROM matches m
+  WHERE p_after_id IS NULL OR (m.rank, m.id) < (p_after_rank, p_after_id)
+  ORDER BY m.rank DESC, m.id DESC
+  LIMIT p_limit + 1;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION search_posts(BIGINT, TEXT, UUID, BOOLEAN, REAL, BIGINT, INTEGER)
+  FROM PUBLIC, anon, authenticated;
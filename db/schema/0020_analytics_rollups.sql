@@ -0,0 +1,178 @@
+-- Migration 0020: Daily sales and enrollment rollups
+-- analytics_daily holds one row per (day, metric, product_type, tier), kept current by
+-- triggers on purchases and user_programs, so admin analytics read a few rows per day
+-- instead of scanning the source tables:
+--
+--   metric 'revenue'     paid purchases: count and amount_cents, product_type = item_type
+--                        (ebook | program | combo), by purchase day
+--   metric 'enrollment'  memberships: count, product_type = user_programs.product_type,
+--                        by enrollment day
+--
+-- Missing product types and tiers are stored as 'unknown' and 'none' (they are part of
+-- the primary key). Days are UTC; rows without created_at count on the day they are
+-- written.
+--
+--   get_sales_totals()   total paid revenue and order count, summed from the rollup
+--   get_analytics_timeseries(metric, start, end)
+--     daily points by product type and tier plus totals, as one JSON document so the
+--     series is never cut by the API row limit
+
+-- ============================================================================
+-- 1. ROLLUP TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS analytics_daily (
+  day DATE NOT NULL,
+  metric TEXT NOT NULL CHECK (metric IN ('revenue', 'enrollment')),
+  product_type TEXT NOT NULL,
+  tier TEXT NOT NULL,
+  count BIGINT NOT NULL DEFAULT 0,
+  amount_cents BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, day, product_type, tier)
+);
+
+ALTER TABLE analytics_daily ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION bump_analytics_daily(
+  p_day DATE,
+  p_metric TEXT,
+  p_product_type TEXT,
+  p_tier TEXT,
+  p_count BIGINT,
+  p_amount_cents BIGINT
+)
+RETURNS VOID AS $$
+  INSERT INTO analytics_daily (day, metric, product_type, tier, count, amount_cents)
+  VALUES (
+    p_day, p_metric, COALESCE(p_product_type, 'unknown'), COALESCE(p_tier, 'none'),
+    p_count, p_amount_cents
+  )
+  ON CONFLICT (metric, day, product_type, tier) DO UPDATE SET
+    count = analytics_daily.count + EXCLUDED.count,
+    amount_cents = analytics_daily.amount_cents + EXCLUDED.amount_cents;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- 2. TRIGGERS
+-- ============================================================================
+
+-- A purchase counts while its status is 'paid'; updates move it out of the old
+-- bucket and into the new one
+CREATE OR REPLACE FUNCTION rollup_purchase()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'paid' THEN
+    PERFORM bump_analytics_daily(
+      (COALESCE(OLD.created_at, NOW()) AT TIME ZONE 'UTC')::DATE,
+      'revenue', OLD.item_type, OLD.tier,
+      -1, -COALESCE(OLD.price_cents, 0)
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'paid' THEN
+    PERFORM bump_analytics_daily(
+      (COALESCE(NEW.created_at, NOW()) AT TIME ZONE 'UTC')::DATE,
+      'revenue', NEW.item_type, NEW.tier,
+      1, COALESCE(NEW.price_cents, 0)
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_rollup_purchase ON purchases;
+CREATE TRIGGER trg_rollup_purchase
+  AFTER INSERT OR DELETE OR UPDATE OF status, price_cents, item_type, tier, created_at
+  ON purchases
+  FOR EACH ROW
+  EXECUTE FUNCTION rollup_purchase();
+
+CREATE OR REPLACE FUNCTION rollup_enrollment()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM bump_analytics_daily(
+      (COALESCE(OLD.created_at, NOW()) AT TIME ZONE 'UTC')::DATE,
+      'enrollment', OLD.product_type, OLD.tier, -1, 0
+    );
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM bump_analytics_daily(
+      (COALESCE(NEW.created_at, NOW()) AT TIME ZONE 'UTC')::DATE,
+      'enrollment', NEW.product_type, NEW.tier, 1, 0
+    );
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_rollup_enrollment ON user_programs;
+CREATE TRIGGER trg_rollup_enrollment
+  AFTER INSERT OR DELETE OR UPDATE OF product_type, tier, created_at
+  ON user_programs
+  FOR EACH ROW
+  EXECUTE FUNCTION rollup_enrollment();
+
+-- ============================================================================
+-- 3. BACKFILL
+-- ============================================================================
+
+TRUNCATE analytics_daily;
+
+INSERT INTO analytics_daily (day, metric, product_type, tier, count, amount_cents)
+SELECT
+  (COALESCE(created_at, NOW()) AT TIME ZONE 'UTC')::DATE, 'revenue',
+  COALESCE(item_type, 'unknown'), COALESCE(tier, 'none'),
+  COUNT(*), COALESCE(SUM(price_cents), 0)
+FROM purchases
+WHERE status = 'paid'
+GROUP BY 1, 3, 4;
+
+INSERT INTO analytics_daily (day, metric, product_type, tier, count, amount_cents)
+SELECT
+  (COALESCE(created_at, NOW()) AT TIME ZONE 'UTC')::DATE, 'enrollment',
+  COALESCE(product_type, 'unknown'), COALESCE(tier, 'none'),
+  COUNT(*), 0
+FROM user_programs
+GROUP BY 1, 3, 4;
+
+-- ============================================================================
+-- 4. TOTALS AND SERIES
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_sales_totals()
+RETURNS TABLE (total_revenue_cents BIGINT, paid_orders BIGINT) AS $$
+  SELECT COALESCE(SUM(amount_cents), 0)::BIGINT, COALESCE(SUM(count), 0)::BIGINT
+  FROM analytics_daily
+  WHERE metric = 'revenue';
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_sales_totals() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION bump_analytics_daily(DATE, TEXT, TEXT, TEXT, BIGINT, BIGINT)
+  FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION get_analytics_timeseries(
+  p_metric TEXT,
+  p_start_date DATE,
+  p_end_date DATE
+)
+RETURNS JSONB AS $$
+  WITH points AS (
+    SELECT day, product_type, tier,
+           SUM(count)::BIGINT AS count,
+           SUM(amount_cents)::BIGINT AS amount_cents
+    FROM analytics_daily
+    WHERE metric = p_metric
+      AND day BETWEEN p_start_date AND p_end_date
+    GROUP BY day, product_type, tier
+  )
+  SELECT jsonb_build_object(
+    'points', COALESCE(jsonb_agg(to_jsonb(p) ORDER BY p.day, p.product_type, p.tier), '[]'::JSONB),
+    'totals', jsonb_build_object(
+      'count', COALESCE(SUM(p.count), 0),
+      'amount_cents', COALESCE(SUM(p.amount_cents), 0)
+    )
+  )
+  FROM points p;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_analytics_timeseries(TEXT, DATE, DATE) FROM PUBLIC, anon, authenticated;
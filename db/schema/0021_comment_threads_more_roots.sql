@@ -0,0 +1,55 @@
+-- Migration 0021: Comment thread pages report whether more threads follow
+-- get_comment_threads (0017) caps a page at max_rows rows. When a single thread filled
+-- the cap, the look-ahead top-level comment never made it into the result and the
+-- backend could not tell whether another page existed. Each row now carries
+-- more_roots: whether another top-level comment of the post follows its thread's root,
+-- decided before the row cap is applied.
+--
+--   get_comment_threads(post, after, limit, max_rows)
+--     as in 0017, with the comment columns listed explicitly plus more_roots
+
+DROP FUNCTION IF EXISTS get_comment_threads(BIGINT, TIMESTAMPTZ, BIGINT, INTEGER, INTEGER);
+
+CREATE FUNCTION get_comment_threads(
+  p_post_id BIGINT,
+  p_after_created_at TIMESTAMPTZ,
+  p_after_id BIGINT,
+  p_limit INTEGER,
+  p_max_rows INTEGER
+)
+RETURNS TABLE (
+  id BIGINT,
+  post_id BIGINT,
+  user_id UUID,
+  content TEXT,
+  parent_comment_id BIGINT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  thread_root_id BIGINT,
+  more_roots BOOLEAN
+) AS $$
+  WITH roots AS (
+    SELECT cc.id, cc.created_at
+    FROM community_comments cc
+    WHERE cc.post_id = p_post_id
+      AND cc.parent_comment_id IS NULL
+      AND (p_after_id IS NULL OR (cc.created_at, cc.id) > (p_after_created_at, p_after_id))
+    ORDER BY cc.created_at, cc.id
+    LIMIT p_limit + 1
+  ),
+  numbered AS (
+    SELECT r.id, r.created_at,
+           ROW_NUMBER() OVER (ORDER BY r.created_at, r.id) AS rn,
+           COUNT(*) OVER () AS total
+    FROM roots r
+  )
+  SELECT c.id, c.post_id, c.user_id, c.content, c.parent_comment_id, c.created_at,
+         c.updated_at, c.thread_root_id, n.rn < n.total
+  FROM numbered n
+  JOIN community_comments c ON c.thread_root_id = n.id
+  ORDER BY n.created_at, n.id, c.created_at, c.id
+  LIMIT p_max_rows;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION get_comment_threads(BIGINT, TIMESTAMPTZ, BIGINT, INTEGER, INTEGER)
+  FROM PUBLIC, anon, authenticated;
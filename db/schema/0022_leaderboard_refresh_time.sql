@@ -0,0 +1,80 @@
+-- Migration 0022: Leaderboard refresh time outside the materialized view
+-- winter_arc_leaderboard_ranked (0012) carried NOW() AS refreshed_at on every row, so
+-- each concurrent refresh saw every row as changed and rewrote the whole view. The view
+-- is rebuilt without that column and the refresh time is kept in a one-row table:
+--
+--   winter_arc_leaderboard_refresh    refreshed_at of the last refresh
+--   refresh_winter_arc_leaderboard    RPC: REFRESH ... CONCURRENTLY, records and returns
+--                                     the refresh time
+
+-- ============================================================================
+-- 1. REFRESH TIME
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS winter_arc_leaderboard_refresh (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE winter_arc_leaderboard_refresh ENABLE ROW LEVEL SECURITY;
+
+INSERT INTO winter_arc_leaderboard_refresh (id, refreshed_at)
+VALUES (TRUE, NOW())
+ON CONFLICT (id) DO NOTHING;
+
+-- ============================================================================
+-- 2. MATERIALIZED VIEW
+-- ============================================================================
+
+DROP MATERIALIZED VIEW IF EXISTS winter_arc_leaderboard_ranked;
+
+CREATE MATERIALIZED VIEW winter_arc_leaderboard_ranked AS
+SELECT
+  ROW_NUMBER() OVER (
+    PARTITION BY wap.program_id
+    ORDER BY wap.leaderboard_score DESC, wap.total_days_completed DESC, wap.user_id
+  ) AS leaderboard_rank,
+  wap.id,
+  wap.user_id,
+  u.raw_user_meta_data->>'name' AS user_name,
+  wap.program_id,
+  wap.leaderboard_score,
+  wap.current_daily_streak,
+  wap.longest_daily_streak,
+  wap.current_weekly_streak,
+  wap.total_days_completed,
+  wap.total_weeks_completed,
+  wap.show_on_leaderboard,
+  wap.started_at,
+  wap.last_activity_at
+FROM winter_arc_user_progress wap
+JOIN auth.users u ON wap.user_id = u.id
+WHERE wap.show_on_leaderboard = TRUE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_winter_arc_leaderboard_ranked_rank
+  ON winter_arc_leaderboard_ranked(program_id, leaderboard_rank);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_winter_arc_leaderboard_ranked_user
+  ON winter_arc_leaderboard_ranked(program_id, user_id);
+
+GRANT SELECT ON winter_arc_leaderboard_ranked TO anon, authenticated;
+
+-- ============================================================================
+-- 3. REFRESH RPC
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION refresh_winter_arc_leaderboard()
+RETURNS TIMESTAMPTZ AS $$
+DECLARE
+  v_refreshed_at TIMESTAMPTZ;
+BEGIN
+  REFRESH MATERIALIZED VIEW CONCURRENTLY winter_arc_leaderboard_ranked;
+  INSERT INTO winter_arc_leaderboard_refresh (id, refreshed_at)
+  VALUES (TRUE, NOW())
+  ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+  RETURNING refreshed_at INTO v_refreshed_at;
+  RETURN v_refreshed_at;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION refresh_winter_arc_leaderboard() FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,36 @@
+-- Migration 0023: Count checklists with an item done, by mask bit
+-- PostgREST cannot filter on bits of items_mask (0010), so in bitmask mode the
+-- achievement facts (wake_up_early_count, monk_mode_weeks) fetched every checklist row
+-- of the user to count one item. The count now happens in the database:
+--
+--   count_checklist_item(user, program, weekly, bit)
+--     daily (weekly = FALSE) or weekly checklists of the user in the program whose
+--     items_mask has the given bit set; bits follow DAILY_ITEMS / WEEKLY_ITEMS
+
+CREATE OR REPLACE FUNCTION count_checklist_item(
+  p_user_id UUID,
+  p_program_id BIGINT,
+  p_weekly BOOLEAN,
+  p_bit INTEGER
+)
+RETURNS BIGINT AS $$
+  SELECT CASE
+    WHEN p_weekly THEN (
+      SELECT COUNT(*)
+      FROM winter_arc_weekly_checklists
+      WHERE user_id = p_user_id
+        AND program_id = p_program_id
+        AND (items_mask & (1 << p_bit)) <> 0
+    )
+    ELSE (
+      SELECT COUNT(*)
+      FROM winter_arc_daily_checklists
+      WHERE user_id = p_user_id
+        AND program_id = p_program_id
+        AND (items_mask & (1 << p_bit)) <> 0
+    )
+  END;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION count_checklist_item(UUID, BIGINT, BOOLEAN, INTEGER)
+  FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,74 @@
+"""Shared fixtures: a recording stand-in for the Supabase client."""
+import pytest
+
+
+class FakeResult:
+    def __init__(self, data=None, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Records builder calls; `execute()` hands them to the handler registered for the target."""
+
+    def __init__(self, client, target: str):
+        self.client = client
+        self.target = target
+        self.calls: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name):
+        if name == "not_":  # a property on the real builders
+            self.calls.append((name, (), {}))
+            return self
+
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return call
+
+    def execute(self):
+        self.client.executed.append(self)
+        handler = self.client.handlers.get(self.target)
+        result = handler(self) if handler else None
+        return result if isinstance(result, FakeResult) else FakeResult(result or [])
+
+    def first(self, name: str):
+        """Arguments of the first `name(...)` call, or None."""
+        return next((args for call, args, _ in self.calls if call == name), None)
+
+
+class FakeSupabase:
+    """
+    Tables and RPCs answer through `handlers`, keyed by table name or `"rpc:<name>"`;
+    a handler receives the FakeQuery and returns rows or a FakeResult. Unhandled targets
+    return no rows. Every executed query is kept in `executed`.
+    """
+
+    def __init__(self):
+        self.handlers: dict = {}
+        self.executed: list[FakeQuery] = []
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: dict | None = None) -> FakeQuery:
+        query = FakeQuery(self, f"rpc:{name}")
+        query.params = params or {}
+        return query
+
+    def queries(self, target: str) -> list[FakeQuery]:
+        return [q for q in self.executed if q.target == target]
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """`install(*modules)` swaps a FakeSupabase in for each module's `supabase` global."""
+    client = FakeSupabase()
+
+    def install(*modules):
+        for module in modules:
+            monkeypatch.setattr(module, "supabase", client)
+        return client
+
+    return install
@@ -0,0 +1,35 @@
+from app.services.winter_arc.achievement_rules import compile_rules
+
+SEED = [
+    {"id": 1, "code": "first_day", "requirements": {"daily_completions": 1}},
+    {"id": 2, "code": "week_warrior", "requirements": {"daily_streak": 7}},
+    {"id": 4, "code": "perfect_week", "requirements": {"weekly_completion": 100, "daily_completion": 100}},
+    {"id": 7, "code": "early_riser", "requirements": {"wake_up_early_count": 30}},
+    {"id": 8, "code": "monk_mode", "requirements": {"monk_mode": True}},
+    {"id": 99, "code": "mystery", "requirements": {"unknown_metric": 3}},
+]
+
+
+def test_unlocks_are_table_driven():
+    rules = compile_rules(SEED)
+    facts = {
+        "total_days_completed": 3,
+        "current_daily_streak": 7,
+        "current_weekly_streak": 1,
+        "wake_up_early_count": 12,
+        "monk_mode_weeks": 0,
+    }
+    unlocked = {rule.achievement["code"] for rule in rules.satisfied(facts)}
+    assert unlocked == {"first_day", "week_warrior", "perfect_week"}
+    assert rules.extra_facts == {"wake_up_early_count", "monk_mode_weeks"}
+
+
+def test_progress_reports_least_complete_requirement():
+    rules = {r.achievement["code"]: r for r in compile_rules(SEED).rules}
+    facts = {"current_daily_streak": 3, "current_weekly_streak": 1, "wake_up_early_count": 12}
+
+    assert rules["week_warrior"].progress(facts) == {"current": 3, "target": 7, "percentage": 42}
+    assert rules["perfect_week"].progress(facts)["percentage"] == 42
+    assert rules["early_riser"].progress(facts) == {"current": 12, "target": 30, "percentage": 40}
+    assert rules["mystery"].progress(facts)["percentage"] == 0
+    assert not rules["mystery"].is_satisfied({"unknown_metric": 10})
@@ -0,0 +1,51 @@
+import pytest
+
+from app.core.config import settings
+from app.services.winter_arc import achievements_service
+
+
+@pytest.mark.parametrize("mode", ["columns", "bitmask"])
+def test_checklist_item_counts_fetch_no_rows(fake_supabase, monkeypatch, mode):
+    monkeypatch.setattr(settings, "checklist_storage_mode", mode)
+    client = fake_supabase(achievements_service)
+    client.handlers["rpc:count_checklist_item"] = lambda q: 4
+
+    count = achievements_service._count_checklists(
+        "winter_arc_weekly_checklists", "u1", 1, "monk_mode_period"
+    )
+
+    if mode == "bitmask":
+        assert count == 4
+        (query,) = client.queries("rpc:count_checklist_item")
+        assert query.params == {"p_user_id": "u1", "p_program_id": 1, "p_weekly": True, "p_bit": 5}
+        assert not client.queries("winter_arc_weekly_checklists")
+    else:
+        (query,) = client.queries("winter_arc_weekly_checklists")
+        assert ("select", ("id",), {"count": "exact", "head": True}) in query.calls
+        assert ("eq", ("monk_mode_period", True), {}) in query.calls
+
+
+@pytest.mark.asyncio
+async def test_unlocks_skip_earned_achievements_and_write_once(fake_supabase):
+    client = fake_supabase(achievements_service)
+    achievements_service._rules_cache.clear()
+    client.handlers["winter_arc_achievements"] = lambda q: [
+        {"id": 1, "code": "first_day", "requirements": {"daily_completions": 1}},
+        {"id": 2, "code": "week_warrior", "requirements": {"daily_streak": 7}},
+        {"id": 3, "code": "month_master", "requirements": {"daily_streak": 30}},
+    ]
+    client.handlers["winter_arc_user_progress"] = lambda q: [
+        {"total_days_completed": 9, "current_daily_streak": 8}
+    ]
+    client.handlers["winter_arc_user_achievements"] = lambda q: (
+        q.first("upsert")[0] if q.first("upsert") else [{"achievement_id": 1}]
+    )
+
+    unlocked = await achievements_service.check_and_unlock_achievements("u1", 1)
+
+    (write,) = [q for q in client.queries("winter_arc_user_achievements") if q.first("upsert")]
+    (rows,) = write.first("upsert")
+    assert [row["achievement_id"] for row in rows] == [2]
+    assert "earned_at" in rows[0]
+    assert write.calls[-1][2] == {"on_conflict": "user_id,program_id,achievement_id", "ignore_duplicates": True}
+    assert [row["achievement_id"] for row in unlocked] == [2]
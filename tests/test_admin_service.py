@@ -0,0 +1,76 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import encode_cursor
+from app.services.admin import admin_service
+
+
+def _queue_row(post_id, has_response=False):
+    return {
+        "post_id": post_id,
+        "user_id": "u1",
+        "has_response": has_response,
+        "posted_at": f"2025-01-{post_id:02d}T08:00:00+00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_premium_queue_pages_through_the_rpc(fake_supabase):
+    admin_service._premium_cache.clear()
+    client = fake_supabase(admin_service)
+    client.handlers["rpc:get_premium_posts_queue"] = lambda q: [_queue_row(3), _queue_row(2), _queue_row(1)]
+
+    posts, cursor = await admin_service.get_premium_posts_queue(1, limit=2)
+    assert [p["post_id"] for p in posts] == [3, 2]
+    assert posts[0]["user_name"] == "Unknown"
+
+    await admin_service.get_premium_posts_queue(1, cursor=cursor, limit=2)
+    params = client.queries("rpc:get_premium_posts_queue")[-1].params
+    assert params["p_after_has_response"] is False
+    assert params["p_after_posted_at"] == "2025-01-02T08:00:00+00:00"
+    assert params["p_after_post_id"] == 2
+    assert params["p_limit"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["no", "2025-01-02T08:00:00+00:00", 2],
+        [False, "yesterday", 2],
+        [False, 5, 2],
+        [False, "2025-01-02T08:00:00+00:00", "2"],
+        [False, "2025-01-02T08:00:00+00:00", True],
+    ],
+)
+async def test_premium_queue_rejects_cursors_with_wrong_types(fake_supabase, values):
+    admin_service._premium_cache.clear()
+    client = fake_supabase(admin_service)
+
+    with pytest.raises(HTTPException) as exc:
+        await admin_service.get_premium_posts_queue(1, cursor=encode_cursor(values))
+    assert exc.value.status_code == 400
+    assert client.executed == []
+
+
+@pytest.mark.asyncio
+async def test_analytics_timeseries_reads_the_series_from_one_rpc(fake_supabase):
+    client = fake_supabase(admin_service)
+    points = [{"day": "2025-01-01", "product_type": "program", "tier": "premium", "count": 2, "amount_cents": 9800}]
+    client.handlers["rpc:get_analytics_timeseries"] = lambda q: {
+        "points": points,
+        "totals": {"count": 2, "amount_cents": 9800},
+    }
+
+    result = await admin_service.analytics_timeseries("revenue", date(2025, 1, 1), date(2025, 1, 31))
+
+    assert result["points"] == points
+    assert result["totals"] == {"count": 2, "amount_cents": 9800}
+    assert client.queries("rpc:get_analytics_timeseries")[0].params == {
+        "p_metric": "revenue",
+        "p_start_date": "2025-01-01",
+        "p_end_date": "2025-01-31",
+    }
+    assert not client.queries("analytics_daily")
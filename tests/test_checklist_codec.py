@@ -0,0 +1,38 @@
+import base64
+
+from app.services.winter_arc.checklist_codec import (
+    decode_mask,
+    decode_row,
+    encode_mask,
+    mask_delta,
+    pack_masks,
+)
+from app.services.winter_arc.checklist_service import DAILY_ITEMS, WEEKLY_ITEMS
+
+
+def test_mask_round_trip():
+    row = {"wake_up_early": True, "workout": True, "small_overcoming": True, "clean_eating": False}
+    mask = encode_mask(row, DAILY_ITEMS)
+    assert mask == 0b1000001001
+    decoded = decode_mask(mask, DAILY_ITEMS)
+    assert [item for item, done in decoded.items() if done] == [
+        "wake_up_early",
+        "workout",
+        "small_overcoming",
+    ]
+    assert encode_mask(dict.fromkeys(WEEKLY_ITEMS, True), WEEKLY_ITEMS) == 0xFF
+
+
+def test_pack_masks_is_fixed_width_little_endian():
+    packed = base64.b64decode(pack_masks([0x3FF, 0, 1], 2))
+    assert packed == b"\xff\x03\x00\x00\x01\x00"
+
+
+def test_mask_delta_and_decode_row_keep_api_contract():
+    set_bits, clear_bits = mask_delta({"workout": True, "wake_up_early": False}, DAILY_ITEMS)
+    assert (set_bits, clear_bits) == (0b1000, 0b1)
+    stored = {"id": 7, "items_mask": (0b1 & ~clear_bits) | set_bits, "is_fully_completed": False}
+    row = decode_row(stored, DAILY_ITEMS)
+    assert "items_mask" not in row
+    assert row["workout"] and not row["wake_up_early"]
+    assert row["id"] == 7
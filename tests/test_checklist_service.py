@@ -0,0 +1,105 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.v1.routers.winter_arc import SyncChecklistsIn
+from app.services.winter_arc import checklist_service
+from app.services.winter_arc.checklist_service import DAILY_ITEMS, WEEKLY_ITEMS
+
+
+def _checklist_table(stored, completed):
+    """Upserts echo their rows; the merge read gets `stored`, the streak read `completed`."""
+
+    def handler(q):
+        if q.first("upsert"):
+            return q.first("upsert")[0]
+        if q.first("in_"):
+            return stored
+        return completed
+
+    return handler
+
+
+def _upserts(client, table):
+    return [(q.first("upsert")[0], q.calls[-1][2]) for q in client.queries(table) if q.first("upsert")]
+
+
+def _progress_updates(client):
+    return [
+        args[0]
+        for q in client.queries("winter_arc_user_progress")
+        for call, args, _ in q.calls
+        if call == "update"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_merges_deltas_and_upserts_each_table_once(fake_supabase, monkeypatch):
+    monkeypatch.setattr(checklist_service.settings, "checklist_storage_mode", "columns")
+    client = fake_supabase(checklist_service)
+    year, week = checklist_service.get_iso_week_info(datetime.now(UTC).date())
+    client.handlers["winter_arc_daily_checklists"] = _checklist_table(
+        [{"checklist_date": "2025-01-06", "morning_hydration": True, "workout": True}], []
+    )
+    client.handlers["winter_arc_weekly_checklists"] = _checklist_table(
+        [], [{"year": year, "week_number": week, "is_fully_completed": True}]
+    )
+    client.handlers["winter_arc_user_progress"] = lambda q: [{"id": 1}] if q.first("select") else []
+
+    result = await checklist_service.sync_checklists(
+        "u1",
+        1,
+        [
+            {"checklist_date": "2025-01-06", "wake_up_early": True, "workout": None},
+            {"checklist_date": "2025-01-06", "workout": False},
+            {"checklist_date": "2025-01-07", "clean_eating": True},
+        ],
+        [
+            {"year": year, "week_number": week, "meal_prep": True},
+            {"year": year, "week_number": week, "meal_prep": False, "progress_review": True},
+        ],
+    )
+
+    ((daily_rows, daily_kwargs),) = _upserts(client, "winter_arc_daily_checklists")
+    assert daily_kwargs == {"on_conflict": "user_id,program_id,checklist_date"}
+    first, second = daily_rows
+    assert first["checklist_date"] == "2025-01-06" and set(DAILY_ITEMS) <= first.keys()
+    assert {item for item in DAILY_ITEMS if first[item]} == {"wake_up_early", "morning_hydration"}
+    assert {item for item in DAILY_ITEMS if second[item]} == {"clean_eating"}
+
+    ((weekly_rows, weekly_kwargs),) = _upserts(client, "winter_arc_weekly_checklists")
+    assert weekly_kwargs == {"on_conflict": "user_id,program_id,year,week_number"}
+    (weekly,) = weekly_rows
+    assert {item for item in WEEKLY_ITEMS if weekly[item]} == {"progress_review"}
+    assert (weekly["year"], weekly["week_number"]) == (year, week)
+    assert [len(result["daily"]), len(result["weekly"])] == [2, 1]
+
+    # Each streak recomputed once, the weekly one into the weekly columns
+    assert _progress_updates(client) == [
+        {"current_daily_streak": 0, "longest_daily_streak": 0, "total_days_completed": 0},
+        {"current_weekly_streak": 1, "longest_weekly_streak": 1, "total_weeks_completed": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_daily_streak_lands_in_the_daily_columns(fake_supabase):
+    client = fake_supabase(checklist_service)
+    today = datetime.now(UTC).date()
+    client.handlers["winter_arc_daily_checklists"] = lambda q: [
+        {"checklist_date": (today - timedelta(days=n)).isoformat(), "is_fully_completed": True}
+        for n in (0, 1, 3)
+    ]
+    client.handlers["winter_arc_user_progress"] = lambda q: [{"id": 1}] if q.first("select") else []
+
+    await checklist_service.update_daily_streak("u1", 1)
+
+    assert _progress_updates(client) == [
+        {"current_daily_streak": 2, "longest_daily_streak": 2, "total_days_completed": 3}
+    ]
+
+
+@pytest.mark.parametrize("week", [{"year": 0, "week_number": 1}, {"year": 2025, "week_number": 54}])
+def test_sync_rejects_weeks_out_of_range(week):
+    with pytest.raises(ValidationError):
+        SyncChecklistsIn(weekly=[week])
@@ -0,0 +1,78 @@
+import pytest
+
+from app.core.pagination import decode_cursor
+from app.services.posts import comments_service
+from app.services.posts.comments_service import _count_replies, build_comment_tree
+
+
+def test_count_replies_covers_the_whole_subtree():
+    rows = [
+        {"id": 1, "parent_comment_id": None},
+        {"id": 2, "parent_comment_id": 1},
+        {"id": 3, "parent_comment_id": 2},
+        {"id": 4, "parent_comment_id": 1},
+        {"id": 5, "parent_comment_id": None},
+    ]
+    assert _count_replies(rows, 1) == 3
+    assert _count_replies(rows, 2) == 1
+    assert _count_replies(rows, 5) == 0
+
+
+def _row(comment_id, parent=None, user="u1"):
+    return {"id": comment_id, "parent_comment_id": parent, "user_id": user}
+
+
+def test_build_comment_tree_nests_in_one_pass_and_caps_depth():
+    rows = [_row(1), _row(2, 1, "u2"), _row(3, 2), _row(4, 3), _row(5), _row(6, 99)]
+    cards = {"u2": {"user_id": "u2", "name": "Ana", "avatar_url": None}}
+
+    roots = build_comment_tree(rows, max_depth=2, cards=cards)
+
+    assert [r["id"] for r in roots] == [1, 5]
+    reply = roots[0]["replies"][0]
+    assert reply["id"] == 2 and reply["author"]["name"] == "Ana"
+    # 4 replies to 3, which is already at the cap, so it is shown beside 3
+    assert [(r["id"], r["depth"]) for r in reply["replies"]] == [(3, 2), (4, 2)]
+    assert roots[1]["replies"] == []  # 6's parent is not on this page
+
+
+def _thread_rows(root_id, replies, more_roots):
+    created = f"2025-01-01T00:00:{root_id:02d}+00:00"
+    rows = [{**_row(root_id), "created_at": created, "thread_root_id": root_id}]
+    rows += [
+        {**_row(root_id * 1000 + i, root_id), "created_at": created, "thread_root_id": root_id}
+        for i in range(replies)
+    ]
+    return [{**row, "more_roots": more_roots} for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_single_thread_over_the_row_cap_still_pages_on(fake_supabase, monkeypatch):
+    monkeypatch.setattr(comments_service, "MAX_PAGE_COMMENTS", 4)
+    client = fake_supabase(comments_service)
+    client.handlers["rpc:get_comment_threads"] = lambda q: _thread_rows(1, 3, True)
+
+    threads, cursor = await comments_service.list_comment_threads(7, limit=2)
+
+    assert [t["id"] for t in threads] == [1]
+    assert threads[0]["replies_truncated"] is True
+    assert "more_roots" not in threads[0]
+    assert decode_cursor(cursor, 2) == [threads[0]["created_at"], 1]
+
+
+@pytest.mark.asyncio
+async def test_thread_pages_end_when_no_roots_follow(fake_supabase, monkeypatch):
+    monkeypatch.setattr(comments_service, "MAX_PAGE_COMMENTS", 4)
+    client = fake_supabase(comments_service)
+
+    client.handlers["rpc:get_comment_threads"] = lambda q: _thread_rows(1, 3, False)
+    _, cursor = await comments_service.list_comment_threads(7, limit=2)
+    assert cursor is None
+
+    # Two threads hit the cap: the second may be cut, so it starts the next page
+    client.handlers["rpc:get_comment_threads"] = lambda q: (
+        _thread_rows(1, 1, True) + _thread_rows(2, 1, False)
+    )
+    threads, cursor = await comments_service.list_comment_threads(7, limit=2)
+    assert [t["id"] for t in threads] == [1]
+    assert decode_cursor(cursor, 2) == [threads[0]["created_at"], 1]
@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.counter_buffer import CounterBuffer
+
+
+@pytest.mark.asyncio
+async def test_increments_aggregate_and_flush_on_stop():
+    flushed = []
+
+    async def flush(batch):
+        flushed.append(batch)
+
+    buffer = CounterBuffer(flush, interval_seconds=60)
+    assert not buffer.add(("u1", 1), completions=1)
+
+    await buffer.start()
+    for _ in range(5):
+        buffer.add(("u1", 1), completions=1, minutes=3)
+    buffer.add(("u2", 1), completions=1, minutes=3)
+    assert buffer.pending(("u1", 1)) == {"completions": 5, "minutes": 15}
+
+    await buffer.stop()
+    assert flushed == [
+        {("u1", 1): {"completions": 5, "minutes": 15}, ("u2", 1): {"completions": 1, "minutes": 3}}
+    ]
+    assert buffer.pending(("u1", 1)) == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_increments():
+    calls = []
+
+    async def flush(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("rpc unavailable")
+
+    buffer = CounterBuffer(flush, interval_seconds=60)
+    await buffer.start()
+    buffer.add("k", n=2)
+    await buffer.flush()
+    buffer.add("k", n=1)
+    assert buffer.pending("k") == {"n": 3}
+
+    await buffer.stop()
+    assert calls[-1] == {"k": {"n": 3}}
@@ -55,3 +55,41 @@ async def test_checkout_endpoints_exist():
         assert r1.status_code in (200, 500)  # 500 if stripe key missing
         r2 = await ac.post("/api/v1/programs/1/checkout?tier=premium", headers={"Authorization": f"Bearer {token}"})
         assert r2.status_code in (200, 500)
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_conditional_get():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/winter-arc/programs/1/leaderboard")
+        assert r.status_code == 200
+        assert r.headers["cache-control"].startswith("public")
+        r2 = await ac.get(
+            "/api/v1/winter-arc/programs/1/leaderboard",
+            headers={"If-None-Match": r.headers["etag"]},
+        )
+        assert r2.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_cors_exposes_pagination_and_cache_headers():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/ebooks", headers={"Origin": "http://localhost:3000"})
+    exposed = {h.strip().lower() for h in r.headers["access-control-expose-headers"].split(",")}
+    assert {"x-next-cursor", "etag", "x-leaderboard-refreshed-at"} <= exposed
+
+
+@pytest.mark.asyncio
+async def test_analytics_timeseries_admin_only_and_bounded():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        user = {"Authorization": f"Bearer {fake_jwt()}"}
+        admin = {"Authorization": f"Bearer {fake_jwt(roles=['admin'])}"}
+        r = await ac.get("/api/v1/admin/analytics/timeseries", headers=user)
+        assert r.status_code == 403
+        r = await ac.get("/api/v1/admin/analytics/timeseries?metric=enrollment", headers=admin)
+        assert r.status_code == 200
+        assert r.json()["metric"] == "enrollment" and r.json()["points"] == []
+        r = await ac.get(
+            "/api/v1/admin/analytics/timeseries?start_date=2024-01-01&end_date=2025-06-01",
+            headers=admin,
+        )
+        assert r.status_code == 400
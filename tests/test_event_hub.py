@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.core.event_hub import EventHub
+
+
+async def _wait(sub, seconds):
+    try:
+        async with asyncio.timeout(seconds):
+            return await sub.wait()
+    except TimeoutError:
+        return set()
+
+
+@pytest.mark.asyncio
+async def test_notifications_coalesce_per_connection():
+    hub = EventHub(max_subscriptions=2)
+    fast = hub.subscribe(("leaderboard", 1), ("progress", "u1", 1))
+    slow = hub.subscribe(("leaderboard", 1))
+    assert hub.subscribe(("leaderboard", 1)) is None
+
+    for _ in range(100):
+        hub.publish(("leaderboard", 1))
+    hub.publish(("progress", "u1", 1))
+    hub.publish(("leaderboard", 2))
+
+    assert await _wait(fast, 0.1) == {("leaderboard", 1), ("progress", "u1", 1)}
+    assert await _wait(slow, 0.1) == {("leaderboard", 1)}
+    assert await _wait(slow, 0.01) == set()
+
+    hub.unsubscribe(slow)
+    hub.unsubscribe(fast)
+    assert hub.subscriptions == 0 and not hub.has_subscribers(("leaderboard", 1))
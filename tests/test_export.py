@@ -0,0 +1,72 @@
+import gzip
+
+import orjson
+import pytest
+
+from app.services.winter_arc import export_service
+
+
+def _paged_table(rows):
+    """Handler answering `gt("id", ...)` / `limit(n)` keyset reads from `rows`."""
+
+    def handler(q):
+        after = q.first("gt")
+        (limit,) = q.first("limit")
+        start = after[1] if after else 0
+        return [row for row in rows if row["id"] > start][:limit]
+
+    return handler
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_table_rows_continue_after_the_last_id_of_each_page(fake_supabase):
+    client = fake_supabase(export_service)
+    rows = [{"id": i, "user_id": "u1"} for i in range(1, 6)]
+    client.handlers["winter_arc_progress_snapshots"] = _paged_table(rows)
+
+    seen = [row async for row in export_service.iter_table_rows("winter_arc_progress_snapshots", "u1", 1, 2)]
+
+    assert seen == rows
+    pages = client.queries("winter_arc_progress_snapshots")
+    assert [q.first("gt") for q in pages] == [None, ("id", 2), ("id", 4)]
+
+
+@pytest.mark.asyncio
+async def test_export_is_one_json_object_per_line(fake_supabase):
+    client = fake_supabase(export_service)
+    client.handlers["winter_arc_daily_checklists"] = _paged_table(
+        [{"id": 1, "checklist_date": "2025-01-01", "items_mask": 0b1001}]
+    )
+    client.handlers["winter_arc_progress_snapshots"] = _paged_table(
+        [{"id": i, "weight_kg": 80 - i, "notes": "line\nbreak"} for i in range(1, 4)]
+    )
+
+    body = await _collect(export_service.export_ndjson("u1", 1, page_size=2))
+
+    assert body.endswith(b"\n")
+    records = [orjson.loads(line) for line in body.splitlines()]
+    assert records[0]["type"] == "export" and records[0]["user_id"] == "u1"
+    assert [r["type"] for r in records[1:]] == ["daily_checklist"] + ["progress_snapshot"] * 3
+    daily = records[1]
+    assert "items_mask" not in daily
+    assert daily["wake_up_early"] and daily["workout"] and not daily["ten_min_silence"]
+    assert records[2]["notes"] == "line\nbreak"
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_emits_a_valid_gzip_member_incrementally():
+    lines = [orjson.dumps({"type": "row", "id": i}) + b"\n" for i in range(2000)]
+
+    async def source():
+        for line in lines:
+            yield line
+
+    chunks = [chunk async for chunk in export_service.gzip_stream(source(), flush_bytes=4096)]
+
+    assert len(chunks) > 2  # flushed along the way, not only at the end
+    assert chunks[0][:2] == b"\x1f\x8b"
+    assert gzip.decompress(b"".join(chunks)) == b"".join(lines)
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.core.jobs import JobRegistry
+
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_single_active_run():
+    registry = JobRegistry()
+    gate = asyncio.Event()
+
+    async def work(report):
+        report(phase="loading", done=1)
+        await gate.wait()
+        return {"updated": 3}
+
+    job = registry.start("recompute", work)
+    await asyncio.sleep(0)
+    assert registry.start("recompute", work) is job
+    assert job.status == "running" and job.progress == {"phase": "loading", "done": 1}
+
+    gate.set()
+    await registry.wait(job)
+    assert registry.get(job.id).to_dict()["status"] == "succeeded"
+    assert job.result == {"updated": 3}
+    assert registry.start("recompute", work) is not job
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error():
+    registry = JobRegistry()
+
+    async def boom(report):
+        raise RuntimeError("db down")
+
+    job = await registry.wait(registry.start("recompute", boom))
+    assert job.status == "failed" and job.error == "db down"
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_schedules_and_runs_in_flight():
+    registry = JobRegistry()
+    started = asyncio.Event()
+
+    async def slow(report):
+        started.set()
+        await asyncio.sleep(3600)
+
+    registry.every("recompute", 0, slow)
+    await started.wait()
+    (job,) = registry._active.values()
+
+    await registry.stop()
+
+    assert job.status == "cancelled" and job.finished_at is not None
+    assert registry._tasks == {} and registry._active == {}
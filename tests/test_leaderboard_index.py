@@ -0,0 +1,40 @@
+import random
+
+from app.services.winter_arc.leaderboard_index import IndexableSkipList, ProgramLeaderboard
+
+
+def test_skip_list_rank_and_slice_match_sorted_reference():
+    rng = random.Random(7)
+    skip, reference = IndexableSkipList(), []
+    for _ in range(2000):
+        key = (rng.randint(0, 50), rng.randint(0, 10_000))
+        if key in reference:
+            skip.remove(key)
+            reference.remove(key)
+        else:
+            skip.insert(key, key)
+            reference.append(key)
+        reference.sort()
+    assert len(skip) == len(reference)
+    assert skip.slice(0, len(reference)) == reference
+    for pos in (0, len(reference) // 2, len(reference) - 1):
+        assert skip.rank(reference[pos]) == pos
+        assert skip.slice(pos, 3) == reference[pos : pos + 3]
+
+
+def test_program_leaderboard_orders_by_score_then_days():
+    board = ProgramLeaderboard()
+    board.upsert({"user_id": "a", "leaderboard_score": 100, "total_days_completed": 3})
+    board.upsert({"user_id": "b", "leaderboard_score": 300, "total_days_completed": 1})
+    board.upsert({"user_id": "c", "leaderboard_score": 100, "total_days_completed": 9})
+    assert [e["user_id"] for e in board.page(0, 10)] == ["b", "c", "a"]
+
+    board.upsert({"user_id": "a", "leaderboard_score": 500})
+    assert board.position("a")["leaderboard_rank"] == 1
+    context = board.context("b", 1)
+    assert [e["user_id"] for e in context["entries_above"]] == ["a"]
+    assert [e["user_id"] for e in context["entries_below"]] == ["c"]
+
+    board.upsert({"user_id": "b", "show_on_leaderboard": False})
+    assert board.rank("b") is None
+    assert [e["leaderboard_rank"] for e in board.page(0, 10)] == [1, 2]
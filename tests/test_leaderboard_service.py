@@ -0,0 +1,131 @@
+import pytest
+
+from app.services.winter_arc import leaderboard_service
+from app.services.winter_arc.leaderboard_index import ProgramLeaderboard, index
+
+
+@pytest.mark.asyncio
+async def test_view_pages_report_the_recorded_refresh_time(fake_supabase):
+    client = fake_supabase(leaderboard_service)
+    client.handlers[leaderboard_service.LEADERBOARD_TABLE] = lambda q: [
+        {"leaderboard_rank": 1, "user_id": "u1", "program_id": 901}
+    ]
+    client.handlers[leaderboard_service.REFRESH_TABLE] = lambda q: [
+        {"refreshed_at": "2025-01-01T00:00:00+00:00"}
+    ]
+
+    entries, refreshed_at = await leaderboard_service.get_leaderboard_page(901, 10, 0)
+
+    assert [e["user_id"] for e in entries] == ["u1"]
+    assert refreshed_at == "2025-01-01T00:00:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_empty_view_pages_skip_the_refresh_lookup(fake_supabase):
+    client = fake_supabase(leaderboard_service)
+
+    entries, refreshed_at = await leaderboard_service.get_leaderboard_page(902, 10, 0)
+
+    assert entries == [] and refreshed_at is None
+    assert not client.queries(leaderboard_service.REFRESH_TABLE)
+
+
+@pytest.mark.asyncio
+async def test_users_missing_from_a_loaded_board_cost_no_query(fake_supabase, monkeypatch):
+    client = fake_supabase(leaderboard_service)
+    board = ProgramLeaderboard()
+    board.upsert({"user_id": "shown", "leaderboard_score": 10})
+    monkeypatch.setitem(index._programs, 903, board)
+
+    assert (await leaderboard_service.get_user_leaderboard_position("shown", 903))["leaderboard_rank"] == 1
+    assert await leaderboard_service.get_user_leaderboard_position("hidden", 903) is None
+    assert client.executed == []
+
+
+@pytest.mark.asyncio
+async def test_scheduled_recompute_covers_every_active_program(fake_supabase, monkeypatch):
+    client = fake_supabase(leaderboard_service)
+    client.handlers["programs"] = lambda q: [{"id": 1}, {"id": 2}, {"id": 3}]
+    recomputed = []
+
+    async def recompute(program_id, report=None):
+        recomputed.append(program_id)
+        if program_id == 2:
+            raise RuntimeError("db down")
+        return {"updated": program_id}
+
+    monkeypatch.setattr(leaderboard_service, "update_all_leaderboard_scores", recompute)
+    progress = []
+
+    result = await leaderboard_service.update_active_leaderboard_scores(lambda **p: progress.append(p))
+
+    assert recomputed == [1, 2, 3]
+    assert result["programs"] == {1: {"updated": 1}, 2: {"error": "db down"}, 3: {"updated": 3}}
+    assert progress[-1] == {"phase": "programs", "done": 3, "programs": 3}
+    (or_filter,) = client.queries("programs")[0].first("or_")
+    assert or_filter.startswith("end_date.is.null,end_date.gte.")
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    rows = []
+
+    async def sync_progress(program_id, row):
+        rows.append((program_id, row))
+
+    monkeypatch.setattr(index, "sync_progress", sync_progress)
+    return rows
+
+
+def _progress_updates(client):
+    return [q for q in client.queries("winter_arc_user_progress") if q.first("update")]
+
+
+@pytest.mark.asyncio
+async def test_clean_scores_are_not_rewritten(fake_supabase, synced):
+    client = fake_supabase(leaderboard_service)
+    row = {"user_id": "u1", "score_inputs_version": 4, "score_version": 4, "leaderboard_score": 50}
+    client.handlers["winter_arc_user_progress"] = lambda q: [row]
+
+    assert await leaderboard_service.update_user_leaderboard_score("u1", 1) == row
+    assert _progress_updates(client) == [] and synced == []
+    assert not client.queries("winter_arc_user_achievements")
+
+
+@pytest.mark.asyncio
+async def test_dirty_scores_are_written_once_against_the_read_version(fake_supabase, synced):
+    client = fake_supabase(leaderboard_service)
+    progress = {"user_id": "u1", "score_inputs_version": 5, "score_version": 4, "total_days_completed": 2}
+    client.handlers["winter_arc_user_progress"] = lambda q: (
+        [{**progress, **q.first("update")[0]}] if q.first("update") else [progress]
+    )
+
+    row = await leaderboard_service.update_user_leaderboard_score("u1", 1)
+
+    (update,) = _progress_updates(client)
+    assert update.first("update")[0] == {"leaderboard_score": row["leaderboard_score"], "score_version": 5}
+    assert ("eq", ("score_inputs_version", 5), {}) in update.calls
+    assert synced == [(1, row)]
+
+
+@pytest.mark.asyncio
+async def test_a_lost_race_leaves_the_index_alone(fake_supabase, synced):
+    client = fake_supabase(leaderboard_service)
+    progress = {"user_id": "u1", "score_inputs_version": 5, "score_version": 4}
+    # The compare-and-set matches no row: the inputs version moved on
+    client.handlers["winter_arc_user_progress"] = lambda q: [] if q.first("update") else [progress]
+
+    assert await leaderboard_service.update_user_leaderboard_score("u1", 1) is None
+    assert len(_progress_updates(client)) == 1 and synced == []
+
+
+@pytest.mark.asyncio
+async def test_position_reads_are_read_only(fake_supabase):
+    client = fake_supabase(leaderboard_service)
+    client.handlers[leaderboard_service.LEADERBOARD_TABLE] = lambda q: [
+        {"user_id": "u1", "leaderboard_rank": 3}
+    ]
+
+    assert (await leaderboard_service.get_user_leaderboard_position("u1", 904))["leaderboard_rank"] == 3
+    assert [q.target for q in client.executed] == [leaderboard_service.LEADERBOARD_TABLE]
+    assert not any(call in ("update", "upsert", "insert") for q in client.executed for call, _, _ in q.calls)
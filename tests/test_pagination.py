@@ -0,0 +1,51 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import clamp_limit, decode_cursor, encode_cursor, keyset, split_page
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return record
+
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 50
+    assert clamp_limit(1_000_000) == 100
+    assert clamp_limit(0) == 1
+    assert clamp_limit(500, maximum=200) == 200
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_cursor(["2025-01-01T10:00:00+00:00", 42])
+    assert decode_cursor(cursor, 2) == ["2025-01-01T10:00:00+00:00", 42]
+    assert decode_cursor(None, 2) is None
+    for bad in ("not-a-cursor!!", encode_cursor([1]), encode_cursor([{"a": 1}, 2])):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(bad, 2)
+        assert exc.value.status_code == 400
+
+
+def test_keyset_resumes_after_cursor_and_looks_ahead_one_row():
+    q = keyset(RecordingQuery(), encode_cursor(["2025-01-01", 7]), ("created_at", "id"), 20)
+    assert q.calls == [
+        ("or_", ('created_at.lt."2025-01-01",and(created_at.eq."2025-01-01",id.lt."7")',), {}),
+        ("order", ("created_at",), {"desc": True}),
+        ("order", ("id",), {"desc": True}),
+        ("limit", (21,), {}),
+    ]
+
+
+def test_split_page_builds_next_cursor_from_last_row():
+    rows = [{"date": f"2025-01-0{i}", "id": i} for i in range(1, 4)]
+    page, cursor = split_page(rows, 2, ("date", "id"))
+    assert page == rows[:2]
+    assert decode_cursor(cursor, 2) == ["2025-01-02", 2]
+    assert split_page(rows, 3, ("date", "id")) == (rows, None)
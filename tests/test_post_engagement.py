@@ -0,0 +1,82 @@
+import pytest
+
+from app.services.posts import likes_service, post_counters, posts_service
+
+
+@pytest.fixture
+def invalidated(monkeypatch):
+    programs = []
+    monkeypatch.setattr(posts_service, "invalidate_feed", programs.append)
+    return programs
+
+
+def _counter_rows(client):
+    return [q.params["p_rows"] for q in client.queries("rpc:increment_post_counters_batch")]
+
+
+@pytest.mark.asyncio
+async def test_like_and_unlike_are_idempotent(fake_supabase, invalidated):
+    client = fake_supabase(likes_service, post_counters)
+    likes: set = set()
+
+    def upsert_like(q):
+        row = q.first("upsert")[0]
+        key = (row["post_id"], row["user_id"])
+        if key in likes:
+            return []  # ON CONFLICT DO NOTHING returns no row
+        likes.add(key)
+        return [row]
+
+    def delete_like(q):
+        filters = {args[0]: args[1] for call, args, _ in q.calls if call == "eq"}
+        key = (filters["post_id"], filters["user_id"])
+        if key not in likes:
+            return []
+        likes.discard(key)
+        return [{"post_id": key[0], "user_id": key[1]}]
+
+    client.handlers["community_likes"] = lambda q: upsert_like(q) if q.first("upsert") else delete_like(q)
+
+    assert await likes_service.like_post(1, 7, "u1") == {"post_id": 7, "liked": True}
+    assert await likes_service.like_post(1, 7, "u1") == {"post_id": 7, "liked": True}
+    await likes_service.unlike_post(1, 7, "u1")
+    await likes_service.unlike_post(1, 7, "u1")
+
+    # Buffer not running: each counted change is written through; the feed cache is kept
+    assert _counter_rows(client) == [
+        [{"post_id": 7, "likes_count": 1, "comments_count": 0}],
+        [{"post_id": 7, "likes_count": -1, "comments_count": 0}],
+    ]
+    assert invalidated == []
+
+
+@pytest.mark.asyncio
+async def test_buffered_counters_aggregate_and_flush_once(fake_supabase, invalidated):
+    client = fake_supabase(post_counters)
+    await post_counters.buffer.start()
+    try:
+        for _ in range(3):
+            await post_counters.add(1, 7, likes_count=1)
+        await post_counters.add(1, 7, comments_count=2)
+        await post_counters.add(2, 9, likes_count=-4)
+        assert client.executed == []
+
+        # Read-your-writes, never below zero
+        assert post_counters.with_pending({"program_id": 1, "id": 7, "likes_count": 10}) == {
+            "program_id": 1,
+            "id": 7,
+            "likes_count": 13,
+            "comments_count": 2,
+        }
+        assert post_counters.with_pending({"program_id": 2, "id": 9, "likes_count": 1})["likes_count"] == 0
+    finally:
+        await post_counters.buffer.stop()
+
+    assert _counter_rows(client) == [
+        [
+            {"post_id": 7, "likes_count": 3, "comments_count": 2},
+            {"post_id": 9, "likes_count": -4, "comments_count": 0},
+        ]
+    ]
+    assert invalidated == []
+    assert post_counters.with_pending({"program_id": 1, "id": 7, "likes_count": 13})["likes_count"] == 13
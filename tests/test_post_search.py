@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.posts import posts_service
+from app.services.posts.posts_service import MAX_SEARCH_QUERY_LENGTH, normalize_search_query
+
+
+def test_normalize_search_query():
+    assert normalize_search_query("  cold   plunge\n day 3 ") == "cold plunge day 3"
+    assert normalize_search_query(None) == ""
+    assert len(normalize_search_query("x" * 1000)) == MAX_SEARCH_QUERY_LENGTH
+
+
+def _match(post_id, rank):
+    return {"id": post_id, "program_id": 1, "user_id": "u9", "likes_count": 0, "rank": rank}
+
+
+@pytest.mark.asyncio
+async def test_search_passes_visibility_and_resumes_after_the_cursor(fake_supabase):
+    client = fake_supabase(posts_service)
+    client.handlers["rpc:search_posts"] = lambda q: [_match(5, 0.25), _match(3, 0.0607927), _match(2, 0.01)]
+
+    posts, cursor = await posts_service.search_posts(1, {"sub": "u1"}, " cold  plunge ", limit=2)
+    assert [p["id"] for p in posts] == [5, 3]
+    assert decode_cursor(cursor, 2) == [0.0607927, 3]
+    first = client.queries("rpc:search_posts")[0].params
+    assert first["p_query"] == "cold plunge"
+    assert (first["p_viewer"], first["p_is_admin"]) == ("u1", False)
+    assert (first["p_after_rank"], first["p_after_id"], first["p_limit"]) == (None, None, 2)
+
+    await posts_service.search_posts(1, {"sub": "a1", "roles": ["admin"]}, "cold plunge", cursor, 2)
+    second = client.queries("rpc:search_posts")[1].params
+    assert (second["p_viewer"], second["p_is_admin"]) == ("a1", True)
+    assert (second["p_after_rank"], second["p_after_id"]) == (0.0607927, 3)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", [None, "", "   ", "a", " b \n"])
+async def test_search_skips_queries_under_two_characters(fake_supabase, query):
+    client = fake_supabase(posts_service)
+
+    assert await posts_service.search_posts(1, {"sub": "u1"}, query) == ([], None)
+    assert client.executed == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("values", [["high", 3], [0.5, "3"], [True, 3], [0.5, 3.5]])
+async def test_search_rejects_a_cursor_with_wrong_value_types(fake_supabase, values):
+    client = fake_supabase(posts_service)
+
+    with pytest.raises(HTTPException) as exc:
+        await posts_service.search_posts(1, {"sub": "u1"}, "cold plunge", encode_cursor(values))
+    assert (exc.value.status_code, exc.value.detail) == (400, "invalid_cursor")
+    assert client.executed == []
@@ -0,0 +1,108 @@
+"""
+search_posts (migration 0019) against a real PostgreSQL.
+
+Uses TEST_DATABASE_URL when set, otherwise a throwaway testcontainers PostgreSQL;
+skipped when psycopg is not installed or no server can be reached.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db" / "schema" / "0019_post_search.sql"
+SCHEMA = "search_posts_test"
+
+VIEWER = "00000000-0000-0000-0000-000000000001"
+OTHER = "00000000-0000-0000-0000-000000000002"
+
+
+@pytest.fixture(scope="module")
+def pg():
+    psycopg = pytest.importorskip("psycopg")
+    dsn = os.environ.get("TEST_DATABASE_URL")
+    container = None
+    if not dsn:
+        postgres = pytest.importorskip("testcontainers.postgres")
+        try:
+            container = postgres.PostgresContainer("postgres:16-alpine", driver=None).start()
+        except Exception as exc:
+            pytest.skip(f"no PostgreSQL server available: {exc}")
+        dsn = container.get_connection_url()
+    try:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            _apply_migration(conn)
+            yield conn
+            conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    finally:
+        if container is not None:
+            container.stop()
+
+
+def _apply_migration(conn) -> None:
+    # The migration revokes from the Supabase API roles
+    for role in ("anon", "authenticated"):
+        conn.execute(
+            f"DO $$ BEGIN IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '{role}') "
+            f"THEN CREATE ROLE {role} NOLOGIN; END IF; END $$"
+        )
+    conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    conn.execute(f"CREATE SCHEMA {SCHEMA}")
+    conn.execute(f"SET search_path TO {SCHEMA}, public")
+    conn.execute(
+        """
+        CREATE TABLE posts (
+          id BIGINT PRIMARY KEY,
+          user_id UUID NOT NULL,
+          program_id BIGINT NOT NULL,
+          title TEXT,
+          message TEXT,
+          photo_url TEXT,
+          visibility TEXT NOT NULL DEFAULT 'public',
+          likes_count INTEGER NOT NULL DEFAULT 0,
+          comments_count INTEGER NOT NULL DEFAULT 0,
+          is_pinned BOOLEAN NOT NULL DEFAULT FALSE,
+          created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+        """
+    )
+    conn.execute(MIGRATION.read_text())
+    posts = [
+        (1, VIEWER, 1, "Cold plunge day 3", "felt great", "public"),
+        (2, OTHER, 1, "Morning run", "then a cold plunge", "public"),
+        (3, OTHER, 1, "Cold plunge secrets", "only for me", "private"),
+        (4, VIEWER, 1, "My cold plunge log", "private notes", "private"),
+        (5, OTHER, 2, "Cold plunge elsewhere", "other program", "public"),
+        (6, OTHER, 1, "Leg day", "squats", "public"),
+    ]
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO posts (id, user_id, program_id, title, message, visibility) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            posts,
+        )
+
+
+def _search(conn, query, viewer=VIEWER, is_admin=False, after=(None, None), limit=10):
+    return conn.execute(
+        "SELECT id, rank FROM search_posts(%s, %s, %s::UUID, %s, %s::REAL, %s, %s)",
+        (1, query, viewer, is_admin, after[0], after[1], limit),
+    ).fetchall()
+
+
+def test_search_applies_the_feed_visibility_rule(pg):
+    assert {row[0] for row in _search(pg, "cold plunge")} == {1, 2, 4}
+    assert {row[0] for row in _search(pg, "cold plunge", viewer=OTHER)} == {1, 2, 3}
+    assert {row[0] for row in _search(pg, "cold plunge", is_admin=True)} == {1, 2, 3, 4}
+    assert _search(pg, '"plunge secrets" -leg', is_admin=True)[0][0] == 3
+
+
+def test_search_ranks_title_matches_first_and_pages_on_rank_and_id(pg):
+    ranked = _search(pg, "cold plunge", is_admin=True)
+    assert ranked[-1][0] == 2  # only its message matches
+    assert [r[1] for r in ranked] == sorted((r[1] for r in ranked), reverse=True)
+
+    # limit + 1 rows tell the caller another page exists
+    first = _search(pg, "cold plunge", is_admin=True, limit=2)
+    assert first == ranked[:3]
+    rest = _search(pg, "cold plunge", is_admin=True, after=first[1], limit=2)
+    assert rest == ranked[2:]
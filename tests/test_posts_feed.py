@@ -0,0 +1,115 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.pagination import decode_cursor
+from app.services.posts import likes_service, post_counters, posts_service
+from app.services.users import user_cards
+
+MEMBER = {"sub": "u1"}
+T0 = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def _post(post_id, visibility="public", user_id="u9"):
+    return {
+        "id": post_id,
+        "program_id": 1,
+        "user_id": user_id,
+        "visibility": visibility,
+        "likes_count": 0,
+        "created_at": (T0 + timedelta(minutes=post_id)).isoformat(),
+    }
+
+
+def _posts_table(posts):
+    """Answers the segment reads by their `eq` filters, newest first, up to `limit`."""
+
+    def handler(q):
+        filters = [args for call, args, _ in q.calls if call == "eq"]
+        rows = [p for p in posts if all(p.get(column) == value for column, value in filters)]
+        rows.sort(key=lambda p: (p["created_at"], p["id"]), reverse=True)
+        (limit,) = q.first("limit")
+        return rows[:limit]
+
+    return handler
+
+
+def _feed_reads(client):
+    return [q for q in client.queries("posts") if q.first("or_")]
+
+
+@pytest.fixture
+def feed(fake_supabase, monkeypatch):
+    monkeypatch.setattr(settings, "feed_cache_rows", 4)
+    posts_service.invalidate_feed()
+    yield fake_supabase(posts_service, likes_service, user_cards, post_counters)
+    posts_service.invalidate_feed()
+
+
+@pytest.mark.asyncio
+async def test_member_pages_merge_cached_public_and_private_segments(feed):
+    posts = [_post(1), _post(2, "private", "u1"), _post(3), _post(4, "private", "u2"), _post(5)]
+    feed.handlers["posts"] = _posts_table(posts)
+
+    page, cursor = await posts_service.list_posts(1, MEMBER, limit=2)
+    assert [p["id"] for p in page] == [5, 3]
+    page, cursor = await posts_service.list_posts(1, MEMBER, cursor, limit=2)
+    assert [p["id"] for p in page] == [2, 1]
+    assert cursor is None
+
+    # One read per segment, both served from the cache on the second page
+    assert len(feed.queries("posts")) == 2 and _feed_reads(feed) == []
+
+
+@pytest.mark.asyncio
+async def test_the_cursor_at_the_segment_seam_resumes_after_the_last_row(feed):
+    feed.handlers["posts"] = _posts_table([_post(1), _post(2, "private", "u1"), _post(3)])
+
+    page, cursor = await posts_service.list_posts(1, MEMBER, limit=1)
+    assert [p["id"] for p in page] == [3]
+    # The next row comes from the private segment; the cursor names the public one
+    assert decode_cursor(cursor, 2) == [_post(3)["created_at"], 3]
+
+    page, cursor = await posts_service.list_posts(1, MEMBER, cursor, limit=1)
+    assert [p["id"] for p in page] == [2]
+    page, cursor = await posts_service.list_posts(1, MEMBER, cursor, limit=1)
+    assert [p["id"] for p in page] == [1] and cursor is None
+
+
+@pytest.mark.asyncio
+async def test_pages_past_an_incomplete_segment_read_the_database(feed):
+    # Six public posts: the cached segment holds the newest four and is incomplete
+    feed.handlers["posts"] = _posts_table([_post(i) for i in range(1, 7)])
+
+    page, cursor = await posts_service.list_posts(1, MEMBER, limit=3)
+    assert [p["id"] for p in page] == [6, 5, 4]
+    assert _feed_reads(feed) == []
+
+    # Only one cached row is left after the cursor, not more than `limit`
+    await posts_service.list_posts(1, MEMBER, cursor, limit=3)
+    (read,) = _feed_reads(feed)
+    visibility, after = [args[0] for call, args, _ in read.calls if call == "or_"]
+    assert visibility == 'visibility.eq.public,user_id.eq."u1"'
+    assert after.endswith('id.lt."4")')
+
+
+@pytest.mark.asyncio
+async def test_counter_flushes_update_cached_rows_in_place(feed):
+    feed.handlers["posts"] = _posts_table([_post(1), _post(2, "private", "u1")])
+    await posts_service.list_posts(1, MEMBER)
+
+    await post_counters.add(1, 1, likes_count=2)
+    await post_counters.add(1, 2, likes_count=1, comments_count=1)
+    page, _ = await posts_service.list_posts(1, MEMBER)
+
+    assert [(p["id"], p["likes_count"], p.get("comments_count")) for p in page] == [(2, 1, 1), (1, 2, None)]
+    assert len(feed.queries("posts")) == 2
+
+
+def test_members_see_public_and_own_posts_and_admins_everything(feed):
+    member = posts_service._visible_to(feed.table("posts"), MEMBER)
+    admin = posts_service._visible_to(feed.table("posts"), {"sub": "a1", "roles": ["admin"]})
+
+    assert member.calls == [("or_", ('visibility.eq.public,user_id.eq."u1"',), {})]
+    assert admin.calls == []
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.winter_arc import progress_service, suggestions_service
+
+
+def _writes(client, table):
+    return [
+        (call, args[0])
+        for query in client.queries(table)
+        for call, args, _ in query.calls
+        if call in ("insert", "update")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_sets_only_a_missing_baseline_in_one_conditional_update(fake_supabase):
+    client = fake_supabase(progress_service)
+    client.handlers["winter_arc_progress_snapshots"] = lambda q: [{"id": 2, "weight_kg": 94.0}]
+
+    await progress_service.create_progress_snapshot("u1", 1, 94.0)
+
+    (query,) = client.queries("winter_arc_user_progress")
+    assert _writes(client, "winter_arc_user_progress") == [("update", {"baseline_weight_kg": 94.0})]
+    assert query.first("is_") == ("baseline_weight_kg", "null")
+    assert [q.target for q in client.executed] == ["winter_arc_progress_snapshots", "winter_arc_user_progress"]
+
+
+@pytest.mark.asyncio
+async def test_progress_weight_updates_evaluate_the_weight_rule(fake_supabase):
+    client = fake_supabase(progress_service, suggestions_service)
+    suggestions_service._suggested_cache.clear()
+    client.handlers["winter_arc_user_progress"] = lambda q: [
+        {"user_id": "u2", "program_id": 1, "current_weight_kg": 94.0, "baseline_weight_kg": 100.0}
+    ]
+    client.handlers["winter_arc_post_suggestions"] = lambda q: (
+        [] if q.first("select") else q.first("upsert")[0]
+    )
+
+    created = await suggestions_service.check_and_trigger_suggestions("u2", 1, {"progress"})
+
+    assert [s["suggestion_type"] for s in created] == ["weight_milestone_5"]
@@ -0,0 +1,24 @@
+from datetime import date, timedelta
+
+from app.services.winter_arc.trends_service import summarize_series
+
+
+def test_summary_is_fixed_size_with_slope_and_projection():
+    start = date(2025, 1, 1)
+    # 1 year of daily weights losing 0.1 kg/day
+    points = [(start + timedelta(days=i), 90 - 0.1 * i) for i in range(365)]
+    end = points[-1][0] + timedelta(days=14)
+
+    summary = summarize_series(points, end)
+
+    assert summary["count"] == 365
+    assert len(summary["daily"]) == 28 and len(summary["weekly"]) == 26
+    assert summary["slope_per_week"] == -0.7
+    assert summary["projected_end_value"] == round(points[-1][1] - 1.4, 2)
+    assert summary["avg_7d"] == round(points[-1][1] + 0.3, 2)
+
+
+def test_single_point_has_no_slope():
+    summary = summarize_series([(date(2025, 1, 1), 80.0)])
+    assert summary["slope_per_week"] is None and summary["change"] == 0
+    assert summarize_series([]) == {"count": 0}
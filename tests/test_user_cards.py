@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.users import profile_service, user_cards
+
+
+@pytest.fixture
+def cards(fake_supabase):
+    user_cards._cards.clear()
+    client = fake_supabase(user_cards, profile_service)
+    profiles = {"u1": {"user_id": "u1", "name": "Ana", "avatar_url": "a.png"}}
+
+    def handler(q):
+        if q.first("update"):
+            profiles["u1"] = {**profiles["u1"], **q.first("update")[0]}
+            return [profiles["u1"]]
+        _, user_ids = q.first("in_")
+        return [profiles[u] for u in user_ids if u in profiles]
+
+    client.handlers["user_profiles"] = handler
+    yield client
+    user_cards._cards.clear()
+
+
+def _card_reads(client):
+    return [q.first("in_")[1] for q in client.queries("user_profiles") if q.first("in_")]
+
+
+@pytest.mark.asyncio
+async def test_authors_resolve_in_one_query_and_then_from_the_cache(cards):
+    items = [{"id": 1, "user_id": "u1"}, {"id": 2, "user_id": "u2"}, {"id": 3, "user_id": "u1"}]
+
+    first = await user_cards.attach_user_cards(items)
+    again = await user_cards.attach_user_cards(items)
+
+    assert first == again
+    assert first[0]["author"] == {"user_id": "u1", "name": "Ana", "avatar_url": "a.png"}
+    # Users without a profile get an empty card, cached like the others
+    assert first[1]["author"] == {"user_id": "u2", "name": None, "avatar_url": None}
+    assert _card_reads(cards) == [["u1", "u2"]]
+
+
+@pytest.mark.asyncio
+async def test_profile_updates_drop_the_cached_card(cards):
+    await user_cards.get_user_cards(["u1", "u2"])
+
+    await profile_service.update_profile({"sub": "u1"}, {"name": "Ana B"})
+    refreshed = await user_cards.get_user_cards(["u1", "u2"])
+
+    assert refreshed["u1"]["name"] == "Ana B"
+    assert _card_reads(cards) == [["u1", "u2"], ["u1"]]
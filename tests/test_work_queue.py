@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.core.work_queue import CoalescingWorkQueue
+
+
+@pytest.mark.asyncio
+async def test_submits_for_same_key_coalesce():
+    calls = []
+
+    async def handler(key, reasons):
+        calls.append((key, set(reasons)))
+
+    q = CoalescingWorkQueue(handler, debounce_seconds=0.05)
+    await q.start()
+    for _ in range(10):
+        assert q.submit(("user-1", 1), "daily_checklist")
+    q.submit(("user-1", 1), "weekly_checklist")
+    q.submit(("user-2", 1), "daily_checklist")
+    await asyncio.sleep(0.2)
+    await q.stop()
+
+    assert sorted(calls) == [
+        (("user-1", 1), {"daily_checklist", "weekly_checklist"}),
+        (("user-2", 1), {"daily_checklist"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_retry_and_stop_flushes_pending():
+    attempts = []
+
+    async def handler(key, reasons):
+        attempts.append(key)
+        if len(attempts) < 2:
+            raise RuntimeError("transient")
+
+    q = CoalescingWorkQueue(handler, debounce_seconds=60, retry_backoff_seconds=0)
+    assert not q.submit("k", "r")  # not started yet
+    await q.start()
+    q.submit("k", "r")
+    await q.stop()
+
+    assert attempts == ["k", "k"]
+
+
+@pytest.mark.asyncio
+async def test_stop_cut_short_by_the_caller_still_stops_the_workers():
+    started = asyncio.Event()
+
+    async def handler(key, reasons):
+        started.set()
+        await asyncio.sleep(60)
+
+    q = CoalescingWorkQueue(handler, debounce_seconds=0)
+    await q.start()
+    q.submit("slow", "r")
+    await started.wait()
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await q.stop()
+
+    assert not q.running and q._workers == []